@@ -0,0 +1,216 @@
+#
+# Time-stamp: <2026/10/18 16:05:23 (UT+08:00) daisuke>
+#
+
+######################################################################
+#                                                                    #
+# ADTS utilities                                                     #
+#                                                                    #
+#  reading of ADTS frame headers of AAC files, and extraction of    #
+#  ADTS audio from MPEG-TS segments without ffmpeg.                  #
+#                                                                    #
+######################################################################
+
+######################################################################
+
+#
+# Importing modules
+#
+
+# importing mmap module
+import mmap
+
+# importing os module
+import os
+
+######################################################################
+
+#
+# Constants
+#
+
+# sampling frequencies indexed by sampling_frequency_index
+list_sampling_frequency = [
+    96000, 88200, 64000, 48000, 44100, 32000,
+    24000, 22050, 16000, 12000, 11025, 8000, 7350,
+]
+
+# number of samples in one AAC frame
+samples_per_frame = 1024
+
+# size of MPEG-TS packet
+ts_packet_size = 188
+
+# sync byte of MPEG-TS packet
+ts_sync = 0x47
+
+# stream type of ADTS AAC in program map table
+stream_type_adts = 0x0F
+
+######################################################################
+
+#
+# Functions
+#
+
+# parsing ADTS header at given offset
+#  returning (frame length, sampling frequency), or None if no header
+def parse_header (data, offset):
+    if (offset + 7 > len (data)):
+        return (None)
+    if ( (data[offset] != 0xFF) or ( (data[offset+1] & 0xF6) != 0xF0) ):
+        return (None)
+    index = (data[offset+2] >> 2) & 0x0F
+    if (index >= len (list_sampling_frequency)):
+        return (None)
+    length = ( (data[offset+3] & 0x03) << 11) | (data[offset+4] << 3) \
+        | (data[offset+5] >> 5)
+    if (length < 7):
+        return (None)
+    return (length, list_sampling_frequency[index])
+
+# counting ADTS frames in data
+#  returning (number of frames, duration in second, offset of the end
+#  of the last complete frame); garbage between frames is skipped
+def scan_frames (data):
+    n_frames = 0
+    duration = 0.0
+    offset   = 0
+    end      = 0
+    size     = len (data)
+    while (offset + 7 <= size):
+        header = parse_header (data, offset)
+        if (header is None):
+            # searching next sync word
+            offset = data.find (b'\xff', offset + 1)
+            if (offset < 0):
+                break
+            continue
+        (length, frequency) = header
+        if (offset + length > size):
+            break
+        n_frames += 1
+        duration += samples_per_frame / frequency
+        offset   += length
+        end       = offset
+    return (n_frames, duration, end)
+
+# duration of ADTS file in second
+def file_duration (file_aac):
+    if (os.path.getsize (file_aac) == 0):
+        return (0.0)
+    with open (file_aac, 'rb') as fh:
+        with mmap.mmap (fh.fileno (), 0, access=mmap.ACCESS_READ) as data:
+            (n_frames, duration, end) = scan_frames (data)
+    return (duration)
+
+# removing ID3 tags put at the head of packed audio segments
+def strip_id3 (data):
+    while ( (len (data) >= 10) and (data[0:3] == b'ID3') ):
+        # tag size is a 28-bit syncsafe integer
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        if (data[5] & 0x10):
+            # footer present
+            size += 10
+        data = data[10 + size:]
+    return (data)
+
+# checking whether data is MPEG-TS
+def is_ts (data):
+    if (len (data) < ts_packet_size):
+        return (False)
+    if (data[0] != ts_sync):
+        return (False)
+    if (len (data) >= 2 * ts_packet_size):
+        return (data[ts_packet_size] == ts_sync)
+    return (True)
+
+# PSI section in payload of TS packet, skipping pointer field
+#  sections spanning more than one packet are not supported, which
+#  is enough for PAT and PMT of audio streams
+def psi_section (payload):
+    if (len (payload) < 1):
+        return (b'')
+    pointer = payload[0]
+    section = payload[1 + pointer:]
+    if (len (section) < 3):
+        return (b'')
+    length = ( (section[1] & 0x0F) << 8) | section[2]
+    # CRC is not included
+    return (section[:3 + length - 4])
+
+# PID of program map table from program association table
+def parse_pat (section):
+    for offset in range (8, len (section) - 3, 4):
+        program = (section[offset] << 8) | section[offset+1]
+        if (program != 0):
+            return ( ( (section[offset+2] & 0x1F) << 8) | section[offset+3])
+    return (None)
+
+# PID of ADTS audio stream from program map table
+#  ValueError is raised if the program has no ADTS audio, such as
+#  LATM or MPEG audio, which is left to ffmpeg
+def parse_pmt (section):
+    if (len (section) < 12):
+        return (None)
+    info_length = ( (section[10] & 0x0F) << 8) | section[11]
+    offset = 12 + info_length
+    list_type = []
+    while (offset + 5 <= len (section)):
+        stream_type = section[offset]
+        pid = ( (section[offset+1] & 0x1F) << 8) | section[offset+2]
+        if (stream_type == stream_type_adts):
+            return (pid)
+        list_type.append (stream_type)
+        es_info_length = ( (section[offset+3] & 0x0F) << 8) | section[offset+4]
+        offset += 5 + es_info_length
+    raise ValueError (f'no ADTS audio in MPEG-TS, stream types: {list_type}')
+
+# extracting ADTS audio stream from MPEG-TS data
+#  payloads of PES packets of the audio stream are concatenated, and
+#  PES headers are removed
+def demux_ts (data):
+    pid_pmt   = None
+    pid_audio = None
+    list_es   = []
+    offset    = data.find (bytes ([ts_sync]))
+    while ( (offset >= 0) and (offset + ts_packet_size <= len (data)) ):
+        packet = data[offset:offset + ts_packet_size]
+        if (packet[0] != ts_sync):
+            # lost sync, searching next sync byte
+            offset = data.find (bytes ([ts_sync]), offset + 1)
+            continue
+        offset += ts_packet_size
+        pusi = packet[1] & 0x40
+        pid  = ( (packet[1] & 0x1F) << 8) | packet[2]
+        adaptation = (packet[3] >> 4) & 0x03
+        start = 4
+        if (adaptation & 0x02):
+            start += 1 + packet[4]
+        if ( (not (adaptation & 0x01)) or (start >= ts_packet_size) ):
+            continue
+        payload = packet[start:]
+        if (pid == 0):
+            if (pusi):
+                pid_pmt = parse_pat (psi_section (payload))
+        elif ( (pid == pid_pmt) and (pid_audio is None) ):
+            if (pusi):
+                pid_audio = parse_pmt (psi_section (payload))
+        elif ( (pid == pid_audio) and (pid_audio is not None) ):
+            if (pusi):
+                if ( (payload[0:3] != b'\x00\x00\x01') \
+                     or (len (payload) < 9) ):
+                    continue
+                payload = payload[9 + payload[8]:]
+            list_es.append (payload)
+    if (pid_audio is None):
+        raise ValueError ('no audio stream found in MPEG-TS')
+    return (b''.join (list_es))
+
+# converting a segment into ADTS
+#  MPEG-TS is demuxed, and ID3 tags of packed audio are removed
+def to_adts (data):
+    data = strip_id3 (data)
+    if (is_ts (data)):
+        data = demux_ts (data)
+    return (data)
@@ -0,0 +1,216 @@
+#
+# Time-stamp: <2026/10/19 01:22:08 (UT+08:00) daisuke>
+#
+
+######################################################################
+#                                                                    #
+# Index of archived recordings                                       #
+#                                                                    #
+#  recorded files <program>_<YYYYMMDD>_<hhmm>.aac in ~/audio/radio   #
+#  are indexed with their size, mtime and duration counted from ADTS #
+#  frame headers. A file is read again only when its size or mtime   #
+#  has changed since the last scan, so a scan of an unchanged        #
+#  archive costs one stat per file.                                  #
+#                                                                    #
+#  completeness of a recording is the duration of its file over the  #
+#  duration of the recording with margins, in percent, and missing   #
+#  or incomplete recordings of the last week are found from the      #
+#  index, without fetching the weekly HTML list.                     #
+#                                                                    #
+######################################################################
+
+######################################################################
+
+#
+# Importing modules
+#
+
+# importing bisect module
+import bisect
+
+# importing datetime module
+import datetime
+
+# importing json module
+import json
+
+# importing os module
+import os
+
+# importing re module
+import re
+
+# importing radio_adts module
+import radio_adts
+
+# importing radio_program_list module
+import radio_program_list
+
+######################################################################
+
+#
+# Constants
+#
+
+# directory of recorded files
+default_dir_radio = f"{os.environ['HOME']}/audio/radio"
+
+# default index file
+default_file_index \
+    = f"{os.environ['HOME']}/share/radio/cache/archive_index.json"
+
+# version of index file
+index_version = 1
+
+# threshold of completeness in percent
+default_threshold = 99.0
+
+# recorded file name, partial files starting with "." are not matched
+pattern_file = re.compile (r'^([^.].*)_(\d{8})_(\d{4})\.aac$')
+
+######################################################################
+
+#
+# Functions
+#
+
+# empty index of given directory
+#  files maps file name to [size, mtime in nsec, duration in sec]
+def new_index (dir_radio=default_dir_radio):
+    index = {
+        'version': index_version,
+        'dir': os.path.abspath (dir_radio),
+        'files': {},
+    }
+    return (index)
+
+# reading index file
+#  an index of another version or another directory is discarded
+def load_index (dir_radio=default_dir_radio, file_index=default_file_index):
+    try:
+        with open (file_index, 'r') as fh:
+            index = json.load (fh)
+    except (OSError, ValueError):
+        return (new_index (dir_radio))
+    if not ( (isinstance (index, dict)) \
+             and (index.get ('version') == index_version) \
+             and (index.get ('dir') == os.path.abspath (dir_radio)) \
+             and (isinstance (index.get ('files'), dict)) ):
+        return (new_index (dir_radio))
+    return (index)
+
+# writing index file atomically, without spaces
+def save_index (index, file_index=default_file_index):
+    os.makedirs (os.path.dirname (file_index), exist_ok=True)
+    file_tmp = f'{file_index}.{os.getpid ()}'
+    with open (file_tmp, 'w') as fh:
+        json.dump (index, fh, ensure_ascii=False, separators=(',', ':'))
+    os.replace (file_tmp, file_index)
+
+# scanning directory of recorded files into index
+#  numbers of files added or changed, unchanged and removed are
+#  returned
+def scan (index, verbosity=0):
+    files     = index['files']
+    n_changed = 0
+    n_kept    = 0
+    set_seen  = set ()
+    with os.scandir (index['dir']) as it:
+        for entry in it:
+            if not (pattern_file.match (entry.name)):
+                continue
+            try:
+                stat = entry.stat ()
+            except OSError:
+                continue
+            set_seen.add (entry.name)
+            old = files.get (entry.name)
+            if ( (old is not None) and (old[0] == stat.st_size) \
+                 and (old[1] == stat.st_mtime_ns) ):
+                n_kept += 1
+                continue
+            try:
+                duration = radio_adts.file_duration (entry.path)
+            except (OSError, ValueError):
+                continue
+            files[entry.name] = [stat.st_size, stat.st_mtime_ns, \
+                                 round (duration, 3)]
+            n_changed += 1
+            if (verbosity >= 2):
+                print (f'#    {entry.name}: {duration:.1f} sec')
+    list_removed = [name for name in files.keys () if (name not in set_seen)]
+    for name in list_removed:
+        del files[name]
+    return (n_changed, n_kept, len (list_removed))
+
+# start of recorded file in minutes since the epoch, from its name
+def file_minute (name):
+    match = pattern_file.match (name)
+    (date, hhmm) = (match.group (2), match.group (3))
+    datetime_file = datetime.datetime (int (date[0:4]), int (date[4:6]), \
+                                       int (date[6:8]), int (hhmm[0:2]), \
+                                       int (hhmm[2:4]))
+    return (int (datetime_file.timestamp ()) // 60)
+
+# files of each program sorted by start, for queries
+#  a dictionary of program to (list of starts, list of names)
+def program_files (index):
+    dic_list = {}
+    for name in index['files'].keys ():
+        program = pattern_file.match (name).group (1)
+        dic_list.setdefault (program, []).append ((file_minute (name), name))
+    dic_files = {}
+    for (program, list_file) in dic_list.items ():
+        list_file.sort ()
+        dic_files[program] = ([minute for (minute, name) in list_file], \
+                              [name for (minute, name) in list_file])
+    return (dic_files)
+
+# file of a recording started at given date/time, or None
+#  the start in file name is the one with or without margin before
+#  start, depending on recorder, so files from start of recording to
+#  start of program are looked for
+def find_file (dic_files, rec, datetime_start, \
+               pre=radio_program_list.margin_pre):
+    if (rec['program'] not in dic_files):
+        return (None)
+    (starts, names) = dic_files[rec['program']]
+    minute = int (datetime_start.timestamp ()) // 60
+    i = bisect.bisect_left (starts, minute - 1)
+    if ( (i < len (starts)) and (starts[i] <= minute + pre + 1) ):
+        return (names[i])
+    return (None)
+
+# completeness of a file for a recording in percent
+def completeness (index, name, rec):
+    if (name is None):
+        return (0.0)
+    duration = index['files'][name][2]
+    return (100.0 * duration / (rec['duration'] * 60))
+
+# latest broadcasts of recordings finished within the last week
+#  a list of (recording, start date/time) sorted by start is returned
+def last_week (compiled, datetime_now):
+    list_done = []
+    for rec in compiled['recs']:
+        datetime_start = radio_program_list.next_start (rec['start'], \
+                                                        datetime_now) \
+            - datetime.timedelta (days=7)
+        datetime_end   = datetime_start \
+            + datetime.timedelta (minutes=rec['duration'])
+        if (datetime_end <= datetime_now):
+            list_done.append ((rec, datetime_start))
+    list_done.sort (key=lambda item: item[1])
+    return (list_done)
+
+# status of recordings of the last week
+#  a list of (recording, start date/time, file name, completeness) is
+#  returned
+def week_status (index, compiled, datetime_now):
+    dic_files = program_files (index)
+    list_status = []
+    for (rec, datetime_start) in last_week (compiled, datetime_now):
+        name = find_file (dic_files, rec, datetime_start)
+        list_status.append ((rec, datetime_start, name, \
+                             completeness (index, name, rec)))
+    return (list_status)
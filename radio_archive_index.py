@@ -0,0 +1,205 @@
+#!/usr/pkg/bin/python3.12
+
+#
+# Time-stamp: <2026/10/19 01:40:55 (UT+08:00) daisuke>
+#
+
+#
+# indexing archived recordings and checking their completeness
+#
+#  recorded files in ~/audio/radio are scanned into the index of
+#  radio_archive, reading only new or changed files, and recordings of
+#  the last week in the program list are checked against the index.
+#  Commands of the timefree recorder for missing or incomplete
+#  recordings are printed in the same format as
+#  radio_check_unrecorded.pl, without fetching the weekly HTML list.
+#
+# usage:
+#
+#    printing commands for missing radiko recordings of the last week
+#    % radio_archive_index.py
+#
+#    recording them by timefree batch recorder
+#    % radio_archive_index.py | radio_rec_timefree_batch.py -l - -v
+#
+#    completeness of all the recordings of the last week
+#    % radio_archive_index.py -m status -c ''
+#
+#    only updating index
+#    % radio_archive_index.py -m scan -v
+#
+
+###########################################################################
+
+#
+# importing modules
+#
+
+# importing argparse module
+import argparse
+
+# importing datetime module
+import datetime
+
+# importing os module
+import os
+
+# importing sys module
+import sys
+
+# importing time module
+import time
+
+# importing radio_archive module
+import radio_archive
+
+# importing radio_program_list module
+import radio_program_list
+
+###########################################################################
+
+###########################################################################
+
+#
+# command-line arguments analysis using argparse
+#
+
+# environmental variables
+dir_home = os.environ['HOME']
+
+# list of modes
+list_mode = ['missing', 'status', 'scan']
+
+# default parameters
+default_mode = 'missing'
+help_mode \
+    = f'output: {", ".join (list_mode)} (default: {default_mode})'
+
+default_dir_radio = radio_archive.default_dir_radio
+help_dir_radio \
+    = f'directory of recorded files (default: {default_dir_radio})'
+
+default_file_index = radio_archive.default_file_index
+help_file_index    = f'index file (default: {default_file_index})'
+
+default_file_program = radio_program_list.default_file_program
+help_file_program    = f'program list file (default: {default_file_program})'
+
+default_channels = ','.join ([f'-{channel}' for channel \
+                              in radio_program_list.list_channel_nhk])
+help_channels \
+    = f'comma separated list of channels, "-" in front of channel to' \
+    + f' exclude it, "" for all (default: {default_channels})'
+
+default_threshold = radio_archive.default_threshold
+help_threshold \
+    = f'completeness in percent below which a recording is missing' \
+    + f' (default: {default_threshold})'
+
+default_command_timefree \
+    = f'{dir_home}/bin/radio_rec_radiko_timefree_202601.py'
+help_command_timefree \
+    = f'timefree recorder in commands (default: {default_command_timefree})'
+
+help_no_scan = f'using index as it is, without scanning directory'
+
+default_verbose = 0
+help_verbose    = f'verbosity level (default: {default_verbose})'
+
+# construction of parser object
+desc = 'indexing archived recordings and checking their completeness'
+parser = argparse.ArgumentParser (description=desc)
+
+# adding arguments
+parser.add_argument ('-m', '--mode', choices=list_mode, \
+                     default=default_mode, help=help_mode)
+parser.add_argument ('-r', '--radio-dir', default=default_dir_radio, \
+                     help=help_dir_radio)
+parser.add_argument ('-i', '--index', default=default_file_index, \
+                     help=help_file_index)
+parser.add_argument ('-f', '--file', default=default_file_program, \
+                     help=help_file_program)
+parser.add_argument ('-c', '--channels', default=default_channels, \
+                     help=help_channels)
+parser.add_argument ('-t', '--threshold', type=float, \
+                     default=default_threshold, help=help_threshold)
+parser.add_argument ('-T', '--command-timefree', \
+                     default=default_command_timefree, \
+                     help=help_command_timefree)
+parser.add_argument ('-n', '--no-scan', action='store_true', \
+                     help=help_no_scan)
+parser.add_argument ('-v', '--verbose', action='count', \
+                     default=default_verbose, help=help_verbose)
+
+# command-line argument analysis
+args = parser.parse_args ()
+
+# parameters
+mode             = args.mode
+dir_radio        = args.radio_dir
+file_index       = args.index
+file_program     = args.file
+str_channels     = args.channels
+threshold        = args.threshold
+command_timefree = args.command_timefree
+no_scan          = args.no_scan
+verbosity        = args.verbose
+
+# channels
+if (str_channels != ''):
+    list_channels = str_channels.split (',')
+else:
+    list_channels = []
+
+# check of directory and program list file
+if not (os.path.isdir (dir_radio)):
+    print (f'Cannot find the directory "{dir_radio}"!', file=sys.stderr)
+    sys.exit ()
+if ( (mode != 'scan') and not (os.path.exists (file_program)) ):
+    print (f'Cannot find the file "{file_program}"!', file=sys.stderr)
+    sys.exit ()
+
+###########################################################################
+
+###########################################################################
+
+#
+# scanning archive
+#
+
+index = radio_archive.load_index (dir_radio, file_index)
+if not (no_scan):
+    time_start = time.monotonic ()
+    (n_changed, n_kept, n_removed) = radio_archive.scan (index, verbosity)
+    if ( (n_changed > 0) or (n_removed > 0) ):
+        radio_archive.save_index (index, file_index)
+    if (verbosity):
+        print (f'# {len (index["files"])} files in index:' \
+               + f' {n_changed} read, {n_kept} unchanged,' \
+               + f' {n_removed} removed' \
+               + f' in {time.monotonic () - time_start:.3f} sec', \
+               file=sys.stderr)
+
+if (mode == 'scan'):
+    sys.exit ()
+
+###########################################################################
+
+###########################################################################
+
+#
+# checking recordings of the last week
+#
+
+compiled    = radio_program_list.load_compiled (file_program, list_channels)
+list_status = radio_archive.week_status (index, compiled, \
+                                         datetime.datetime.now ())
+
+for (rec, datetime_start, name, percent) in list_status:
+    if (mode == 'status'):
+        print (f'{datetime_start:%a %Y-%m-%d %H:%M} {rec["channel"]:13s}' \
+               + f' {percent:6.2f} % {rec["program"]}' \
+               + f'{"" if (name is None) else f"  ({name})"}')
+    elif (percent < threshold):
+        command = radio_program_list.timefree_command (rec, command_timefree)
+        print (f'/bin/echo "{command}" | /bin/csh')
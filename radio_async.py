@@ -0,0 +1,148 @@
+#
+# Time-stamp: <2026/10/19 11:03:44 (UT+08:00) daisuke>
+#
+
+######################################################################
+#                                                                    #
+# asyncio engine for recorders                                       #
+#                                                                    #
+#  HTTP fetches, playlist polling and supervision of subprocesses    #
+#  are run as coroutines, so that many recordings and downloads      #
+#  share one process and one event loop. Blocking HTTP access of     #
+#  radio_hls and radio_http_cache is run in worker threads, keeping  #
+#  their keep-alive connections.                                     #
+#                                                                    #
+######################################################################
+
+######################################################################
+
+#
+# Importing modules
+#
+
+# importing asyncio module
+import asyncio
+
+# importing json module
+import json
+
+# importing os module
+import os
+
+# importing signal module
+import signal
+
+# importing urllib.parse module
+import urllib.parse
+
+# importing weakref module
+import weakref
+
+# importing radio_hls module
+import radio_hls
+
+# importing radio_http_cache module
+import radio_http_cache
+
+######################################################################
+
+#
+# Constants
+#
+
+# default number of concurrent jobs per host
+default_jobs_host = 2
+
+# semaphores limiting concurrent jobs per host and limit, for each
+# event loop, as a semaphore cannot be shared by loops
+dic_semaphore = weakref.WeakKeyDictionary ()
+
+######################################################################
+
+#
+# Functions
+#
+
+# running event loop until given coroutine finishes
+def run (coroutine):
+    return (asyncio.run (coroutine))
+
+# running blocking function in a worker thread
+async def in_thread (function, *args, **kwargs):
+    return (await asyncio.to_thread (function, *args, **kwargs))
+
+# semaphore for the host of given URL in running event loop
+#  callers giving different limits for a host get different semaphores
+def host_semaphore (url, limit=default_jobs_host):
+    key = (urllib.parse.urlsplit (url).netloc, limit)
+    dic_loop = dic_semaphore.setdefault (asyncio.get_running_loop (), {})
+    if (key not in dic_loop):
+        dic_loop[key] = asyncio.Semaphore (limit)
+    return (dic_loop[key])
+
+# HTTP GET request, returning status and body
+async def fetch (url, headers={}):
+    return (await in_thread (radio_hls.fetch, url, headers))
+
+# retrieval of JSON file through on-disk HTTP cache
+async def fetch_json (url, headers={}, ttl=radio_http_cache.default_ttl):
+    data_json = await in_thread (radio_http_cache.get, url, headers, ttl)
+    return (json.loads (data_json.decode ('utf-8')))
+
+# polling media playlist and yielding new segments in order
+#  polling continues until the end of list, or until stop is set
+async def poll_playlist (url_media, headers={}, stop=None):
+    last_sequence = None
+    while not ( (stop is not None) and (stop.is_set ()) ):
+        (status, body) = await fetch (url_media, headers)
+        if (status != 200):
+            raise RuntimeError (f'HTTP {status} for {url_media}')
+        playlist = radio_hls.parse_playlist (body.decode ('utf-8'), url_media)
+        for segment in playlist['segments']:
+            if ( (last_sequence is not None) \
+                 and (segment['sequence'] <= last_sequence) ):
+                continue
+            last_sequence = segment['sequence']
+            yield (segment)
+        if (playlist['endlist']):
+            break
+        interval = max (playlist['target_duration'] / 2.0, 1.0)
+        if (stop is None):
+            await asyncio.sleep (interval)
+        else:
+            try:
+                await asyncio.wait_for (stop.wait (), interval)
+            except asyncio.TimeoutError:
+                pass
+
+# running command under supervision, returning its exit status
+#  the command is killed with its children when timeout in second is
+#  exceeded or when the coroutine is cancelled
+async def run_command (command, timeout=None, verbosity=0):
+    if (verbosity):
+        print (f'#    {command}')
+    proc = await asyncio.create_subprocess_shell ( \
+        command, stdin=asyncio.subprocess.DEVNULL, start_new_session=True)
+    try:
+        return (await asyncio.wait_for (proc.wait (), timeout))
+    except (asyncio.TimeoutError, asyncio.CancelledError):
+        try:
+            os.killpg (proc.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+        await proc.wait ()
+        if (verbosity):
+            print (f'#    killed: {command}')
+        raise
+
+# running coroutines with at most given number at the same time
+#  results are returned in order, with exceptions in place of results
+async def gather_limited (coroutines, limit):
+    semaphore = asyncio.Semaphore (max (limit, 1))
+
+    async def limited (coroutine):
+        async with semaphore:
+            return (await coroutine)
+
+    tasks = [limited (coroutine) for coroutine in coroutines]
+    return (await asyncio.gather (*tasks, return_exceptions=True))
@@ -0,0 +1,382 @@
+#!/usr/pkg/bin/python3.12
+
+#
+# Time-stamp: <2026/10/18 22:31:52 (UT+08:00) daisuke>
+#
+
+#
+# benchmark of recorders against a local stand-in server
+#
+#  radio_fake_server is started on a free port of localhost, and the
+#  URLs of radiko and NHK in the modules are pointed to it. Then radiko
+#  authentication, timefree download, NHK catalogue resolution, NHK
+#  on-demand download, live recording, and MPEG-TS to ADTS conversion
+#  are timed at given latency and bandwidth. Nothing is sent to
+#  radiko.jp or nhk.or.jp, and all the files are made in a temporary
+#  directory.
+#
+# usage:
+#
+#    all the benchmarks without latency and bandwidth limit
+#    % radio_bench.py
+#
+#    50 msec latency, 512 KiB/s per connection, 8 workers
+#    % radio_bench.py -l 50 -b 512 -w 8
+#
+#    only timefree download of 2-hour program, results in JSON lines
+#    % radio_bench.py -s timefree -m 120 -o bench.jsonl
+#
+
+###########################################################################
+
+#
+# importing modules
+#
+
+# importing argparse module
+import argparse
+
+# importing datetime module
+import datetime
+
+# importing os module
+import os
+
+# importing shutil module
+import shutil
+
+# importing statistics module
+import statistics
+
+# importing sys module
+import sys
+
+# importing tempfile module
+import tempfile
+
+# importing time module
+import time
+
+# importing radio_adts module
+import radio_adts
+
+# importing radio_async module
+import radio_async
+
+# importing radio_fake_server module
+import radio_fake_server
+
+# importing radio_hls module
+import radio_hls
+
+# importing radio_http module
+import radio_http
+
+# importing radio_http_cache module
+import radio_http_cache
+
+# importing radio_metrics module
+import radio_metrics
+
+# importing radio_nhk module
+import radio_nhk
+
+# importing radio_nhk_live module
+import radio_nhk_live
+
+# importing radio_radiko_auth module
+import radio_radiko_auth
+
+# importing radio_timefree module
+import radio_timefree
+
+###########################################################################
+
+###########################################################################
+
+#
+# command-line arguments analysis using argparse
+#
+
+# list of benchmarks
+list_bench = ['auth', 'timefree', 'catalogue', 'ondemand', 'live', 'concat']
+
+# default parameters
+default_select = ','.join (list_bench)
+help_select \
+    = f'comma separated list of benchmarks (default: {default_select})'
+
+default_latency = 0.0
+help_latency \
+    = f'latency added to each response (default: {default_latency} msec)'
+
+default_bandwidth = 0
+help_bandwidth \
+    = f'bandwidth of each connection in KiB/s, 0 for no limit' \
+    + f' (default: {default_bandwidth})'
+
+default_minutes = 30
+help_minutes \
+    = f'length of timefree program (default: {default_minutes} min)'
+
+default_episode = 10
+help_episode \
+    = f'length of NHK on-demand episode (default: {default_episode} min)'
+
+default_live = 5
+help_live \
+    = f'length of live recording, with 1-sec segments' \
+    + f' (default: {default_live} sec)'
+
+default_workers = radio_hls.default_workers
+help_workers \
+    = f'number of concurrent segment downloads' \
+    + f' (default: {default_workers}, max: {radio_hls.max_workers})'
+
+default_repeat = 3
+help_repeat = f'number of runs of each benchmark (default: {default_repeat})'
+
+default_output = ''
+help_output \
+    = f'file to append results as JSON lines (default: none)'
+
+default_verbose = 0
+help_verbose    = f'verbosity level (default: {default_verbose})'
+
+# construction of parser object
+desc = 'benchmark of recorders against a local stand-in server'
+parser = argparse.ArgumentParser (description=desc)
+
+# adding arguments
+parser.add_argument ('-s', '--select', default=default_select, \
+                     help=help_select)
+parser.add_argument ('-l', '--latency', type=float, \
+                     default=default_latency, help=help_latency)
+parser.add_argument ('-b', '--bandwidth', type=int, \
+                     default=default_bandwidth, help=help_bandwidth)
+parser.add_argument ('-m', '--minutes', type=float, \
+                     default=default_minutes, help=help_minutes)
+parser.add_argument ('-e', '--episode', type=float, \
+                     default=default_episode, help=help_episode)
+parser.add_argument ('-L', '--live', type=float, default=default_live, \
+                     help=help_live)
+parser.add_argument ('-w', '--workers', type=int, default=default_workers, \
+                     help=help_workers)
+parser.add_argument ('-n', '--repeat', type=int, default=default_repeat, \
+                     help=help_repeat)
+parser.add_argument ('-o', '--output', default=default_output, \
+                     help=help_output)
+parser.add_argument ('-v', '--verbose', action='count', \
+                     default=default_verbose, help=help_verbose)
+
+# command-line argument analysis
+args = parser.parse_args ()
+
+# parameters
+list_select = args.select.split (',')
+latency     = max (args.latency, 0.0) / 1000.0
+bandwidth   = max (args.bandwidth, 0) * 1024
+minutes     = min (max (args.minutes, 1.0), 1439.0)
+episode_min = max (args.episode, 1.0)
+live_sec    = max (args.live, 0.0)
+n_workers   = min (max (args.workers, 1), radio_hls.max_workers)
+n_repeat    = max (args.repeat, 1)
+file_output = args.output
+verbosity   = args.verbose
+
+# check of benchmarks
+for bench in list_select:
+    if not (bench in list_bench):
+        print (f'Unknown benchmark "{bench}"!')
+        print (f'Choose from {default_select}.')
+        sys.exit ()
+
+###########################################################################
+
+###########################################################################
+
+#
+# stand-in server and temporary directory
+#
+
+(server, url_base) = radio_fake_server.start_server (latency=latency, \
+                                                     bandwidth=bandwidth)
+radio_fake_server.config['episode_sec'] = episode_min * 60.0
+
+dir_tmp = tempfile.mkdtemp (prefix='radio_bench_')
+
+# pointing URLs and cache directories of modules to the server and
+# the temporary directory
+radio_radiko_auth.url_radiko = url_base
+radio_radiko_auth.dir_cache  = f'{dir_tmp}/cache'
+radio_radiko_auth.file_cache = f'{dir_tmp}/cache/radiko_auth.json'
+radio_radiko_auth.file_lock  = f'{dir_tmp}/cache/radiko_auth.lock'
+radio_http_cache.dir_cache   = f'{dir_tmp}/cache/http'
+radio_hls.dir_journal        = f'{dir_tmp}/cache/timefree'
+radio_timefree.url_playlist  = f'{url_base}/tf/playlist.m3u8'
+radio_nhk.url_json_nhk       = f'{url_base}/radio-api/new_arrivals'
+radio_nhk.url_json_series    = f'{url_base}/radio-api/series'
+for channel in radio_nhk_live.list_channel:
+    radio_nhk_live.dic_m3u8[channel] \
+        = f'{url_base}/live/{channel}/master.m3u8'
+
+if (verbosity):
+    print (f'# stand-in server: {url_base}')
+    print (f'# temporary directory: {dir_tmp}')
+
+###########################################################################
+
+###########################################################################
+
+#
+# benchmarks
+#  each function runs the benchmark once, and returns number of bytes
+#  and seconds of audio processed
+#
+
+# radiko auth1 and auth2
+def bench_auth ():
+    radio_radiko_auth.handshake ()
+    return (0, 0.0)
+
+# radiko timefree download of a program
+def bench_timefree ():
+    # program of given length, starting at 00:00 on last Monday
+    datetime_end = datetime.datetime (2000, 1, 3) \
+        + datetime.timedelta (minutes=minutes)
+    entry = radio_timefree.parse_command (f'-c FMT -w Mon -s 00:00' \
+                                          + f' -e {datetime_end:%H:%M}' \
+                                          + f' -p bench')
+    job = radio_timefree.new_job (entry, f'{dir_tmp}/radio')
+    session = radio_radiko_auth.authenticate ()
+    (n_segments, n_bytes) \
+        = radio_timefree.fetch_job (job, session, workers=n_workers)
+    os.remove (job['file_aac'])
+    return (n_bytes, job['duration'])
+
+# NHK catalogue resolution: new_arrivals and all the series JSON files
+def bench_catalogue ():
+    dic_nhk = radio_nhk.fetch_json (radio_nhk.url_json_nhk, ttl=-1)
+    index_title = radio_nhk.make_title_index (dic_nhk)
+    (dic_series, list_missed) \
+        = radio_nhk.resolve_programs (index_title, \
+                                      list (radio_nhk.dic_programs.keys ()))
+    list_url = [radio_nhk.series_url (series_id, corner_id) \
+                for (channel, series_id, corner_id) in dic_series.values ()]
+
+    async def fetch_all ():
+        return (await radio_async.gather_limited ( \
+            [radio_async.fetch_json (url, ttl=-1) for url in list_url], \
+            n_workers))
+
+    results = radio_async.run (fetch_all ())
+    n_episodes = 0
+    for result in results:
+        if (isinstance (result, Exception)):
+            raise result
+        n_episodes += len (radio_nhk.list_episodes (result))
+    if (verbosity >= 2):
+        print (f'#    {len (list_url)} series, {n_episodes} episodes')
+    return (0, 0.0)
+
+# NHK on-demand episode without ffmpeg
+def bench_ondemand ():
+    file_aac = f'{dir_tmp}/ondemand.aac'
+    url_m3u8 = f'{url_base}/vod/bench_00/master.m3u8'
+    (n_segments, n_bytes) = radio_nhk.fetch_native (url_m3u8, file_aac)
+    duration = radio_adts.file_duration (file_aac)
+    os.remove (file_aac)
+    return (n_bytes, duration)
+
+# NHK live recording from the live edge
+def bench_live ():
+    file_aac = f'{dir_tmp}/live.aac'
+    report = radio_nhk_live.record (radio_nhk_live.dic_m3u8['fm'], \
+                                    file_aac, live_sec)
+    os.remove (file_aac)
+    return (report['bytes'], report['duration'])
+
+# conversion of MPEG-TS segments into ADTS and their concatenation
+#  no HTTP, so that CPU time of demuxing is measured
+def bench_concat ():
+    data_ts  = radio_fake_server.segment_data ('.ts', \
+                                               radio_fake_server \
+                                               .config['segment_sec'])
+    n_segments = int (episode_min * 60 \
+                      / radio_fake_server.config['segment_sec'])
+    file_aac = f'{dir_tmp}/concat.aac'
+    with open (file_aac, 'wb') as fh:
+        for i in range (n_segments):
+            fh.write (radio_adts.to_adts (data_ts))
+    duration = radio_adts.file_duration (file_aac)
+    os.remove (file_aac)
+    return (len (data_ts) * n_segments, duration)
+
+# table of benchmarks
+dic_bench = {
+    'auth': bench_auth,
+    'timefree': bench_timefree,
+    'catalogue': bench_catalogue,
+    'ondemand': bench_ondemand,
+    'live': bench_live,
+    'concat': bench_concat,
+}
+
+###########################################################################
+
+###########################################################################
+
+#
+# running benchmarks
+#
+
+if (bandwidth == 0):
+    str_bandwidth = 'unlimited'
+else:
+    str_bandwidth = f'{bandwidth // 1024} KiB/s'
+print (f'# latency {latency * 1000.0:.0f} msec,' \
+       + f' bandwidth {str_bandwidth},' \
+       + f' {n_workers} workers, {n_repeat} runs')
+try:
+    for bench in list_select:
+        list_time = []
+        job_metrics = radio_metrics.new_job ('bench', bench, \
+                                             latency=latency, \
+                                             bandwidth_limit=bandwidth, \
+                                             workers=n_workers)
+        server_start = radio_fake_server.metrics ()
+        for i in range (n_repeat):
+            time_start = time.monotonic ()
+            with radio_metrics.phase (job_metrics, 'run'):
+                (n_bytes, duration) = dic_bench[bench] ()
+            list_time.append (time.monotonic () - time_start)
+            radio_metrics.add (job_metrics, bytes=n_bytes)
+        server_end = radio_fake_server.metrics ()
+        n_requests = (server_end['requests'] - server_start['requests']) \
+            / n_repeat
+        n_connections \
+            = (server_end['connections'] - server_start['connections']) \
+            / n_repeat
+        time_min    = min (list_time)
+        time_median = statistics.median (list_time)
+        radio_metrics.add (job_metrics, time_min=round (time_min, 4), \
+                           time_median=round (time_median, 4), \
+                           requests=n_requests, connections=n_connections, \
+                           audio_sec=duration)
+        radio_metrics.finish (job_metrics, file_metrics=file_output)
+        line = f'# {bench:10s} min {time_min:8.3f} sec,' \
+            + f' median {time_median:8.3f} sec,' \
+            + f' {n_requests:6.0f} requests,' \
+            + f' {n_connections:4.0f} connections'
+        if (n_bytes > 0):
+            line += f', {n_bytes / time_min / 1e6:8.2f} MB/s'
+        if ( (duration > 0.0) and (bench != 'live') ):
+            line += f', {duration / time_min:8.1f}x real time'
+        print (line, flush=True)
+finally:
+    radio_http.close_all ()
+    radio_fake_server.stop_server (server)
+    shutil.rmtree (dir_tmp, ignore_errors=True)
+
+if (verbosity):
+    radio_http.print_metrics ()
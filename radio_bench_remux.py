@@ -0,0 +1,180 @@
+#!/usr/pkg/bin/python3.12
+
+#
+# Time-stamp: <2026/10/19 12:34:18 (UT+08:00) daisuke>
+#
+
+#
+# benchmark of stream copy and transcoding of ffmpeg
+#
+#  CPU time used by ffmpeg is measured for stream copy and for
+#  transcoding of the same input, and CPU seconds per hour of audio
+#  are printed.
+#
+# usage:
+#
+#    % radio_bench_remux.py -f /usr/pkg/bin/ffmpeg6 episode.aac
+#    % radio_bench_remux.py https://.../index.m3u8
+#
+
+###########################################################################
+
+#
+# importing modules
+#
+
+# importing argparse module
+import argparse
+
+# importing pathlib module
+import pathlib
+
+# importing resource module
+import resource
+
+# importing shlex module
+import shlex
+
+# importing shutil module
+import shutil
+
+# importing subprocess module
+import subprocess
+
+# importing sys module
+import sys
+
+# importing tempfile module
+import tempfile
+
+# importing time module
+import time
+
+# importing radio_adts module
+import radio_adts
+
+###########################################################################
+
+#
+# command-line arguments analysis using argparse
+#
+
+default_ffmpeg = '/usr/pkg/bin/ffmpeg6'
+help_ffmpeg    = f'location of ffmpeg command (default: {default_ffmpeg})'
+
+default_copy = '-vn -acodec copy'
+help_copy    = f'ffmpeg options for stream copy (default: "{default_copy}")'
+
+default_transcode = '-vn -acodec aac'
+help_transcode \
+    = f'ffmpeg options for transcoding (default: "{default_transcode}")'
+
+default_repeat = 1
+help_repeat    = f'number of repetitions (default: {default_repeat})'
+
+help_input = f'input file or URL of m3u8'
+
+# construction of parser object
+desc = 'benchmark of stream copy and transcoding by ffmpeg'
+parser = argparse.ArgumentParser (description=desc)
+
+# adding arguments
+parser.add_argument ('input', help=help_input)
+parser.add_argument ('-f', '--ffmpeg', default=default_ffmpeg, \
+                     help=help_ffmpeg)
+parser.add_argument ('-c', '--copy', default=default_copy, \
+                     help=help_copy)
+parser.add_argument ('-x', '--transcode', default=default_transcode, \
+                     help=help_transcode)
+parser.add_argument ('-n', '--repeat', type=int, default=default_repeat, \
+                     help=help_repeat)
+
+# command-line argument analysis
+args = parser.parse_args ()
+
+# parameters
+source         = args.input
+command_ffmpeg = args.ffmpeg
+opt_copy       = args.copy
+opt_transcode  = args.transcode
+n_repeat       = args.repeat
+
+# existence check of ffmpeg
+path_ffmpeg = pathlib.Path (command_ffmpeg)
+if not (path_ffmpeg.exists ()):
+    print (f'The command "{command_ffmpeg}" does not exist!')
+    sys.exit ()
+
+###########################################################################
+
+#
+# functions
+#
+
+# running ffmpeg, and returning CPU time and wall-clock time
+#  output of previous run is removed first, so that a failed run is not
+#  measured on a stale file; None is returned when ffmpeg fails
+def run_ffmpeg (opt, file_out):
+    command = [command_ffmpeg, '-loglevel', 'error', '-y', \
+               '-http_seekable', '0', '-i', source] \
+        + shlex.split (opt) + [file_out]
+    pathlib.Path (file_out).unlink (missing_ok=True)
+    usage_start = resource.getrusage (resource.RUSAGE_CHILDREN)
+    time_start  = time.monotonic ()
+    proc = subprocess.run (command, stdin=subprocess.DEVNULL)
+    time_end    = time.monotonic ()
+    usage_end   = resource.getrusage (resource.RUSAGE_CHILDREN)
+    if (proc.returncode != 0):
+        return (None)
+    cpu = (usage_end.ru_utime - usage_start.ru_utime) \
+        + (usage_end.ru_stime - usage_start.ru_stime)
+    return (cpu, time_end - time_start)
+
+###########################################################################
+
+#
+# benchmark
+#
+
+dir_tmp = tempfile.mkdtemp (prefix='radio_bench_')
+dic_result = {}
+for (mode, opt) in [ ('copy', opt_copy), ('transcode', opt_transcode) ]:
+    file_out = f'{dir_tmp}/{mode}.aac'
+    list_cpu  = []
+    list_wall = []
+    for i in range (n_repeat):
+        result = run_ffmpeg (opt, file_out)
+        if (result is None):
+            shutil.rmtree (dir_tmp)
+            print (f'ffmpeg failed for {mode} of "{source}" with "{opt}".')
+            sys.exit ()
+        (cpu, wall) = result
+        list_cpu.append (cpu)
+        list_wall.append (wall)
+    if (pathlib.Path (file_out).exists ()):
+        duration = radio_adts.file_duration (file_out)
+    else:
+        duration = 0.0
+    dic_result[mode] = {
+        'cpu': min (list_cpu),
+        'wall': min (list_wall),
+        'duration': duration,
+    }
+shutil.rmtree (dir_tmp)
+
+# audio length is taken from stream copy output
+duration_hr = dic_result['copy']['duration'] / 3600.0
+if (duration_hr <= 0.0):
+    print (f'No audio was written, check the input "{source}".')
+    sys.exit ()
+
+print (f'# input:          {source}')
+print (f'# audio length:   {duration_hr * 60.0:.2f} min')
+for mode in ['copy', 'transcode']:
+    cpu_per_hr = dic_result[mode]['cpu'] / duration_hr
+    print (f'# {mode:10s}  cpu = {dic_result[mode]["cpu"]:8.3f} sec,' \
+           + f' wall = {dic_result[mode]["wall"]:8.3f} sec,' \
+           + f' {cpu_per_hr:8.3f} cpu-sec per hour of audio')
+saved = (dic_result['transcode']['cpu'] - dic_result['copy']['cpu']) \
+    / duration_hr
+print (f'# saved by stream copy: {saved:.3f} cpu-sec per hour of audio')
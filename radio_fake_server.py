@@ -0,0 +1,395 @@
+#
+# Time-stamp: <2026/10/18 22:06:18 (UT+08:00) daisuke>
+#
+
+######################################################################
+#                                                                    #
+# Local stand-in server of radiko and NHK                            #
+#                                                                    #
+#  an HTTP/1.1 server with keep-alive, serving synthetic ADTS and    #
+#  MPEG-TS segments, m3u8 playlists, radiko auth1/auth2 headers,     #
+#  and NHK new_arrivals and series JSON, with configurable latency   #
+#  of each response and bandwidth of each connection. Used by        #
+#  radio_bench.py to measure the recorders without hitting          #
+#  radiko.jp or nhk.or.jp.                                           #
+#                                                                    #
+#  paths:                                                            #
+#                                                                    #
+#    /apps/js/playerCommon.js          radiko JS player with authkey #
+#    /v2/api/auth1, /v2/api/auth2      radiko authentication         #
+#    /tf/playlist.m3u8?ft=..&to=..     timefree master playlist      #
+#    /tf/media.m3u8?ft=..&to=..        timefree media playlist       #
+#    /radio-api/new_arrivals           NHK new_arrivals JSON         #
+#    /radio-api/series?site_id=..      NHK series JSON               #
+#    /vod/<id>/master.m3u8             NHK on-demand playlists       #
+#    /live/<channel>/master.m3u8       NHK live playlists            #
+#    /seg/<n>.aac, /seg/<n>.ts         segments                      #
+#                                                                    #
+######################################################################
+
+######################################################################
+
+#
+# Importing modules
+#
+
+# importing base64 module
+import base64
+
+# importing http.server module
+import http.server
+
+# importing json module
+import json
+
+# importing threading module
+import threading
+
+# importing time module
+import time
+
+# importing urllib.parse module
+import urllib.parse
+
+# importing radio_nhk module
+import radio_nhk
+
+######################################################################
+
+#
+# Constants
+#
+
+# authkey in radiko JS player, the same one as the real player
+radiko_authkey = 'bcd151073c03b352e1ef2fd66c32209da9ca0afa'
+
+# offset and length of partial key given by auth1
+radiko_keyoffset = 8
+radiko_keylength = 16
+
+# authtoken given by auth1
+radiko_authtoken = 'fake_authtoken_0123456789'
+
+# sampling frequency and bitrate of synthetic AAC
+sampling_frequency = 48000
+bitrate            = 48000
+
+# number of samples in one AAC frame
+samples_per_frame = 1024
+
+# size of MPEG-TS packet
+ts_packet_size = 188
+
+# PIDs of PMT and audio in synthetic MPEG-TS
+pid_pmt   = 0x1000
+pid_audio = 0x0100
+
+# number of NHK on-demand episodes in each series
+episodes_per_series = 2
+
+# number of segments in live playlist
+live_window = 6
+
+# server settings
+#  latency is added to each response in second, and bandwidth of each
+#  connection is limited in byte per second, 0 for no limit
+config = {
+    'latency': 0.0,
+    'bandwidth': 0,
+    'segment_sec': 5.0,
+    'live_segment_sec': 1.0,
+    'episode_sec': 60.0,
+}
+
+# counters of server
+counters = {
+    'requests': 0,
+    'connections': 0,
+    'bytes': 0,
+}
+
+# lock for counters and cache of segments
+lock_server = threading.Lock ()
+
+# synthetic segments, (extension, duration) ==> data
+dic_segment = {}
+
+######################################################################
+
+#
+# Functions
+#
+
+# ADTS frame of silence-like payload
+def adts_frame ():
+    length = bitrate // 8 * samples_per_frame // sampling_frequency
+    index  = [96000, 88200, 64000, 48000, 44100, 32000, \
+              24000, 22050, 16000, 12000, 11025, 8000, 7350] \
+              .index (sampling_frequency)
+    header = bytes ([0xFF, 0xF1, (1 << 6) | (index << 2), \
+                     (2 << 6) | ( (length >> 11) & 0x03), \
+                     (length >> 3) & 0xFF, ( (length & 0x07) << 5) | 0x1F, \
+                     0xFC])
+    return (header + bytes (length - 7))
+
+# ADTS data of given duration
+def adts_data (duration):
+    n_frames = round (duration * sampling_frequency / samples_per_frame)
+    return (adts_frame () * max (n_frames, 1))
+
+# TS packet with given payload, padded by adaptation field
+def ts_packet (pid, payload, pusi, counter):
+    header = bytes ([0x47, (0x40 if (pusi) else 0x00) | (pid >> 8), \
+                     pid & 0xFF])
+    n_stuffing = 184 - len (payload)
+    if (n_stuffing <= 0):
+        return (header + bytes ([0x10 | counter]) + payload)
+    if (n_stuffing == 1):
+        adaptation = bytes ([0])
+    else:
+        adaptation = bytes ([n_stuffing - 1, 0x00]) \
+            + b'\xff' * (n_stuffing - 2)
+    return (header + bytes ([0x30 | counter]) + adaptation + payload)
+
+# MPEG-TS data carrying given ADTS data
+#  PAT and PMT are put at the head, and the whole ADTS data is one PES
+#  packet, as in HLS segments of NHK
+def ts_data (data):
+    pat = bytes ([0x00, 0x00, 0xB0, 13, 0x00, 0x01, 0xC1, 0x00, 0x00, \
+                  0x00, 0x01, 0xE0 | (pid_pmt >> 8), pid_pmt & 0xFF]) \
+                  + bytes (4)
+    pmt = bytes ([0x00, 0x02, 0xB0, 18, 0x00, 0x01, 0xC1, 0x00, 0x00, \
+                  0xE0 | (pid_audio >> 8), pid_audio & 0xFF, 0xF0, 0x00, \
+                  0x0F, 0xE0 | (pid_audio >> 8), pid_audio & 0xFF, \
+                  0xF0, 0x00]) + bytes (4)
+    pes = b'\x00\x00\x01\xc0\x00\x00\x80\x80\x05\x21\x00\x01\x00\x01' + data
+    list_packet = [ts_packet (0, pat, True, 0), \
+                   ts_packet (pid_pmt, pmt, True, 0)]
+    for (i, offset) in enumerate (range (0, len (pes), 184)):
+        list_packet.append (ts_packet (pid_audio, pes[offset:offset+184], \
+                                       offset == 0, i & 0x0F))
+    return (b''.join (list_packet))
+
+# synthetic segment of given extension and duration, made once
+def segment_data (extension, duration):
+    key = (extension, duration)
+    with lock_server:
+        if (key in dic_segment):
+            return (dic_segment[key])
+    data = adts_data (duration)
+    if (extension == '.ts'):
+        data = ts_data (data)
+    with lock_server:
+        dic_segment[key] = data
+    return (data)
+
+# seconds between two timefree date/times in YYYYMMDDhhmmss
+def timefree_duration (ft, to):
+    try:
+        time_from = time.strptime (ft, '%Y%m%d%H%M%S')
+        time_to   = time.strptime (to, '%Y%m%d%H%M%S')
+    except ValueError:
+        return (0.0)
+    return (max (time.mktime (time_to) - time.mktime (time_from), 0.0))
+
+# master playlist with one variant
+def master_playlist (url_media):
+    return ('#EXTM3U\n#EXT-X-VERSION:3\n' \
+            + f'#EXT-X-STREAM-INF:BANDWIDTH={bitrate},CODECS="mp4a.40.2"\n' \
+            + f'{url_media}\n')
+
+# media playlist of given number of segments
+def media_playlist (n_segments, segment_sec, extension, sequence=0, \
+                    endlist=True):
+    lines = ['#EXTM3U', '#EXT-X-VERSION:3', \
+             f'#EXT-X-TARGETDURATION:{int (segment_sec + 0.999)}', \
+             f'#EXT-X-MEDIA-SEQUENCE:{sequence}']
+    for n in range (sequence, sequence + n_segments):
+        lines.append (f'#EXTINF:{segment_sec:.3f},')
+        lines.append (f'/seg/{n}{extension}?d={segment_sec}')
+    if (endlist):
+        lines.append ('#EXT-X-ENDLIST')
+    return ('\n'.join (lines) + '\n')
+
+# new_arrivals JSON, one corner for each program of radio_nhk
+def nhk_new_arrivals ():
+    list_corner = []
+    for (i, program) in enumerate (sorted (radio_nhk.dic_programs.keys ())):
+        list_corner.append ({
+            'title': radio_nhk.dic_programs[program],
+            'radio_broadcast': 'R1',
+            'series_site_id': f'S{i:04d}',
+            'corner_site_id': '01',
+        })
+    return ({'corners': list_corner})
+
+# series JSON with some episodes
+def nhk_series (series_id, url_base):
+    list_episode = []
+    for i in range (episodes_per_series):
+        contents_id = f'0000_{series_id}_{i:02d}' \
+            + f'_2026-10-{11 + i:02d}T05:00:00+09:00_01_bench'
+        list_episode.append ({
+            'aa_contents_id': contents_id,
+            'stream_url': f'{url_base}/vod/{series_id}_{i:02d}/master.m3u8',
+        })
+    return ({'episodes': list_episode})
+
+# request handler
+class Handler (http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    # counting connections
+    def setup (self):
+        super ().setup ()
+        with lock_server:
+            counters['connections'] += 1
+
+    # no log of each request
+    def log_message (self, format, *args):
+        pass
+
+    # sending response after latency, limited by bandwidth
+    def respond (self, status, body=b'', headers={}, \
+                 content_type='application/octet-stream'):
+        if (isinstance (body, str)):
+            body = body.encode ('utf-8')
+        if (config['latency'] > 0.0):
+            time.sleep (config['latency'])
+        self.send_response (status)
+        self.send_header ('Content-Type', content_type)
+        self.send_header ('Content-Length', str (len (body)))
+        for (key, value) in headers.items ():
+            self.send_header (key, value)
+        self.end_headers ()
+        bandwidth = config['bandwidth']
+        if (bandwidth <= 0):
+            self.wfile.write (body)
+        else:
+            chunk = max (bandwidth // 20, 1024)
+            for offset in range (0, len (body), chunk):
+                self.wfile.write (body[offset:offset+chunk])
+                time.sleep (len (body[offset:offset+chunk]) / bandwidth)
+        with lock_server:
+            counters['requests'] += 1
+            counters['bytes']    += len (body)
+
+    # radiko timefree playlists, refused without authtoken
+    def timefree (self, path, query):
+        if (self.headers.get ('X-Radiko-AuthToken') != radiko_authtoken):
+            return (self.respond (403, 'forbidden'))
+        ft = query.get ('ft', [''])[0]
+        to = query.get ('to', [''])[0]
+        if (path == '/tf/playlist.m3u8'):
+            return (self.respond (200, master_playlist ( \
+                f'/tf/media.m3u8?ft={ft}&to={to}'), \
+                content_type='application/vnd.apple.mpegurl'))
+        segment_sec = config['segment_sec']
+        n_segments  = int (timefree_duration (ft, to) / segment_sec)
+        return (self.respond (200, media_playlist (n_segments, segment_sec, \
+                                                   '.aac'), \
+                              content_type='application/vnd.apple.mpegurl'))
+
+    # NHK live playlists
+    #  the live edge moves by one segment every live_segment_sec
+    def live (self, path):
+        segment_sec = config['live_segment_sec']
+        if (path.endswith ('/master.m3u8')):
+            return (self.respond (200, master_playlist ( \
+                path.replace ('/master.m3u8', '/media.m3u8')), \
+                content_type='application/vnd.apple.mpegurl'))
+        sequence = int (time.monotonic () / segment_sec)
+        return (self.respond (200, media_playlist (live_window, segment_sec, \
+                                                   '.ts', sequence, False), \
+                              content_type='application/vnd.apple.mpegurl'))
+
+    # GET requests
+    def do_GET (self):
+        url   = urllib.parse.urlsplit (self.path)
+        path  = url.path
+        query = urllib.parse.parse_qs (url.query)
+        if (path == '/apps/js/playerCommon.js'):
+            body = "player = new RadikoJSPlayer($audio[0], 'pc_html5'," \
+                + f" '{radiko_authkey}', {{\n"
+            return (self.respond (200, body, content_type='text/javascript'))
+        if (path == '/v2/api/auth1'):
+            headers = {
+                'X-Radiko-AuthToken': radiko_authtoken,
+                'X-Radiko-KeyOffset': str (radiko_keyoffset),
+                'X-Radiko-KeyLength': str (radiko_keylength),
+                'x-request-id': 'fake_request_id',
+            }
+            return (self.respond (200, 'OK', headers))
+        if (path == '/v2/api/auth2'):
+            return (self.auth2 ())
+        if (path.startswith ('/tf/')):
+            return (self.timefree (path, query))
+        if (path == '/radio-api/new_arrivals'):
+            return (self.respond (200, json.dumps (nhk_new_arrivals ()), \
+                                  content_type='application/json'))
+        if (path == '/radio-api/series'):
+            url_base = f'http://{self.headers.get ("Host")}'
+            series_id = query.get ('site_id', [''])[0]
+            return (self.respond (200, json.dumps (nhk_series (series_id, \
+                                                               url_base)), \
+                                  content_type='application/json'))
+        if (path.startswith ('/vod/')):
+            if (path.endswith ('/master.m3u8')):
+                return (self.respond (200, master_playlist ( \
+                    path.replace ('/master.m3u8', '/index.m3u8')), \
+                    content_type='application/vnd.apple.mpegurl'))
+            segment_sec = config['segment_sec']
+            n_segments  = int (config['episode_sec'] / segment_sec)
+            return (self.respond (200, media_playlist (n_segments, \
+                                                       segment_sec, '.ts'), \
+                                  content_type='application/vnd.apple.mpegurl'))
+        if (path.startswith ('/live/')):
+            return (self.live (path))
+        if (path.startswith ('/seg/')):
+            extension = path[path.rfind ('.'):]
+            duration  = float (query.get ('d', [config['segment_sec']])[0])
+            return (self.respond (200, segment_data (extension, duration), \
+                                  content_type='audio/aac'))
+        return (self.respond (404, 'not found'))
+
+    # radiko auth2, checking partial key
+    def auth2 (self):
+        partialkey = radiko_authkey.encode ('utf-8') \
+            [radiko_keyoffset:radiko_keyoffset+radiko_keylength]
+        if ( (self.headers.get ('X-Radiko-AuthToken') != radiko_authtoken) \
+             or (self.headers.get ('X-Radiko-PartialKey') \
+                 != base64.b64encode (partialkey).decode ('utf-8')) ):
+            return (self.respond (401, 'unauthorized'))
+        return (self.respond (200, 'JP13,東京都,tokyo Japan', \
+                              content_type='text/plain'))
+
+    # POST requests are answered in the same way as GET
+    def do_POST (self):
+        length = int (self.headers.get ('Content-Length', '0'))
+        self.rfile.read (length)
+        return (self.do_GET ())
+
+# server with one thread per connection
+class Server (http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+# starting server in a thread, returning server and its base URL
+#  port 0 chooses a free port
+def start_server (port=0, latency=0.0, bandwidth=0):
+    config['latency']   = latency
+    config['bandwidth'] = bandwidth
+    server = Server (('127.0.0.1', port), Handler)
+    thread = threading.Thread (target=server.serve_forever, daemon=True)
+    thread.start ()
+    url_base = f'http://127.0.0.1:{server.server_address[1]}'
+    return (server, url_base)
+
+# stopping server
+def stop_server (server):
+    server.shutdown ()
+    server.server_close ()
+
+# copy of counters
+def metrics ():
+    with lock_server:
+        return (dict (counters))
@@ -0,0 +1,352 @@
+#
+# Time-stamp: <2026/10/19 10:52:18 (UT+08:00) daisuke>
+#
+
+######################################################################
+#                                                                    #
+# HLS utilities                                                      #
+#                                                                    #
+#  parsing of m3u8 playlists and concurrent fetching of segments.    #
+#  Worker threads share kept-alive connections of radio_http, and    #
+#  segments are handed back in playlist order and appended into one  #
+#  file.                                                             #
+#                                                                    #
+######################################################################
+
+######################################################################
+
+#
+# Importing modules
+#
+
+# importing collections module
+import collections
+
+# importing concurrent.futures module
+import concurrent.futures
+
+# importing contextvars module
+import contextvars
+
+# importing datetime module
+import datetime
+
+# importing hashlib module
+import hashlib
+
+# importing http.client module
+import http.client
+
+# importing json module
+import json
+
+# importing os module
+import os
+
+# importing pathlib module
+import pathlib
+
+# importing time module
+import time
+
+# importing urllib.parse module
+import urllib.parse
+
+# importing radio_adts module
+import radio_adts
+
+# importing radio_http module
+import radio_http
+
+######################################################################
+
+#
+# Constants
+#
+
+# user agent name
+user_agent = radio_http.user_agent
+
+# default and maximum number of concurrent segment downloads
+default_workers = 4
+max_workers     = 16
+
+# number of attempts for one segment
+max_attempts = 3
+
+# seconds to wait for ENDLIST of a playlist after its last new segment
+default_endlist_timeout = 60.0
+
+# directory of checkpoint journals of resumable downloads
+dir_journal = f"{os.environ['HOME']}/share/radio/cache/timefree"
+
+######################################################################
+
+#
+# Functions
+#
+
+# GET request over kept-alive connection, returning status and body
+def fetch (url, headers={}):
+    return (radio_http.get (url, headers))
+
+# fetching one segment, retrying on error
+def fetch_segment (url, headers={}):
+    for attempt in range (max_attempts):
+        try:
+            (status, body) = fetch (url, headers)
+            if (status == 200):
+                return (body)
+            error = RuntimeError (f'HTTP {status} for {url}')
+        except (http.client.HTTPException, OSError) as e:
+            error = e
+        if (attempt < max_attempts - 1):
+            radio_http.count ('segment_retries')
+            time.sleep (2**attempt)
+    raise error
+
+# parsing m3u8 playlist
+#  returning a dictionary with list of segments and list of variants.
+#  Start of a segment in UNIX time is given as date_time, counted from
+#  the last EXT-X-PROGRAM-DATE-TIME, or None without the tag.
+def parse_playlist (text, url_base=''):
+    playlist = {
+        'media_sequence': 0,
+        'target_duration': 0.0,
+        'endlist': False,
+        'encrypted': False,
+        'map': '',
+        'segments': [],
+        'variants': [],
+    }
+    duration  = 0.0
+    bandwidth = 0
+    date_time = None
+    for line in text.splitlines ():
+        line = line.strip ()
+        if (line == ''):
+            continue
+        if (line.startswith ('#EXT-X-MEDIA-SEQUENCE:')):
+            playlist['media_sequence'] = int (line.split (':', 1)[1])
+        elif (line.startswith ('#EXT-X-TARGETDURATION:')):
+            playlist['target_duration'] = float (line.split (':', 1)[1])
+        elif (line.startswith ('#EXT-X-ENDLIST')):
+            playlist['endlist'] = True
+        elif (line.startswith ('#EXT-X-PROGRAM-DATE-TIME:')):
+            try:
+                date_time = datetime.datetime.fromisoformat ( \
+                    line.split (':', 1)[1]).timestamp ()
+            except ValueError:
+                date_time = None
+        elif (line.startswith ('#EXTINF:')):
+            duration = float (line.split (':', 1)[1].split (',')[0])
+        elif (line.startswith ('#EXT-X-KEY:')):
+            playlist['encrypted'] = not ('METHOD=NONE' in line)
+        elif (line.startswith ('#EXT-X-MAP:')):
+            # initialisation section of fragmented MP4 segments
+            for attr in line.split (':', 1)[1].split (','):
+                if (attr.startswith ('URI=')):
+                    uri = attr.split ('=', 1)[1].strip ('"')
+                    playlist['map'] = urllib.parse.urljoin (url_base, uri)
+        elif (line.startswith ('#EXT-X-STREAM-INF:')):
+            for attr in line.split (':', 1)[1].split (','):
+                if (attr.startswith ('BANDWIDTH=')):
+                    bandwidth = int (attr.split ('=', 1)[1])
+        elif (line[0] == '#'):
+            continue
+        else:
+            uri = urllib.parse.urljoin (url_base, line)
+            if (bandwidth):
+                playlist['variants'].append ({'uri': uri, \
+                                              'bandwidth': bandwidth})
+                bandwidth = 0
+            else:
+                sequence = playlist['media_sequence'] \
+                    + len (playlist['segments'])
+                playlist['segments'].append ({'uri': uri, \
+                                              'duration': duration, \
+                                              'sequence': sequence, \
+                                              'date_time': date_time})
+                if (date_time is not None):
+                    date_time += duration
+                duration = 0.0
+    return (playlist)
+
+# completing playlist which has no ENDLIST yet
+#  the playlist is reloaded every target duration, and new segments are
+#  added by media sequence until ENDLIST appears. The wait is the audio
+#  of given duration not yet in the playlist, plus timeout of at least
+#  three target durations. RuntimeError is raised if ENDLIST does not
+#  appear in time, or if segments dropped out of the playlist between
+#  reloads, so that a playlist cut short or with a hole is not taken
+#  for a whole program.
+def complete_playlist (playlist, url, headers={}, duration=0.0, \
+                       timeout=default_endlist_timeout):
+    timeout = max (timeout, 3.0 * playlist['target_duration'])
+    duration_left = duration \
+        - sum ([segment['duration'] for segment in playlist['segments']])
+    time_limit = time.monotonic () + max (duration_left, 0.0) + timeout
+    while not (playlist['endlist']):
+        if (time.monotonic () >= time_limit):
+            raise RuntimeError (f'no ENDLIST in playlist: {url}')
+        time.sleep (max (playlist['target_duration'], 1.0))
+        (status, body) = fetch (url, headers)
+        if (status != 200):
+            raise RuntimeError (f'HTTP {status} for {url}')
+        reloaded = parse_playlist (body.decode ('utf-8'), url)
+        if (len (playlist['segments']) > 0):
+            sequence_last = playlist['segments'][-1]['sequence']
+        else:
+            sequence_last = reloaded['media_sequence'] - 1
+        segments_new = [segment for segment in reloaded['segments'] \
+                        if (segment['sequence'] > sequence_last)]
+        if ( (len (segments_new) > 0) \
+             and (segments_new[0]['sequence'] != sequence_last + 1) ):
+            raise RuntimeError (f'segments {sequence_last + 1} to' \
+                                + f' {segments_new[0]["sequence"] - 1}' \
+                                + f' dropped out of playlist: {url}')
+        playlist['segments'] += segments_new
+        playlist['endlist'] = reloaded['endlist']
+    return (playlist)
+
+# fetching segments concurrently
+#  segments are yielded as (index, data) in the order of given list,
+#  and at most 2 x workers segments are held in memory at a time
+def fetch_segments (list_url, headers={}, workers=default_workers):
+    workers = max (1, min (workers, max_workers))
+    with concurrent.futures.ThreadPoolExecutor (max_workers=workers) \
+         as executor:
+        pending = collections.deque ()
+        i = 0
+        while ( (i < len (list_url)) or (len (pending) > 0) ):
+            while ( (i < len (list_url)) and (len (pending) < 2 * workers) ):
+                # counting requests for the job of the caller
+                context = contextvars.copy_context ()
+                future  = executor.submit (context.run, fetch_segment, \
+                                           list_url[i], headers)
+                pending.append ( (i, future) )
+                i += 1
+            (index, future) = pending.popleft ()
+            try:
+                data = future.result ()
+            except Exception:
+                for (j, f) in pending:
+                    f.cancel ()
+                raise
+            yield (index, data)
+
+# name of temporary file next to the final file
+#  the temporary file is on the same file system as the final file,
+#  so that it can be renamed atomically
+def partial_file (file_final):
+    (dir_final, name_final) = os.path.split (file_final)
+    return (os.path.join (dir_final, f'.{name_final}.part'))
+
+# journal file of a download identified by station, start, and end
+#  a rerun of the same job finds its journal by this name, whatever
+#  the process ID or the temporary file of the previous run was
+def journal_file (station, ft, to):
+    return (os.path.join (dir_journal, f'{station}_{ft}_{to}.json'))
+
+# digest of list of segments, identifying the content of a download
+#  queries are dropped, so that a list fetched again with a new token
+#  has the same digest, while a list of other segments does not
+def segments_digest (list_url):
+    sha256 = hashlib.sha256 ()
+    for url in list_url:
+        parts = urllib.parse.urlsplit (url)
+        sha256.update (f'{parts.netloc}{parts.path}\n'.encode ('utf-8'))
+    return (sha256.hexdigest ())
+
+# reading journal, returning empty dictionary if unusable
+def read_journal (file_journal):
+    try:
+        with open (file_journal, 'r') as fh:
+            journal = json.load (fh)
+    except (OSError, ValueError):
+        return ({})
+    if not (isinstance (journal, dict)):
+        return ({})
+    for key in ('n_total', 'n_done', 'offset'):
+        if not (isinstance (journal.get (key), int)):
+            return ({})
+    return (journal)
+
+# writing journal atomically
+def write_journal (file_journal, journal):
+    file_tmp = f'{file_journal}.tmp'
+    with open (file_tmp, 'w') as fh:
+        json.dump (journal, fh)
+    os.replace (file_tmp, file_journal)
+
+# number of segments and bytes already in file, according to journal
+#  the file is truncated to the last checkpoint, so that a segment
+#  written partly before the previous run died is fetched again. A
+#  journal of another list of segments is not used.
+def resume_point (list_url, file_out, file_journal):
+    journal = read_journal (file_journal)
+    if not ( (journal.get ('n_total') == len (list_url)) \
+             and (journal.get ('digest') == segments_digest (list_url)) \
+             and (0 < journal['n_done'] <= len (list_url)) ):
+        return (0, 0)
+    try:
+        size = os.path.getsize (file_out)
+    except OSError:
+        return (0, 0)
+    if (size < journal['offset']):
+        return (0, 0)
+    os.truncate (file_out, journal['offset'])
+    return (journal['n_done'], journal['offset'])
+
+# fetching segments and appending them into a single file in order
+#  returning number of segments and bytes written. Segments are
+#  stored as ADTS, MPEG-TS segments being demuxed on the fly. With a journal
+#  file, the number of completed segments and the size of the file
+#  are recorded after each segment with the digest of the list, and a
+#  rerun of the same job fetches only the remaining segments. The
+#  journal is removed when all the segments are written.
+def write_segments (list_url, file_out, headers={}, workers=default_workers, \
+                    file_journal=''):
+    n_bytes = 0
+    n_segments = 0
+    mode = 'wb'
+    if (file_journal != ''):
+        digest = segments_digest (list_url)
+        os.makedirs (os.path.dirname (file_journal), exist_ok=True)
+        (n_segments, n_bytes) = resume_point (list_url, file_out, file_journal)
+        if (n_segments > 0):
+            mode = 'ab'
+    with open (file_out, mode) as fh:
+        for (i, data) in fetch_segments (list_url[n_segments:], headers, \
+                                         workers):
+            data = radio_adts.to_adts (data)
+            fh.write (data)
+            n_bytes += len (data)
+            n_segments += 1
+            if (file_journal != ''):
+                fh.flush ()
+                write_journal (file_journal, {'n_total': len (list_url), \
+                                              'n_done': n_segments, \
+                                              'offset': n_bytes, \
+                                              'digest': digest})
+    if (file_journal != ''):
+        pathlib.Path (file_journal).unlink (missing_ok=True)
+    return (n_segments, n_bytes)
+
+# moving temporary file to final file
+#  an existing file which is not smaller than the new one is kept
+def finalise (file_part, file_final):
+    path_part  = pathlib.Path (file_part)
+    path_final = pathlib.Path (file_final)
+    if not (path_part.exists ()):
+        return (False)
+    size_new = path_part.stat ().st_size
+    if (path_final.exists ()):
+        size_old = path_final.stat ().st_size
+    else:
+        size_old = 0
+    if ( (path_final.exists ()) and (size_old >= size_new) ):
+        path_part.unlink ()
+        return (False)
+    os.replace (file_part, file_final)
+    return (True)
@@ -0,0 +1,291 @@
+#
+# Time-stamp: <2026/10/19 14:05:12 (UT+08:00) daisuke>
+#
+
+######################################################################
+#                                                                    #
+# Shared HTTP client                                                 #
+#                                                                    #
+#  connections are kept alive in a pool for each host and re-used   #
+#  by all the threads, host names are resolved once and cached, and  #
+#  the same User-Agent is sent by all the scripts. Counters show     #
+#  how many TCP/TLS handshakes and DNS lookups were avoided, for the #
+#  whole process and for the job running in the current context.    #
+#                                                                    #
+#  HTTP/2 is not available in the Python standard library, so        #
+#  requests are HTTP/1.1 with keep-alive.                            #
+#                                                                    #
+######################################################################
+
+######################################################################
+
+#
+# Importing modules
+#
+
+# importing contextvars module
+import contextvars
+
+# importing http.client module
+import http.client
+
+# importing socket module
+import socket
+
+# importing ssl module
+import ssl
+
+# importing threading module
+import threading
+
+# importing time module
+import time
+
+# importing urllib.parse module
+import urllib.parse
+
+######################################################################
+
+#
+# Constants
+#
+
+# user agent name
+user_agent = 'Mozilla/5.0 (X11; NetBSD x86_64; rv:140.0) Gecko/20100101 Firefox/140.0'
+
+# timeout of HTTP request in second
+http_timeout = 30
+
+# max number of idle connections kept for each host
+max_idle_per_host = 8
+
+# max number of retries of a request on re-used connections
+max_request_retries = 2
+
+# methods which can be sent again without side effects
+set_idempotent = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+
+# errors of a re-used connection closed by the server before response
+list_error_stale = (http.client.RemoteDisconnected, BrokenPipeError, \
+                    ConnectionResetError, ConnectionAbortedError)
+
+# time-to-live of cached DNS lookup in second
+dns_ttl = 300
+
+# certificates are not verified, same as "curl --insecure"
+context_ssl = ssl._create_unverified_context ()
+
+# idle connections, (scheme, host:port) ==> list of connections
+dic_pool = {}
+
+# cached DNS lookups, (host, port) ==> (expiry time, address)
+dic_dns = {}
+
+# lock for pool, DNS cache and counters
+lock_http = threading.Lock ()
+
+# counters
+counters = {
+    'requests': 0,
+    'handshakes': 0,
+    'reused': 0,
+    'retries': 0,
+    'segment_retries': 0,
+    'dns_lookups': 0,
+    'dns_cached': 0,
+}
+
+# counters of the job in the current context, see job_counters ()
+var_job_counters = contextvars.ContextVar ('job_counters', default=None)
+
+######################################################################
+
+#
+# Functions
+#
+
+# incrementing a counter, and the one of the job in current context
+def count (name, n=1):
+    dic_job = var_job_counters.get ()
+    with lock_http:
+        counters[name] += n
+        if (dic_job is not None):
+            dic_job[name] += n
+
+# counting requests of a job from now on in current context
+#  the context is the one of the calling thread or asyncio task, and
+#  it is inherited by radio_async.in_thread () and by the threads of
+#  radio_hls.fetch_segments (), so that jobs running at the same time
+#  are counted apart. Counters of the job are returned.
+def job_counters ():
+    dic_job = {name: 0 for name in counters.keys ()}
+    var_job_counters.set (dic_job)
+    return (dic_job)
+
+# resolving host name through DNS cache
+def resolve (host, port):
+    key = (host, port)
+    with lock_http:
+        entry = dic_dns.get (key)
+    if ( (entry is not None) and (entry[0] > time.monotonic ()) ):
+        count ('dns_cached')
+        return (entry[1])
+    list_info = socket.getaddrinfo (host, port, type=socket.SOCK_STREAM)
+    address   = list_info[0][4][0]
+    with lock_http:
+        dic_dns[key] = (time.monotonic () + dns_ttl, address)
+    count ('dns_lookups')
+    return (address)
+
+# opening TCP connection to the cached address of host
+def create_connection (address, timeout=http_timeout, source_address=None):
+    (host, port) = address
+    count ('handshakes')
+    try:
+        return (socket.create_connection ((resolve (host, port), port), \
+                                          timeout, source_address))
+    except OSError:
+        # address may have changed, resolving again
+        with lock_http:
+            dic_dns.pop ((host, port), None)
+        return (socket.create_connection ((resolve (host, port), port), \
+                                          timeout, source_address))
+
+# HTTP connection opened through DNS cache
+class Connection (http.client.HTTPConnection):
+
+    # opening socket, without delaying small packets
+    def connect (self):
+        self.sock = create_connection ((self.host, self.port), \
+                                       self.timeout, self.source_address)
+        try:
+            self.sock.setsockopt (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except OSError:
+            pass
+
+# HTTPS connection opened through DNS cache
+class ConnectionTLS (Connection):
+
+    # port when not given in host
+    default_port = http.client.HTTPS_PORT
+
+    # keeping SSL context for wrapping socket
+    def __init__ (self, host, context, timeout=http_timeout):
+        super ().__init__ (host, timeout=timeout)
+        self.context = context
+
+    # opening socket, and starting TLS with host name for SNI
+    def connect (self):
+        super ().connect ()
+        self.sock = self.context.wrap_socket (self.sock, \
+                                              server_hostname=self.host)
+
+# new connection to given scheme and host
+def new_connection (scheme, netloc):
+    if (scheme == 'https'):
+        conn = ConnectionTLS (netloc, context_ssl, timeout=http_timeout)
+    else:
+        conn = Connection (netloc, timeout=http_timeout)
+    return (conn)
+
+# taking an idle connection from pool, or making new one
+#  the connection and whether it is re-used are returned
+def acquire (scheme, netloc):
+    key = (scheme, netloc)
+    with lock_http:
+        if (len (dic_pool.get (key, [])) > 0):
+            conn = dic_pool[key].pop ()
+        else:
+            conn = None
+    if (conn is not None):
+        count ('reused')
+        return (conn, True)
+    return (new_connection (scheme, netloc), False)
+
+# returning connection into pool
+def release (scheme, netloc, conn):
+    key = (scheme, netloc)
+    with lock_http:
+        pool = dic_pool.setdefault (key, [])
+        if (len (pool) < max_idle_per_host):
+            pool.append (conn)
+            return
+    conn.close ()
+
+# closing all the idle connections
+def close_all ():
+    with lock_http:
+        list_conn = [conn for pool in dic_pool.values () for conn in pool]
+        dic_pool.clear ()
+    for conn in list_conn:
+        conn.close ()
+
+# HTTP request over pooled connection
+#  status, response headers, and body are returned. A re-used
+#  connection which the server closed while idle fails before any
+#  response, and then the request is sent again on another connection,
+#  up to max_request_retries times, for idempotent methods, or for any
+#  method with retry=True. Timeouts and errors after the response has
+#  started are not retried.
+def request (method, url, headers={}, body=None, retry=None):
+    url_parsed = urllib.parse.urlsplit (url)
+    path = url_parsed.path
+    if (path == ''):
+        path = '/'
+    if (url_parsed.query):
+        path = f'{path}?{url_parsed.query}'
+    if (retry is None):
+        retry = (method in set_idempotent)
+    dic_headers = {'User-Agent': user_agent}
+    dic_headers.update (headers)
+    count ('requests')
+    n_retries = 0
+    while True:
+        (conn, reused) = acquire (url_parsed.scheme, url_parsed.netloc)
+        try:
+            conn.request (method, path, body=body, headers=dic_headers)
+            response = conn.getresponse ()
+        except list_error_stale:
+            conn.close ()
+            if ( (reused) and (retry) and (n_retries < max_request_retries) ):
+                # the server may have closed an idle connection
+                count ('retries')
+                n_retries += 1
+                continue
+            raise
+        except (http.client.HTTPException, OSError):
+            conn.close ()
+            raise
+        try:
+            data = response.read ()
+        except (http.client.HTTPException, OSError):
+            conn.close ()
+            raise
+        if (response.will_close):
+            conn.close ()
+        else:
+            release (url_parsed.scheme, url_parsed.netloc, conn)
+        return (response.status, response.headers, data)
+
+# GET request, returning status and body
+def get (url, headers={}):
+    (status, headers_response, data) = request ('GET', url, headers)
+    return (status, data)
+
+# copy of counters of the process, or of given counters of a job
+def metrics (dic_job=None):
+    with lock_http:
+        if (dic_job is not None):
+            return (dict (dic_job))
+        return (dict (counters))
+
+# printing counters
+def print_metrics ():
+    dic_metrics = metrics ()
+    print (f'# HTTP: {dic_metrics["requests"]} requests,' \
+           + f' {dic_metrics["handshakes"]} handshakes,' \
+           + f' {dic_metrics["reused"]} re-used connections,' \
+           + f' {dic_metrics["retries"]} retries,' \
+           + f' {dic_metrics["segment_retries"]} segment retries')
+    print (f'# DNS: {dic_metrics["dns_lookups"]} lookups,' \
+           + f' {dic_metrics["dns_cached"]} cached')
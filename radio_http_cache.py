@@ -0,0 +1,131 @@
+#
+# Time-stamp: <2026/10/18 17:48:55 (UT+08:00) daisuke>
+#
+
+######################################################################
+#                                                                    #
+# On-disk HTTP cache                                                 #
+#                                                                    #
+#  responses are kept per URL with their ETag and Last-Modified.     #
+#  Within the TTL no request is sent at all, and after the TTL a     #
+#  conditional GET is sent, so unchanged data are not downloaded.    #
+#                                                                    #
+######################################################################
+
+######################################################################
+
+#
+# Importing modules
+#
+
+# importing hashlib module
+import hashlib
+
+# importing json module
+import json
+
+# importing os module
+import os
+
+# importing pathlib module
+import pathlib
+
+# importing time module
+import time
+
+# importing urllib.error module
+import urllib.error
+
+# importing radio_http module
+import radio_http
+
+######################################################################
+
+#
+# Constants
+#
+
+# cache directory
+dir_cache = f"{os.environ['HOME']}/share/radio/cache/http"
+
+# default time-to-live of cached response in second
+default_ttl = 600
+
+######################################################################
+
+#
+# Functions
+#
+
+# file names of cached response for given URL
+def cache_files (url):
+    key = hashlib.sha1 (url.encode ('utf-8')).hexdigest ()
+    file_meta = f'{dir_cache}/{key}.json'
+    file_body = f'{dir_cache}/{key}.body'
+    return (file_meta, file_body)
+
+# reading metadata of cached response
+def read_meta (file_meta, file_body):
+    if not ( (os.path.exists (file_meta)) and (os.path.exists (file_body)) ):
+        return (None)
+    try:
+        with open (file_meta, 'r') as fh:
+            meta = json.load (fh)
+    except (OSError, ValueError):
+        return (None)
+    return (meta)
+
+# writing file atomically
+def write_atomic (file_out, data, mode='w'):
+    file_tmp = f'{file_out}.{os.getpid ()}.{time.monotonic_ns ()}'
+    with open (file_tmp, mode) as fh:
+        fh.write (data)
+    os.replace (file_tmp, file_out)
+
+# GET request through the cache, returning body as bytes
+#  ttl=0 always revalidates, and ttl<0 bypasses the cache
+def get (url, headers={}, ttl=default_ttl):
+    path_cache = pathlib.Path (dir_cache)
+    if not (path_cache.exists ()):
+        path_cache.mkdir (parents=True, exist_ok=True)
+    (file_meta, file_body) = cache_files (url)
+    meta = None
+    if (ttl >= 0):
+        meta = read_meta (file_meta, file_body)
+
+    # fresh enough, no request at all
+    if ( (meta is not None) and (time.time () - meta['fetched'] < ttl) ):
+        with open (file_body, 'rb') as fh:
+            return (fh.read ())
+
+    # conditional GET
+    dic_headers = dict (headers)
+    if (meta is not None):
+        if (meta['etag']):
+            dic_headers['If-None-Match'] = meta['etag']
+        if (meta['last_modified']):
+            dic_headers['If-Modified-Since'] = meta['last_modified']
+    (status, headers_response, body) \
+        = radio_http.request ('GET', url, dic_headers)
+    if ( (status == 304) and (meta is not None) ):
+        # not modified, only the time of validation is updated
+        meta['fetched'] = time.time ()
+        write_atomic (file_meta, json.dumps (meta))
+        with open (file_body, 'rb') as fh:
+            return (fh.read ())
+    if (status != 200):
+        raise urllib.error.HTTPError (url, status, f'HTTP {status}', \
+                                      headers_response, None)
+    etag          = headers_response.get ('ETag', '')
+    last_modified = headers_response.get ('Last-Modified', '')
+
+    # storing new response
+    meta = {
+        'url': url,
+        'etag': etag,
+        'last_modified': last_modified,
+        'fetched': time.time (),
+    }
+    write_atomic (file_body, body, mode='wb')
+    write_atomic (file_meta, json.dumps (meta))
+    return (body)
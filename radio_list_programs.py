@@ -0,0 +1,236 @@
+#!/usr/pkg/bin/python3.12
+
+#
+# Time-stamp: <2026/10/18 23:12:05 (UT+08:00) daisuke>
+#
+
+#
+# listing recordings of radio program list
+#
+#  ~/share/radio/radio_program_list.txt is compiled by radio_program_list
+#  once, and cached until it is modified. Crontab lines of the NHK live
+#  recorder and commands of the radiko timefree recorder are made from
+#  the same recordings with the same margins, in place of
+#  radio_list_crontab.pl and radio_list_timefree.pl. Recordings in
+#  progress, next ones, and those in a window are also listed.
+#
+# usage:
+#
+#    crontab lines for NHK live recording
+#    % radio_list_programs.py -m crontab
+#
+#    commands of timefree recording, to be run by csh
+#    % radio_list_programs.py -m timefree
+#
+#    recordings in progress now, and next 5 recordings
+#    % radio_list_programs.py -m now
+#    % radio_list_programs.py -m next -n 5
+#
+#    recordings of r1 and fm between Sat 20:00 and 26:00
+#    % radio_list_programs.py -m window -c r1,fm -t "Sat 20:00" -W 360
+#
+
+###########################################################################
+
+#
+# importing modules
+#
+
+# importing argparse module
+import argparse
+
+# importing datetime module
+import datetime
+
+# importing os module
+import os
+
+# importing sys module
+import sys
+
+# importing radio_program_list module
+import radio_program_list
+
+###########################################################################
+
+###########################################################################
+
+#
+# command-line arguments analysis using argparse
+#
+
+# environmental variables
+dir_home = os.environ['HOME']
+
+# list of modes
+list_mode = ['crontab', 'timefree', 'now', 'next', 'window']
+
+# default channels of modes
+#  "-" in front of channel name excludes the channel
+dic_channels_mode = {
+    'crontab': radio_program_list.list_channel_nhk,
+    'timefree': [f'-{channel}' \
+                 for channel in radio_program_list.list_channel_nhk],
+}
+
+# default parameters
+default_mode = 'now'
+help_mode \
+    = f'output: {", ".join (list_mode)} (default: {default_mode})'
+
+default_file_program = radio_program_list.default_file_program
+help_file_program    = f'program list file (default: {default_file_program})'
+
+default_channels = ''
+help_channels \
+    = f'comma separated list of channels, "-" in front of channel to' \
+    + f' exclude it (default: NHK channels for crontab,' \
+    + f' others for timefree, all for the rest)'
+
+default_time = ''
+help_time \
+    = f'day of week and time for now, next and window, e.g. "Sat 20:00"' \
+    + f' (default: current time)'
+
+default_next = 1
+help_next    = f'number of next recordings (default: {default_next})'
+
+default_window = 60
+help_window    = f'length of window in minute (default: {default_window})'
+
+default_command_nhk = f'{dir_home}/bin/radio_rec_nhk_now.py'
+help_command_nhk \
+    = f'NHK live recorder in crontab lines (default: {default_command_nhk})'
+
+default_command_timefree \
+    = f'{dir_home}/bin/radio_rec_radiko_timefree_202601.py'
+help_command_timefree \
+    = f'timefree recorder in commands (default: {default_command_timefree})'
+
+default_python = '/usr/pkg/bin/python3'
+help_python    = f'python for timefree recorder (default: {default_python})'
+
+default_pre = radio_program_list.margin_pre
+help_pre    = f'margin before start in minute (default: {default_pre})'
+
+default_post = radio_program_list.margin_post
+help_post    = f'margin after end in minute (default: {default_post})'
+
+# construction of parser object
+desc = 'listing recordings of radio program list'
+parser = argparse.ArgumentParser (description=desc)
+
+# adding arguments
+parser.add_argument ('-m', '--mode', choices=list_mode, \
+                     default=default_mode, help=help_mode)
+parser.add_argument ('-f', '--file', default=default_file_program, \
+                     help=help_file_program)
+parser.add_argument ('-c', '--channels', default=default_channels, \
+                     help=help_channels)
+parser.add_argument ('-t', '--time', default=default_time, help=help_time)
+parser.add_argument ('-n', '--next', type=int, default=default_next, \
+                     help=help_next)
+parser.add_argument ('-W', '--window', type=int, default=default_window, \
+                     help=help_window)
+parser.add_argument ('-N', '--command-nhk', default=default_command_nhk, \
+                     help=help_command_nhk)
+parser.add_argument ('-T', '--command-timefree', \
+                     default=default_command_timefree, \
+                     help=help_command_timefree)
+parser.add_argument ('-P', '--python', default=default_python, \
+                     help=help_python)
+parser.add_argument ('-b', '--pre', type=int, default=default_pre, \
+                     help=help_pre)
+parser.add_argument ('-a', '--post', type=int, default=default_post, \
+                     help=help_post)
+
+# command-line argument analysis
+args = parser.parse_args ()
+
+# parameters
+mode             = args.mode
+file_program     = args.file
+str_channels     = args.channels
+str_time         = args.time
+n_next           = max (args.next, 1)
+window_min       = max (args.window, 1)
+command_nhk      = args.command_nhk
+command_timefree = args.command_timefree
+command_python   = args.python
+margin_pre       = args.pre
+margin_post      = args.post
+
+# channels
+if (str_channels != ''):
+    list_channels = str_channels.split (',')
+else:
+    list_channels = dic_channels_mode.get (mode, [])
+
+# check of program list file
+if not (os.path.exists (file_program)):
+    print (f'Cannot find the file "{file_program}"!', file=sys.stderr)
+    sys.exit ()
+
+###########################################################################
+
+###########################################################################
+
+#
+# functions
+#
+
+# minute of the week of given day of week and time, or of now
+def given_minute (str_time):
+    if (str_time == ''):
+        return (radio_program_list.week_minute (datetime.datetime.now ()))
+    try:
+        (wday, hhmm) = str_time.split ()
+        (hh, mm) = [int (x) for x in hhmm.split (':')]
+        num = [key for (key, value) in radio_program_list.num2wday.items () \
+               if (value == wday)][0]
+    except (ValueError, IndexError):
+        print (f'Invalid time "{str_time}", give e.g. "Sat 20:00"!', \
+               file=sys.stderr)
+        sys.exit ()
+    return ((num - 1) * radio_program_list.minutes_day + hh * 60 + mm)
+
+# printing a recording in one line
+def print_recording (rec):
+    (wday, hh, mm) = radio_program_list.clock (rec['start'])
+    (wday_end, end_hh, end_mm) \
+        = radio_program_list.clock (rec['start'] + rec['duration'])
+    print (f'{radio_program_list.num2wday[wday]} {hh:02d}:{mm:02d}' \
+           + f' - {end_hh:02d}:{end_mm:02d}  {rec["channel"]:13s}' \
+           + f'  {rec["duration"]:4d} min  {rec["program"]}')
+
+###########################################################################
+
+###########################################################################
+
+#
+# listing recordings
+#
+
+compiled = radio_program_list.load_compiled (file_program, list_channels, \
+                                             margin_pre, margin_post)
+
+if (mode == 'crontab'):
+    for rec in compiled['recs']:
+        print (radio_program_list.crontab_line (rec, command_nhk))
+elif (mode == 'timefree'):
+    for rec in compiled['recs']:
+        command = radio_program_list.timefree_command (rec, command_timefree)
+        print (f'echo "{command_python} {command}" | /bin/csh')
+elif (mode == 'now'):
+    for rec in radio_program_list.now (compiled, given_minute (str_time)):
+        print_recording (rec)
+elif (mode == 'next'):
+    for rec in radio_program_list.next_recordings (compiled, \
+                                                   given_minute (str_time), \
+                                                   n_next):
+        print_recording (rec)
+elif (mode == 'window'):
+    minute_from = given_minute (str_time)
+    for rec in radio_program_list.in_window (compiled, minute_from, \
+                                             minute_from + window_min):
+        print_recording (rec)
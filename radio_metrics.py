@@ -0,0 +1,203 @@
+#
+# Time-stamp: <2026/10/19 14:05:12 (UT+08:00) daisuke>
+#
+
+######################################################################
+#                                                                    #
+# Per-job metrics                                                    #
+#                                                                    #
+#  a recording or download job is timed phase by phase, such as      #
+#  auth, playlist, download, ffmpeg and sleep, and one JSON line per #
+#  job is appended to ~/share/radio/log/metrics.jsonl with the       #
+#  durations, bytes, segments, retries and effective bandwidth, so   #
+#  that slow phases of a nightly batch can be found afterwards.      #
+#                                                                    #
+#  HTTP counters are those of radio_http for the context of the job, #
+#  so jobs running at the same time in threads or asyncio tasks are  #
+#  counted apart. Requests of a live tap shared by recording windows #
+#  are not counted for the windows.                                  #
+#                                                                    #
+######################################################################
+
+######################################################################
+
+#
+# Importing modules
+#
+
+# importing atexit module
+import atexit
+
+# importing contextlib module
+import contextlib
+
+# importing datetime module
+import datetime
+
+# importing json module
+import json
+
+# importing os module
+import os
+
+# importing socket module
+import socket
+
+# importing threading module
+import threading
+
+# importing time module
+import time
+
+# importing radio_http module
+import radio_http
+
+######################################################################
+
+#
+# Constants
+#
+
+# file of metrics, one JSON object per line
+default_file_metrics \
+    = f"{os.environ['HOME']}/share/radio/log/metrics.jsonl"
+
+# phase in which bytes are transferred, used for bandwidth
+phase_transfer = ('download', 'record', 'ffmpeg')
+
+# lock for appending lines
+lock_metrics = threading.Lock ()
+
+######################################################################
+
+#
+# Functions
+#
+
+# new job
+#  kind is the recorder, e.g. "timefree" or "nhk_live", and name is
+#  the name of the program. Other given fields are stored as they are.
+#  HTTP requests made from now on in the current thread or asyncio task
+#  are counted for the job.
+def new_job (kind, name, **fields):
+    job = {
+        'kind': kind,
+        'name': name,
+        'time_start': time.monotonic (),
+        'datetime_start': datetime.datetime.now ().isoformat ( \
+            timespec='seconds'),
+        'phases': {},
+        'phase': None,
+        'finished': False,
+        'bytes': 0,
+        'segments': 0,
+        'retries': 0,
+        'http': radio_http.job_counters (),
+        'fields': fields,
+    }
+    return (job)
+
+# timing a phase of job
+#  a phase entered more than once is accumulated
+@contextlib.contextmanager
+def phase (job, name):
+    time_start = time.monotonic ()
+    try:
+        yield (job)
+    finally:
+        duration = time.monotonic () - time_start
+        job['phases'][name] = job['phases'].get (name, 0.0) + duration
+
+# starting a phase of job, ending the current one
+#  for straight-line scripts, where a with statement does not fit
+def start_phase (job, name):
+    end_phase (job)
+    job['phase'] = (name, time.monotonic ())
+
+# ending the current phase of job
+def end_phase (job):
+    if (job['phase'] is None):
+        return
+    (name, time_start) = job['phase']
+    job['phases'][name] = job['phases'].get (name, 0.0) \
+        + time.monotonic () - time_start
+    job['phase'] = None
+
+# adding bytes, segments, retries or other fields to job
+def add (job, **values):
+    for (key, value) in values.items ():
+        if (key in ('bytes', 'segments', 'retries')):
+            job[key] += value
+        else:
+            job['fields'][key] = value
+
+# record of job as a dictionary for JSON
+def record (job, status='ok'):
+    duration      = time.monotonic () - job['time_start']
+    http_job      = radio_http.metrics (job['http'])
+    time_transfer = sum ([job['phases'].get (name, 0.0) \
+                          for name in phase_transfer])
+    if (time_transfer <= 0.0):
+        time_transfer = duration
+    dic_record = {
+        'datetime': job['datetime_start'],
+        'host': socket.gethostname (),
+        'kind': job['kind'],
+        'name': job['name'],
+        'status': status,
+        'duration': round (duration, 3),
+        'phases': {name: round (value, 3) \
+                   for (name, value) in job['phases'].items ()},
+        'bytes': job['bytes'],
+        'segments': job['segments'],
+        'retries': job['retries'] + http_job['retries'] \
+            + http_job['segment_retries'],
+        'bandwidth': round (job['bytes'] / max (time_transfer, 1e-6), 1),
+        'http': http_job,
+    }
+    dic_record.update (job['fields'])
+    return (dic_record)
+
+# finishing job, and appending its record to metrics file
+#  an empty file name disables writing, and the record is returned.
+#  Errors of writing are ignored, not to fail the recording itself.
+def finish (job, status='ok', file_metrics=default_file_metrics):
+    end_phase (job)
+    job['finished'] = True
+    dic_record = record (job, status)
+    if (file_metrics == ''):
+        return (dic_record)
+    line = json.dumps (dic_record, ensure_ascii=False) + '\n'
+    try:
+        os.makedirs (os.path.dirname (file_metrics), exist_ok=True)
+        with lock_metrics:
+            with open (file_metrics, 'a') as fh:
+                fh.write (line)
+    except OSError:
+        pass
+    return (dic_record)
+
+# printing record of job in one line
+def print_record (dic_record):
+    phases = ', '.join ([f'{name} {value:.1f}' \
+                         for (name, value) in dic_record['phases'].items ()])
+    print (f'# {dic_record["kind"]} {dic_record["name"]}:' \
+           + f' {dic_record["status"]}, {dic_record["duration"]:.1f} sec' \
+           + f' ({phases}), {dic_record["bytes"]} byte,' \
+           + f' {dic_record["segments"]} segments,' \
+           + f' {dic_record["retries"]} retries,' \
+           + f' {dic_record["bandwidth"] / 1e6:.2f} MB/s')
+
+# finishing job at exit of script if not finished yet
+#  a script stopped by sys.exit () on error still leaves its record,
+#  with the phase it stopped in as status
+def finish_at_exit (job, file_metrics=default_file_metrics):
+    def handler ():
+        if (job['finished']):
+            return
+        if (job['phase'] is None):
+            status = 'exit'
+        else:
+            status = f'exit in {job["phase"][0]}'
+        finish (job, status, file_metrics)
+    atexit.register (handler)
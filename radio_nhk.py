@@ -0,0 +1,376 @@
+#
+# Time-stamp: <2026/10/19 10:41:07 (UT+08:00) daisuke>
+#
+
+######################################################################
+#                                                                    #
+# NHK on-demand radio                                                #
+#                                                                    #
+#  list of programs, retrieval of radio-api JSON files and fetching  #
+#  of episodes, shared by radio_rec_nhk_ondemand.py and              #
+#  radio_rec_nhk_ondemand_all.py.                                    #
+#                                                                    #
+######################################################################
+
+######################################################################
+
+#
+# Importing modules
+#
+
+# importing http.client module
+import http.client
+
+# importing json module
+import json
+
+# importing pathlib module
+import pathlib
+
+# importing re module
+import re
+
+# importing shutil module
+import shutil
+
+# importing subprocess module
+import subprocess
+
+# importing unicodedata module
+import unicodedata
+
+# importing radio_adts module
+import radio_adts
+
+# importing radio_async module
+import radio_async
+
+# importing radio_hls module
+import radio_hls
+
+# importing radio_http module
+import radio_http
+
+# importing radio_http_cache module
+import radio_http_cache
+
+######################################################################
+
+#
+# Constants
+#
+
+# URL of JSON file
+url_json_nhk \
+    = 'https://www.nhk.or.jp/radio-api/app/v1/web/ondemand/corners/new_arrivals'
+
+# URL of JSON file of each series
+url_json_series \
+    = 'https://www.nhk.or.jp/radio-api/app/v1/web/ondemand/series'
+
+# user agent name
+user_agent = radio_http.user_agent
+
+# options of ffmpeg for stream copy and for transcoding
+opt_ffmpeg_copy      = '-vn -acodec copy'
+opt_ffmpeg_transcode = '-vn -acodec aac'
+
+# fraction of expected duration a fetched episode must have
+min_completeness = 0.99
+
+# program names
+dic_programs = {
+    'adventure': '青春アドベンチャー',
+    'announcer100yr': 'アナウンサー百年百話',
+    'asianview': 'Asian View',
+    'broadcast100yr': '放送100年 保阪正康が語る昭和人物史',
+    'culture_art': 'カルチャーラジオ　芸術その魅力',
+    'culture_chinese': 'カルチャーラジオ　漢詩をよむ',
+    'culture_history': 'カルチャーラジオ　歴史再発見',
+    'culture_literature': 'カルチャーラジオ　文学の世界',
+    'culture_science': 'カルチャーラジオ　科学と人間',
+    'culture_showa': 'カルチャーラジオ　保阪正康が語る昭和人物史',
+    'culture_sunday': 'カルチャーラジオ　日曜カルチャー',
+    'earthradio': 'ちきゅうラジオ',
+    'fmcinemasounds': 'ＦＭシネマサウンズ',
+    'gendaieigo': 'ニュースで学ぶ「現代英語」',
+    'genichiro': '高橋源一郎の飛ぶ教室',
+    'hoshizora': 'MISIA 星空のラジオ ～Sunday Sunset～',
+    'jikutabi': '音で訪ねる　ニッポン時空旅',
+    'kotenkyoshitsu': 'おしゃべりな古典教室',
+    'ohanashi': 'お話でてこい',
+    'oretachi': '弘兼憲史の“俺たちはどう生きるか”',
+    'oto': '音の風景',
+    'learnjapanese': 'Ｌｅａｒｎ　Ｊａｐａｎｅｓｅ　ｆｒｏｍ　ｔｈｅ　Ｎｅｗｓ',
+    'meisakuza': '新日曜名作座',
+    'nemurenai': '眠れない貴女へ',
+    'nhkjournal': 'NHKジャーナル',
+    'nhknewswebeasy': 'NHKやさしいことばニュース',
+    'roudoku': '朗読',
+    'roudokuworld': '朗読の世界',
+    'sensonomukogawa': '高橋源一郎と読む「戦争の向こう側」',
+    'senzennonihon': 'ラジオテキストが教えてくれる戦前の日本',
+    'theatre': 'ＦＭシアター',
+    'weekendsunshine': 'ウィークエンドサンシャイン',
+    'yamacafe': '石丸謙二郎の山カフェ',
+}
+
+# pattern of date/time of start of program in aa_contents_id
+pattern_datetime \
+    = re.compile (r'(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})\+09:00_')
+
+######################################################################
+
+#
+# Functions
+#
+
+# retrieval of JSON file through on-disk HTTP cache
+def fetch_json (url, user_agent=user_agent, ttl=radio_http_cache.default_ttl):
+    headers   = {'User-Agent': user_agent}
+    data_json = radio_http_cache.get (url, headers, ttl)
+    return (json.loads (data_json.decode ('utf8')))
+
+# normalising title for lookup
+#  full-width alphabets, digits, spaces and symbols are converted into
+#  half-width ones, and runs of spaces are squeezed
+def normalise_title (title):
+    title = unicodedata.normalize ('NFKC', title)
+    title = ' '.join (title.split ())
+    return (title.casefold ())
+
+# making index of new_arrivals JSON data
+#  normalised title ==> (channel, series ID, corner ID)
+#  the first entry is kept if a title appears more than once
+def make_title_index (dic_nhk):
+    index = {}
+    for key in dic_nhk.keys ():
+        for entry in dic_nhk[key]:
+            title = normalise_title (entry["title"])
+            if (title in index):
+                continue
+            index[title] = (entry["radio_broadcast"], \
+                            entry["series_site_id"], entry["corner_site_id"])
+    return (index)
+
+# finding channel, series ID, and corner ID of given programs
+#  returning dictionary of found programs and list of programs not found
+def resolve_programs (index, list_programs):
+    dic_series  = {}
+    list_missed = []
+    for program in list_programs:
+        title = normalise_title (dic_programs[program])
+        if (title in index):
+            dic_series[program] = index[title]
+        else:
+            list_missed.append (program)
+    return (dic_series, list_missed)
+
+# URL of JSON file for given series
+def series_url (series_id, corner_id):
+    url = f'{url_json_series}?site_id={series_id}&corner_site_id={corner_id}'
+    return (url)
+
+# list of episodes in JSON data of a series
+#  each episode is a dictionary of contents ID, URL of m3u8, and
+#  date/time of start of program in YYYYMMDD_hhmm format
+def list_episodes (dic_program):
+    episodes = []
+    for episode in dic_program["episodes"]:
+        contents_id    = episode["aa_contents_id"]
+        match_datetime = re.search (pattern_datetime, contents_id)
+        if not (match_datetime):
+            continue
+        start_date = ''.join (match_datetime.group (1, 2, 3))
+        start_time = ''.join (match_datetime.group (4, 5))
+        episodes.append ({
+            'contents_id': contents_id,
+            'url_m3u8': episode["stream_url"],
+            'start_datetime': f'{start_date}_{start_time}',
+        })
+    return (episodes)
+
+# ffmpeg command to fetch audio stream of an episode
+def fetch_command (command_ffmpeg, url_m3u8, file_aac_tmp, \
+                   opt_codec=opt_ffmpeg_copy):
+    command_fetch = f'{command_ffmpeg} -nostdin -http_seekable 0 -n' \
+        + f' -i {url_m3u8} {opt_codec} {file_aac_tmp}'
+    return (command_fetch)
+
+# media playlist of an episode
+#  the highest bandwidth variant is taken from a master playlist
+def media_playlist (url_m3u8):
+    (status, body) = radio_hls.fetch (url_m3u8)
+    if (status != 200):
+        raise RuntimeError (f'HTTP {status} for {url_m3u8}')
+    playlist = radio_hls.parse_playlist (body.decode ('utf-8'), url_m3u8)
+    if (len (playlist['variants']) > 0):
+        variant = max (playlist['variants'], key=lambda v: v['bandwidth'])
+        (status, body) = radio_hls.fetch (variant['uri'])
+        if (status != 200):
+            raise RuntimeError (f'HTTP {status} for {variant["uri"]}')
+        playlist = radio_hls.parse_playlist (body.decode ('utf-8'), \
+                                             variant['uri'])
+    return (playlist)
+
+# duration of an episode in second, summed over its media playlist
+#  0.0 is returned when it is not known
+def expected_duration (url_m3u8):
+    try:
+        playlist = media_playlist (url_m3u8)
+    except (http.client.HTTPException, OSError, RuntimeError, \
+            ValueError):
+        return (0.0)
+    if not (playlist['endlist']):
+        return (0.0)
+    return (sum ([segment['duration'] for segment in playlist['segments']]))
+
+# fetching audio stream of an episode without ffmpeg
+#  segments of the highest bandwidth variant are demuxed into ADTS.
+#  ValueError is raised for streams which need ffmpeg, such as
+#  encrypted or fragmented MP4 ones, and for audio other than ADTS.
+def fetch_native (url_m3u8, file_aac_tmp, verbosity=0):
+    playlist = media_playlist (url_m3u8)
+    if ( (playlist['encrypted']) or (playlist['map'] != '') ):
+        raise ValueError ('encrypted or fragmented MP4 stream')
+    if not (playlist['endlist']):
+        raise ValueError ('playlist is not complete')
+    list_url = [segment['uri'] for segment in playlist['segments']]
+    if (verbosity):
+        print (f'#    fetching {len (list_url)} segments without ffmpeg')
+    (n_segments, n_bytes) = radio_hls.write_segments (list_url, file_aac_tmp)
+    with open (file_aac_tmp, 'rb') as fh:
+        if (radio_adts.parse_header (fh.read (7), 0) is None):
+            raise ValueError ('audio is not ADTS')
+    return (n_segments, n_bytes)
+
+# trying to fetch an episode without ffmpeg
+#  True is returned on success, and False when ffmpeg is needed
+def try_native (url_m3u8, file_aac_tmp, verbosity=0):
+    try:
+        fetch_native (url_m3u8, file_aac_tmp, verbosity)
+    except (http.client.HTTPException, OSError, RuntimeError, \
+            ValueError) as error:
+        pathlib.Path (file_aac_tmp).unlink (missing_ok=True)
+        if (verbosity):
+            print (f'#    native fetch failed ({error}), using ffmpeg...')
+        return (False)
+    return (True)
+
+# fetching audio stream of an episode
+#  audio stream is remuxed in-process when possible, and otherwise
+#  copied by ffmpeg unless transcoding is requested. With transcode
+#  'auto' it is transcoded only when stream copy fails.
+def fetch_episode (command_ffmpeg, url_m3u8, file_aac_tmp, \
+                   transcode='never', verbosity=0):
+    if ( (transcode != 'always') \
+         and (try_native (url_m3u8, file_aac_tmp, verbosity)) ):
+        return (0)
+    if (transcode == 'always'):
+        opt_codec = opt_ffmpeg_transcode
+    else:
+        opt_codec = opt_ffmpeg_copy
+    command_fetch = fetch_command (command_ffmpeg, url_m3u8, file_aac_tmp, \
+                                   opt_codec)
+    if (verbosity):
+        print (f'#    {command_fetch}')
+    result_fetch = subprocess.run (command_fetch, shell=True)
+
+    # transcoding if source audio cannot be stored as ADTS without it
+    if ( (transcode == 'auto') and (result_fetch.returncode != 0) ):
+        path_aac_tmp = pathlib.Path (file_aac_tmp)
+        if (path_aac_tmp.exists ()):
+            path_aac_tmp.unlink ()
+        command_fetch = fetch_command (command_ffmpeg, url_m3u8, \
+                                       file_aac_tmp, opt_ffmpeg_transcode)
+        if (verbosity):
+            print (f'#    stream copy failed, transcoding...')
+            print (f'#    {command_fetch}')
+        result_fetch = subprocess.run (command_fetch, shell=True)
+    return (result_fetch.returncode)
+
+# fetching audio stream of an episode as a coroutine of radio_async
+#  same as fetch_episode (), and ffmpeg is killed after timeout
+async def fetch_episode_async (command_ffmpeg, url_m3u8, file_aac_tmp, \
+                               transcode='never', timeout=None, \
+                               verbosity=0):
+    if ( (transcode != 'always') \
+         and (await radio_async.in_thread (try_native, url_m3u8, \
+                                           file_aac_tmp, verbosity)) ):
+        return (0)
+    if (transcode == 'always'):
+        opt_codec = opt_ffmpeg_transcode
+    else:
+        opt_codec = opt_ffmpeg_copy
+    command_fetch = fetch_command (command_ffmpeg, url_m3u8, file_aac_tmp, \
+                                   opt_codec)
+    returncode = await radio_async.run_command (command_fetch, timeout, \
+                                                verbosity)
+
+    # transcoding if source audio cannot be stored as ADTS without it
+    if ( (transcode == 'auto') and (returncode != 0) ):
+        pathlib.Path (file_aac_tmp).unlink (missing_ok=True)
+        if (verbosity):
+            print (f'#    stream copy failed, transcoding...')
+        command_fetch = fetch_command (command_ffmpeg, url_m3u8, \
+                                       file_aac_tmp, opt_ffmpeg_transcode)
+        returncode = await radio_async.run_command (command_fetch, timeout, \
+                                                    verbosity)
+    return (returncode)
+
+# checking fetched file of an episode
+#  an error message is returned when fetching failed, or when the
+#  audio is shorter than min_completeness of the expected duration,
+#  and the file is removed then. None is returned for a good file.
+def check_episode (file_aac_tmp, returncode, duration_expected=0.0, \
+                   verbosity=0):
+    path_aac_tmp = pathlib.Path (file_aac_tmp)
+    if (returncode != 0):
+        message = f'exit status {returncode}'
+    elif not (path_aac_tmp.exists ()):
+        message = f'no file "{file_aac_tmp}"'
+    else:
+        duration = radio_adts.file_duration (file_aac_tmp)
+        if (verbosity):
+            print (f'#    duration: {duration:.1f} sec' \
+                   + f' (expected: {duration_expected:.1f} sec)')
+        if (duration <= 0.0):
+            message = f'no ADTS frames in "{file_aac_tmp}"'
+        elif (duration < min_completeness * duration_expected):
+            message = f'truncated, {duration:.1f} of' \
+                + f' {duration_expected:.1f} sec'
+        else:
+            return (None)
+    path_aac_tmp.unlink (missing_ok=True)
+    return (message)
+
+# copying fetched file into radio directory
+#  an existing file which is not smaller than the new one is kept
+def store_episode (file_aac_tmp, file_aac, verbosity=0):
+    path_aac_tmp     = pathlib.Path (file_aac_tmp)
+    filesize_aac_tmp = path_aac_tmp.stat ().st_size
+    path_aac = pathlib.Path (file_aac)
+    if (path_aac.exists ()):
+        filesize_aac = path_aac.stat ().st_size
+    else:
+        filesize_aac = 0
+
+    # printing file sizes
+    if (verbosity):
+        print (f'#    file sizes')
+        print (f'#      {file_aac_tmp}: {filesize_aac_tmp} byte')
+        print (f'#      {file_aac}: {filesize_aac} byte')
+
+    # copying AAC file
+    if ( (path_aac.exists ()) and (filesize_aac >= filesize_aac_tmp) ):
+        # if file exists and larger than new file, then not copying file
+        if (verbosity):
+            print (f'#    file "{file_aac_tmp}" is not copied')
+        copied = False
+    else:
+        if (verbosity):
+            print (f'#    copy: {file_aac_tmp} ==> {file_aac}')
+        shutil.copy2 (file_aac_tmp, file_aac)
+        copied = True
+    path_aac_tmp.unlink ()
+    return (copied)
@@ -0,0 +1,129 @@
+#
+# Time-stamp: <2026/10/19 12:21:05 (UT+08:00) daisuke>
+#
+
+######################################################################
+#                                                                    #
+# Index of archived NHK on-demand episodes                           #
+#                                                                    #
+#  episodes are keyed by aa_contents_id, and the size, duration and  #
+#  checksum of the archived file are kept, so that episodes already  #
+#  in the archive are not fetched again. Files archived before the  #
+#  index existed are adopted into it the first time they are met.    #
+#                                                                    #
+######################################################################
+
+######################################################################
+
+#
+# Importing modules
+#
+
+# importing datetime module
+import datetime
+
+# importing hashlib module
+import hashlib
+
+# importing json module
+import json
+
+# importing os module
+import os
+
+# importing pathlib module
+import pathlib
+
+# importing radio_adts module
+import radio_adts
+
+######################################################################
+
+#
+# Constants
+#
+
+# default index file
+default_file_index \
+    = f"{os.environ['HOME']}/share/radio/nhk_ondemand_index.json"
+
+######################################################################
+
+#
+# Functions
+#
+
+# reading index file
+def load_index (file_index=default_file_index):
+    path_index = pathlib.Path (file_index)
+    if not (path_index.exists ()):
+        return ({})
+    try:
+        with open (file_index, 'r') as fh:
+            index = json.load (fh)
+    except (OSError, ValueError):
+        index = {}
+    return (index)
+
+# writing index file atomically
+def save_index (index, file_index=default_file_index):
+    path_index = pathlib.Path (file_index)
+    if not (path_index.parent.exists ()):
+        path_index.parent.mkdir (parents=True, exist_ok=True)
+    file_tmp = f'{file_index}.{os.getpid ()}'
+    with open (file_tmp, 'w') as fh:
+        json.dump (index, fh, indent=1, ensure_ascii=False, sort_keys=True)
+    os.replace (file_tmp, file_index)
+
+# SHA-256 checksum of file
+def checksum (file_aac):
+    sha256 = hashlib.sha256 ()
+    with open (file_aac, 'rb') as fh:
+        for block in iter (lambda: fh.read (1048576), b''):
+            sha256.update (block)
+    return (sha256.hexdigest ())
+
+# checking whether the episode is already archived
+#  only the file size is compared here, which costs one stat
+def is_archived (index, contents_id, file_aac):
+    if (contents_id not in index):
+        return (False)
+    entry    = index[contents_id]
+    path_aac = pathlib.Path (file_aac)
+    if not (path_aac.exists ()):
+        return (False)
+    if (path_aac.stat ().st_size != entry['size']):
+        return (False)
+    return (True)
+
+# index entry of an archived episode
+#  the file is read through, so this may be run in a worker thread
+def make_entry (file_aac):
+    path_aac = pathlib.Path (file_aac)
+    entry = {
+        'file': path_aac.name,
+        'size': path_aac.stat ().st_size,
+        'duration': round (radio_adts.file_duration (file_aac), 3),
+        'sha256': checksum (file_aac),
+        'recorded': datetime.datetime.now ().isoformat (timespec='seconds'),
+    }
+    return (entry)
+
+# recording archived episode in the index
+def add_entry (index, contents_id, file_aac):
+    index[contents_id] = make_entry (file_aac)
+    return (index[contents_id])
+
+# adopting a file archived before the index existed
+#  an episode without entry whose file exists and holds audio is recorded,
+#  so that it is not fetched again; the file is read through only once
+def adopt_file (index, contents_id, file_aac):
+    if (contents_id in index):
+        return (False)
+    if not (pathlib.Path (file_aac).exists ()):
+        return (False)
+    entry = make_entry (file_aac)
+    if (entry['duration'] <= 0.0):
+        return (False)
+    index[contents_id] = entry
+    return (True)
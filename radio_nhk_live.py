@@ -0,0 +1,749 @@
+#
+# Time-stamp: <2026/10/19 11:48:20 (UT+08:00) daisuke>
+#
+
+######################################################################
+#                                                                    #
+# NHK live stream recording                                          #
+#                                                                    #
+#  the media playlist of NHK radio is followed by media sequence     #
+#  number. Segments are written into the output file as they         #
+#  arrive, errors are retried and the stream is re-connected         #
+#  without restarting, and lost segments are reported as gaps.       #
+#  A live tap fetches each segment once and writes it into all the   #
+#  recording windows open on the same channel.                       #
+#                                                                    #
+######################################################################
+
+######################################################################
+
+#
+# Importing modules
+#
+
+# importing collections module
+import collections
+
+# importing http.client module
+import http.client
+
+# importing pathlib module
+import pathlib
+
+# importing posixpath module
+import posixpath
+
+# importing subprocess module
+import subprocess
+
+# importing threading module
+import threading
+
+# importing time module
+import time
+
+# importing urllib.parse module
+import urllib.parse
+
+# importing radio_adts module
+import radio_adts
+
+# importing radio_hls module
+import radio_hls
+
+######################################################################
+
+#
+# Constants
+#
+
+#
+# m3u8 addresses can be found at following web page.
+#
+#  https://www.nhk.or.jp/radio/config/config_web.xml
+#
+
+# list of m3u8 URLs
+dic_m3u8 = {
+    'r1':
+    'https://radio-stream.nhk.jp/hls/live/2023229/nhkradiruakr1/master.m3u8',
+    'r2':
+    'https://radio-stream.nhk.jp/hls/live/2023501/nhkradiruakr2/master.m3u8',
+    'fm':
+    'https://radio-stream.nhk.jp/hls/live/2023507/nhkradiruakfm/master.m3u8',
+}
+
+# list of channels
+list_channel = list (dic_m3u8.keys ())
+
+# recording starts from this many segments before the live edge,
+# same as default of ffmpeg
+live_start_segments = 3
+
+# number of consecutive playlist errors before re-resolving master
+max_playlist_errors = 3
+
+# extra wall-clock time allowed after given duration in second
+grace_sec = 60.0
+
+# live tap stops after no recording window is open for this long
+tap_linger_sec = 300.0
+
+# default size of ring buffer of live tap in memory
+ring_memory_bytes = 4 * 1024 * 1024
+
+######################################################################
+
+#
+# Functions
+#
+
+# resolving media playlist from master playlist
+#  the variant of the highest bandwidth is chosen
+def resolve_media_playlist (url_master):
+    (status, body) = radio_hls.fetch (url_master)
+    if (status != 200):
+        raise RuntimeError (f'HTTP {status} for {url_master}')
+    playlist = radio_hls.parse_playlist (body.decode ('utf-8'), url_master)
+    if (len (playlist['variants']) == 0):
+        # already a media playlist
+        return (url_master)
+    variant = max (playlist['variants'], key=lambda v: v['bandwidth'])
+    return (variant['uri'])
+
+# fetching media playlist
+def fetch_media_playlist (url_media):
+    (status, body) = radio_hls.fetch (url_media)
+    if (status != 200):
+        raise RuntimeError (f'HTTP {status} for {url_media}')
+    return (radio_hls.parse_playlist (body.decode ('utf-8'), url_media))
+
+# file extension of segments, such as ".ts" or ".aac"
+def segment_extension (url_segment):
+    path = urllib.parse.urlsplit (url_segment).path
+    ext  = posixpath.splitext (path)[1]
+    if (ext == ''):
+        ext = '.ts'
+    return (ext)
+
+# new report of recording
+def new_report ():
+    report = {
+        'segments': 0,
+        'bytes': 0,
+        'duration': 0.0,
+        'gaps': [],
+        'errors': 0,
+        'reconnects': 0,
+        'extension': '',
+        'returncode': 0,
+        'missed': 0.0,
+        'unsupported': False,
+    }
+    return (report)
+
+# recording gap of segments between sequence numbers
+def add_gap (report, sequence_from, sequence_to, target_duration):
+    n_missed = sequence_to - sequence_from + 1
+    report['gaps'].append ({
+        'sequence_from': sequence_from,
+        'sequence_to': sequence_to,
+        'segments': n_missed,
+        'duration': n_missed * target_duration,
+    })
+
+# pre-roll of live stream
+#  the media playlist is resolved, the connection is opened, and the
+#  segments at the live edge are buffered before recording starts
+def prepare (url_master, verbosity=0):
+    preroll = {
+        'url_master': url_master,
+        'url_media': resolve_media_playlist (url_master),
+        'target_duration': 5.0,
+        'buffer': {},
+    }
+    update_preroll (preroll)
+    if (verbosity):
+        print (f'# pre-roll: {len (preroll["buffer"])} segments buffered' \
+               + f' from {preroll["url_media"]}')
+    return (preroll)
+
+# buffering new segments at the live edge into pre-roll
+#  only the last live_start_segments segments are kept, and segments
+#  failed to fetch are left to record ()
+def update_preroll (preroll):
+    playlist = fetch_media_playlist (preroll['url_media'])
+    if (playlist['target_duration'] > 0.0):
+        preroll['target_duration'] = playlist['target_duration']
+    buffer = preroll['buffer']
+    for segment in playlist['segments'][-live_start_segments:]:
+        if (segment['sequence'] in buffer):
+            continue
+        try:
+            buffer[segment['sequence']] \
+                = radio_hls.fetch_segment (segment['uri'])
+        except (http.client.HTTPException, OSError, RuntimeError):
+            # left to be fetched again when recording
+            continue
+    while (len (buffer) > live_start_segments):
+        del buffer[min (buffer)]
+
+# keeping pre-roll up to date until given value of monotonic clock
+def keep_warm (preroll, time_target, verbosity=0):
+    while True:
+        time_left = time_target - time.monotonic ()
+        if (time_left <= 0.0):
+            break
+        time.sleep (min (max (preroll['target_duration'] / 2.0, 1.0), \
+                         time_left))
+        try:
+            update_preroll (preroll)
+        except (http.client.HTTPException, OSError, RuntimeError, \
+                ValueError) as error:
+            if (verbosity):
+                print (f'# pre-roll error: {error}')
+
+# whether segments can be stored as ADTS without ffmpeg
+#  ADTS segments and MPEG-TS segments carrying ADTS audio are converted
+#  in-process, and others, such as fragmented MP4, are left to ffmpeg
+def native_sink (data):
+    try:
+        data = radio_adts.to_adts (data)
+    except ValueError:
+        return (False)
+    return (radio_adts.parse_header (data, 0) is not None)
+
+# opening output of segments
+#  segments are written directly in native mode, and otherwise they
+#  are remuxed into ADTS by ffmpeg reading from a pipe
+def open_sink (file_out, native, command_ffmpeg=''):
+    if ( (native) or (command_ffmpeg == '') ):
+        return (open (file_out, 'wb'), None)
+    command_remux = f'{command_ffmpeg} -loglevel error -y -i pipe:0' \
+        + f' -vn -acodec copy -f adts {file_out}'
+    proc = subprocess.Popen (command_remux, shell=True, \
+                             stdin=subprocess.PIPE)
+    return (proc.stdin, proc)
+
+# closing output of segments, and returning exit status of ffmpeg
+def close_sink (fh, proc):
+    try:
+        fh.close ()
+    except BrokenPipeError:
+        pass
+    if (proc is None):
+        return (0)
+    return (proc.wait ())
+
+# new recording window
+#  a window receives segments until given duration of audio is written
+def new_window (file_out, duration_sec, command_ffmpeg=''):
+    window = {
+        'file_out': file_out,
+        'duration_sec': duration_sec,
+        'command_ffmpeg': command_ffmpeg,
+        'deadline': time.monotonic () + duration_sec + grace_sec,
+        'report': new_report (),
+        'native': True,
+        'fh': None,
+        'proc': None,
+        'done': threading.Event (),
+        'lock': threading.RLock (),
+    }
+    return (window)
+
+# writing a segment into recording window
+#  True is returned when the window is complete. Segments which can be
+#  stored neither in-process nor by ffmpeg are not written, and the
+#  window is complete with report['unsupported'] set.
+def write_window (window, segment, data, data_map=b''):
+    with window['lock']:
+        return (write_window_locked (window, segment, data, data_map))
+
+# writing a segment into recording window, holding its lock
+def write_window_locked (window, segment, data, data_map=b''):
+    report = window['report']
+    if (window['done'].is_set ()):
+        return (True)
+    try:
+        if (window['fh'] is None):
+            report['extension'] = segment_extension (segment['uri'])
+            window['native'] = native_sink (data_map + data)
+            if ( (not (window['native'])) \
+                 and (window['command_ffmpeg'] == '') ):
+                report['unsupported'] = True
+                report['errors'] += 1
+                return (True)
+            (window['fh'], window['proc']) \
+                = open_sink (window['file_out'], window['native'], \
+                             window['command_ffmpeg'])
+            if not (window['native']):
+                window['fh'].write (data_map)
+        if (window['native']):
+            data = radio_adts.to_adts (data_map + data)
+            if (radio_adts.parse_header (data, 0) is None):
+                raise ValueError ('segment is not ADTS')
+        window['fh'].write (data)
+        window['fh'].flush ()
+    except BrokenPipeError:
+        # ffmpeg exited before the end of recording
+        report['errors'] += 1
+        return (True)
+    except ValueError:
+        # segment without ADTS audio
+        report['errors'] += 1
+        return (False)
+    report['segments'] += 1
+    report['bytes']    += len (data)
+    report['duration'] += segment['duration']
+    return (report['duration'] >= window['duration_sec'])
+
+# closing recording window, and returning its report
+#  this waits for ffmpeg, so it is not called holding the lock of tap
+def close_window (window):
+    with window['lock']:
+        if not (window['done'].is_set ()):
+            if (window['fh'] is not None):
+                window['report']['returncode'] \
+                    = close_sink (window['fh'], window['proc'])
+            window['done'].set ()
+    return (window['report'])
+
+# end of segments of playlist in UNIX time, as broadcast
+#  segments are timed by EXT-X-PROGRAM-DATE-TIME, and without it, back
+#  from the end of playlist taken as the live edge at time_fetch, so
+#  that segments fetched late are not timed by their fetch
+def broadcast_times (segments, time_fetch):
+    time_edge = time_fetch
+    for segment in reversed (segments):
+        if (segment.get ('date_time') is not None):
+            segment['time_end'] = segment['date_time'] + segment['duration']
+        else:
+            segment['time_end'] = time_edge
+        time_edge = segment['time_end'] - segment['duration']
+
+# following live media playlist
+#  deliver (segment, data, data_map) is called for each new segment in
+#  order of media sequence, with its end as broadcast in
+#  segment['time_end'], and gap (sequence_from, sequence_to,
+#  duration) for segments lost. Following continues while running ()
+#  returns True, and errors and reconnections are counted in stats.
+#  Segments in buffer, such as the ones of pre-roll, are not fetched.
+def follow (url_master, deliver, gap, running, stats, url_media='', \
+            buffer={}, verbosity=0):
+    last_sequence   = None
+    n_errors        = 0
+    target_duration = 5.0
+    url_map         = ''
+    data_map        = b''
+
+    while (running ()):
+        # (re-)resolving media playlist
+        try:
+            if ( (url_media == '') or (n_errors >= max_playlist_errors) ):
+                if (url_media != ''):
+                    stats['reconnects'] += 1
+                    if (verbosity):
+                        print (f'# re-connecting to {url_master}')
+                url_media = resolve_media_playlist (url_master)
+                n_errors  = 0
+            playlist = fetch_media_playlist (url_media)
+        except (http.client.HTTPException, OSError, RuntimeError, \
+                ValueError) as error:
+            stats['errors'] += 1
+            n_errors += 1
+            if (verbosity):
+                print (f'# playlist error: {error}')
+            time.sleep (min (2**n_errors, target_duration))
+            continue
+        n_errors = 0
+        if (playlist['target_duration'] > 0.0):
+            target_duration = playlist['target_duration']
+        segments = playlist['segments']
+        broadcast_times (segments, time.time ())
+
+        # initialisation section of fragmented MP4
+        if ( (playlist['map'] != '') and (url_map == '') ):
+            try:
+                data_map = radio_hls.fetch_segment (playlist['map'])
+                url_map  = playlist['map']
+            except (http.client.HTTPException, OSError, \
+                    RuntimeError) as error:
+                stats['errors'] += 1
+                if (verbosity):
+                    print (f'# initialisation section error: {error}')
+                time.sleep (max (target_duration / 2.0, 1.0))
+                continue
+
+        # starting near the live edge
+        if (last_sequence is None):
+            segments = segments[-live_start_segments:]
+        elif ( (len (segments) > 0) \
+               and (segments[-1]['sequence'] < last_sequence) ):
+            # media sequence restarted by the server
+            if (verbosity):
+                print (f'# media sequence restarted')
+            last_sequence = segments[0]['sequence'] - 1
+
+        for segment in segments:
+            if not (running ()):
+                break
+            if ( (last_sequence is not None) \
+                 and (segment['sequence'] <= last_sequence) ):
+                continue
+            if ( (last_sequence is not None) \
+                 and (segment['sequence'] > last_sequence + 1) ):
+                # segments dropped out of playlist before fetched
+                gap (last_sequence + 1, segment['sequence'] - 1, \
+                     target_duration)
+            try:
+                if (segment['sequence'] in buffer):
+                    data = buffer.pop (segment['sequence'])
+                else:
+                    data = radio_hls.fetch_segment (segment['uri'])
+            except (http.client.HTTPException, OSError, \
+                    RuntimeError) as error:
+                stats['errors'] += 1
+                gap (segment['sequence'], segment['sequence'], \
+                     segment['duration'])
+                last_sequence = segment['sequence']
+                if (verbosity):
+                    print (f'# segment error: {error}')
+                continue
+            deliver (segment, data, data_map)
+            last_sequence = segment['sequence']
+
+        # waiting for next playlist update
+        if (playlist['endlist']):
+            break
+        if (running ()):
+            time.sleep (max (target_duration / 2.0, 1.0))
+
+# recording live stream into given file
+#  recording stops when given duration of audio has been written, or
+#  when the wall-clock time exceeds the duration with some grace.
+#  ADTS and MPEG-TS segments are stored as ADTS in-process, and with
+#  ffmpeg command given, other segments are remuxed on the fly, so
+#  that the output is an ADTS file without a second pass.
+#  A media playlist resolved beforehand can be given as url_media, and
+#  segments buffered by prepare () are used without fetching again.
+def record (url_master, file_out, duration_sec, command_ffmpeg='', \
+            url_media='', preroll=None, verbosity=0):
+    window = new_window (file_out, duration_sec, command_ffmpeg)
+    report = window['report']
+    buffer = {}
+    if (preroll is not None):
+        url_media = preroll['url_media']
+        buffer    = preroll['buffer']
+
+    def deliver (segment, data, data_map):
+        if (write_window (window, segment, data, data_map)):
+            close_window (window)
+
+    def gap (sequence_from, sequence_to, duration):
+        add_gap (report, sequence_from, sequence_to, duration)
+
+    def running ():
+        return ( (not window['done'].is_set ()) \
+                 and (time.monotonic () < window['deadline']) )
+
+    try:
+        follow (url_master, deliver, gap, running, report, \
+                url_media=url_media, buffer=buffer, verbosity=verbosity)
+    finally:
+        close_window (window)
+    return (report)
+
+# new ring buffer of recent segments
+#  segments are kept in memory up to max_memory bytes, older ones are
+#  moved into dir_ring up to max_disk bytes, and the oldest ones are
+#  dropped. With empty dir_ring, nothing is written on disk. Segments
+#  are added and dropped in memory, under the lock of tap, and files
+#  are written and removed afterwards by ring_flush ().
+def new_ring (dir_ring='', max_memory=ring_memory_bytes, max_disk=0):
+    if (dir_ring != ''):
+        pathlib.Path (dir_ring).mkdir (parents=True, exist_ok=True)
+    ring = {
+        'dir_ring': dir_ring,
+        'max_memory': max_memory,
+        'max_disk': max_disk,
+        'entries': collections.deque (),
+        'bytes_memory': 0,
+        'bytes_disk': 0,
+        'data_map': b'',
+        'count': 0,
+    }
+    return (ring)
+
+# adding a segment into ring buffer
+#  the segment ended at time_end in UNIX time. A pair of lists of
+#  entries to write on disk and of files to remove is returned, for
+#  ring_flush ().
+def ring_add (ring, segment, data, data_map, time_end):
+    ring['data_map'] = data_map
+    ring['count']   += 1
+    ring['entries'].append ({
+        'segment': segment,
+        'time_start': time_end - segment['duration'],
+        'time_end': time_end,
+        'size': len (data),
+        'data': data,
+        'file': '',
+    })
+    ring['bytes_memory'] += len (data)
+
+    # moving old segments on disk, or dropping them
+    #  data of a segment is kept until its file is written
+    list_write = []
+    for entry in ring['entries']:
+        if (ring['bytes_memory'] <= ring['max_memory']):
+            break
+        if ( (entry['data'] is None) or (entry['file'] != '') ):
+            continue
+        if ( (ring['dir_ring'] != '') and (ring['max_disk'] > 0) ):
+            entry['file'] = f'{ring["dir_ring"]}/{ring["count"]}' \
+                + f'_{entry["segment"]["sequence"]}.seg'
+            ring['bytes_disk'] += entry['size']
+            list_write.append (entry)
+        else:
+            entry['data'] = None
+        ring['bytes_memory'] -= entry['size']
+    list_remove = []
+    while ( (len (ring['entries']) > 0) \
+            and ( (ring['entries'][0]['data'] is None) \
+                  or (ring['entries'][0]['file'] != '') ) \
+            and ( (ring['bytes_disk'] > ring['max_disk']) \
+                  or (ring['entries'][0]['file'] == '') ) ):
+        list_remove += ring_drop (ring)
+    return (list_write, list_remove)
+
+# writing and removing files of ring buffer
+#  called without the lock of tap. Data of a segment is released after
+#  its file is written, and a file dropped meanwhile is removed after.
+def ring_flush (list_write, list_remove):
+    for entry in list_write:
+        with open (entry['file'], 'wb') as fh:
+            fh.write (entry['data'])
+        entry['data'] = None
+    for file in list_remove:
+        pathlib.Path (file).unlink (missing_ok=True)
+
+# dropping the oldest segment of ring buffer
+#  a list of the file to remove is returned
+def ring_drop (ring):
+    entry = ring['entries'].popleft ()
+    if (entry['file'] != ''):
+        ring['bytes_disk'] -= entry['size']
+        return ([entry['file']])
+    if (entry['data'] is not None):
+        ring['bytes_memory'] -= entry['size']
+    return ([])
+
+# dropping all the segments of ring buffer
+#  a list of files to remove is returned
+def ring_clear (ring):
+    list_remove = []
+    while (len (ring['entries']) > 0):
+        list_remove += ring_drop (ring)
+    return (list_remove)
+
+# data of a segment in ring buffer, None if its file is gone
+def ring_read (entry):
+    if (entry['data'] is not None):
+        return (entry['data'])
+    try:
+        with open (entry['file'], 'rb') as fh:
+            return (fh.read ())
+    except OSError:
+        return (None)
+
+# time span covered by ring buffer in UNIX time, (0, 0) if empty
+def ring_span (ring):
+    if (len (ring['entries']) == 0):
+        return (0.0, 0.0)
+    return (ring['entries'][0]['time_start'], ring['entries'][-1]['time_end'])
+
+# segments of ring buffer overlapping with given time span
+#  copies of entries are returned, so that they can be read without
+#  the lock of tap
+def ring_query (ring, time_from, time_to):
+    entries = []
+    for entry in ring['entries']:
+        if ( (entry['time_end'] > time_from) \
+             and (entry['time_start'] < time_to) ):
+            entries.append (dict (entry))
+    return (entries)
+
+# live tap of a channel
+#  one thread follows the media playlist, and each segment fetched
+#  once is written into every recording window open on the tap. The
+#  tap stops itself when no window is open for linger_sec, and it can
+#  be kept open with linger_sec < 0. Recent segments are kept in a ring
+#  buffer, see new_ring (), so that past audio can be recovered.
+def open_tap (url_master, command_ffmpeg='', linger_sec=tap_linger_sec, \
+              dir_ring='', max_memory=ring_memory_bytes, max_disk=0, \
+              verbosity=0):
+    tap = {
+        'url_master': url_master,
+        'command_ffmpeg': command_ffmpeg,
+        'linger_sec': linger_sec,
+        'lock': threading.Lock (),
+        'windows': [],
+        'ring': new_ring (dir_ring, max_memory, max_disk),
+        'stats': new_report (),
+        'time_idle': time.monotonic (),
+        'stop': threading.Event (),
+    }
+    tap['thread'] = threading.Thread (target=run_tap, args=(tap, verbosity), \
+                                      daemon=True)
+    tap['thread'].start ()
+    return (tap)
+
+# body of thread of live tap
+#  the lock of tap guards the list of windows and the ring buffer, and
+#  segments are written into windows and onto disk without it
+def run_tap (tap, verbosity=0):
+
+    def deliver (segment, data, data_map):
+        with tap['lock']:
+            windows = list (tap['windows'])
+            # keeping segments for windows opened later
+            (list_write, list_remove) \
+                = ring_add (tap['ring'], segment, data, data_map, \
+                            segment.get ('time_end', time.time ()))
+        for window in windows:
+            if (write_window (window, segment, data, data_map)):
+                close_window (window)
+        ring_flush (list_write, list_remove)
+
+    def gap (sequence_from, sequence_to, duration):
+        with tap['lock']:
+            for window in tap['windows']:
+                add_gap (window['report'], sequence_from, sequence_to, \
+                         duration)
+
+    def running ():
+        time_now = time.monotonic ()
+        with tap['lock']:
+            list_expired = [window for window in tap['windows'] \
+                            if (time_now > window['deadline'])]
+            tap['windows'] = [window for window in tap['windows'] \
+                              if not ( (window['done'].is_set ()) \
+                                       or (window in list_expired) )]
+            if (len (tap['windows']) > 0):
+                tap['time_idle'] = time_now
+            idle = (tap['linger_sec'] >= 0.0) \
+                and (time_now - tap['time_idle'] > tap['linger_sec'])
+        for window in list_expired:
+            close_window (window)
+        return ( (not (tap['stop'].is_set ())) and (not idle) )
+
+    try:
+        follow (tap['url_master'], deliver, gap, running, tap['stats'], \
+                verbosity=verbosity)
+    finally:
+        with tap['lock']:
+            tap['stop'].set ()
+            windows = tap['windows']
+            tap['windows'] = []
+            list_remove = ring_clear (tap['ring'])
+        for window in windows:
+            close_window (window)
+        ring_flush ([], list_remove)
+
+# writing segments of ring buffer into recording window
+#  segments whose files are gone are counted as gaps. True is returned
+#  when the window is complete.
+def replay (window, entries, data_map):
+    for entry in entries:
+        data = ring_read (entry)
+        if (data is None):
+            add_gap (window['report'], entry['segment']['sequence'], \
+                     entry['segment']['sequence'], \
+                     entry['segment']['duration'])
+            continue
+        if (write_window (window, entry['segment'], data, data_map)):
+            return (True)
+    return (False)
+
+# opening recording window on live tap
+#  the window starts with the segments at the live edge, or, with
+#  time_from given in UNIX time, with the segments in ring buffer from
+#  that time on, so that a late start does not lose the beginning.
+#  The part not in ring buffer is counted as missed, and is not
+#  recorded past the end of the window. window['done'] is set when
+#  the window is complete. The window is locked while the ring buffer
+#  is written into it, so that live segments follow them in order.
+def add_window (tap, file_out, duration_sec, time_from=None):
+    window = new_window (file_out, duration_sec, tap['command_ffmpeg'])
+    with window['lock']:
+        with tap['lock']:
+            if (tap['stop'].is_set ()):
+                raise RuntimeError (f'tap of {tap["url_master"]} is closed')
+            ring = tap['ring']
+            if (time_from is None):
+                entries = [dict (entry) for entry \
+                           in list (ring['entries'])[-live_start_segments:]]
+            else:
+                time_now = time.time ()
+                entries  = ring_query (ring, time_from, time_now)
+                if (len (entries) > 0):
+                    missed = max (entries[0]['time_start'] - time_from, 0.0)
+                else:
+                    missed = max (time_now - time_from, 0.0)
+                window['report']['missed'] = missed
+                window['duration_sec']     = max (duration_sec - missed, 0.0)
+            data_map = ring['data_map']
+            tap['windows'].append (window)
+            tap['time_idle'] = time.monotonic ()
+        if (replay (window, entries, data_map)):
+            close_window (window)
+    return (window)
+
+# carving recording of given time span out of ring buffer of live tap
+#  the report of written segments is returned, with the length of the
+#  beginning not covered by the ring buffer as missed
+def carve (tap, file_out, time_from, time_to):
+    with tap['lock']:
+        ring     = tap['ring']
+        entries  = ring_query (ring, time_from, time_to)
+        data_map = ring['data_map']
+    window = new_window (file_out, time_to - time_from, tap['command_ffmpeg'])
+    report = window['report']
+    if (len (entries) == 0):
+        report['missed'] = time_to - time_from
+    else:
+        report['missed'] = max (entries[0]['time_start'] - time_from, 0.0)
+    last_sequence = None
+    for entry in entries:
+        segment = entry['segment']
+        if ( (last_sequence is not None) \
+             and (segment['sequence'] > last_sequence + 1) ):
+            add_gap (report, last_sequence + 1, segment['sequence'] - 1, \
+                     segment['duration'])
+        last_sequence = segment['sequence']
+        if (replay (window, [entry], data_map)):
+            break
+    close_window (window)
+    return (report)
+
+# stopping live tap, closing all the windows
+def close_tap (tap):
+    tap['stop'].set ()
+    tap['thread'].join ()
+
+# printing report of recording
+def print_report (report):
+    n_gaps      = len (report['gaps'])
+    gap_seconds = sum ([gap['duration'] for gap in report['gaps']])
+    print (f'# recorded {report["segments"]} segments,' \
+           + f' {report["duration"]:.1f} sec, {report["bytes"]} byte')
+    print (f'# {n_gaps} gaps ({gap_seconds:.1f} sec),' \
+           + f' {report["errors"]} errors, {report["reconnects"]} reconnects')
+    if (report['missed'] > 0.0):
+        print (f'# {report["missed"]:.1f} sec missed at the beginning')
+    if (report['unsupported']):
+        print (f'# segments cannot be stored as ADTS without ffmpeg')
+    for gap in report['gaps']:
+        print (f'#    gap: sequence {gap["sequence_from"]}' \
+               + f' - {gap["sequence_to"]} ({gap["duration"]:.1f} sec)')
@@ -0,0 +1,379 @@
+#
+# Time-stamp: <2026/10/18 23:41:19 (UT+08:00) daisuke>
+#
+
+######################################################################
+#                                                                    #
+# Radio program list                                                 #
+#                                                                    #
+#  ~/share/radio/radio_program_list.txt is parsed into recordings    #
+#  placed in minutes of the week, Monday 00:00 being zero, with      #
+#  the same margins as radio_list_crontab.pl.                        #
+#                                                                    #
+#  format of each line of the program list:                          #
+#                                                                    #
+#    1,2,3,4,5  05:00  06:00  r1  program_name                       #
+#                                                                    #
+#  day of week is 1 for Monday to 7 for Sunday.                      #
+#                                                                    #
+#  the list is compiled into recordings sorted by start, so that     #
+#  recordings of now, next and in a window are found by bisection.   #
+#  The parsed list is cached in memory and on disk, and it is parsed #
+#  again only when mtime or size of the program list changes.        #
+#                                                                    #
+######################################################################
+
+######################################################################
+
+#
+# Importing modules
+#
+
+# importing bisect module
+import bisect
+
+# importing datetime module
+import datetime
+
+# importing json module
+import json
+
+# importing os module
+import os
+
+# importing re module
+import re
+
+######################################################################
+
+#
+# Constants
+#
+
+# program list file
+default_file_program \
+    = f"{os.environ['HOME']}/share/radio/radio_program_list.txt"
+
+# margins in minute
+margin_pre  = 3
+margin_post = 3
+
+# minutes of a day and a week
+minutes_day  = 24 * 60
+minutes_week = 7 * minutes_day
+
+# cache of parsed program list on disk
+dir_cache  = f"{os.environ['HOME']}/share/radio/cache"
+file_cache = f'{dir_cache}/program_list.json'
+
+# cache of parsed program lists in memory, keyed by file name
+cache_programs = {}
+
+# day of week, 1 for Monday to 7 for Sunday
+num2wday = {
+    1: 'Mon',
+    2: 'Tue',
+    3: 'Wed',
+    4: 'Thu',
+    5: 'Fri',
+    6: 'Sat',
+    7: 'Sun',
+}
+
+# NHK channels, recorded live rather than by timefree
+list_channel_nhk = ['r1', 'r2', 'fm']
+
+# radiko channels of regions
+dic_region_channels = {
+    'kanto': ['FMT', 'FMJ', 'BAYFM78', 'YFM', 'INT', 'TBS', 'LFR', 'QRR', \
+              'RN1'],
+    'kansai': ['MBS', 'CCL', 'ALPHA-STATION', 'KISSFMKOBE', 'RN1'],
+    'ryukyu': ['FM_OKINAWA', 'ROK', 'RN1'],
+    'fukuoka': ['FMFUKUOKA', 'RN1'],
+    'kumamoto': ['FMK', 'RN1'],
+}
+
+# margin between reboot and next recording in minute, plus host number
+margin_restart = 3
+
+# pattern of host names with number, e.g. n3 or nb13
+pattern_host = re.compile (r'^(n|nb)(\d+)$')
+
+######################################################################
+
+#
+# Functions
+#
+
+# parsing a line of program list
+#  a list of programs is returned, one for each day of week
+def parse_line (line):
+    line = line.strip ()
+    if not ( (line[:1].isdigit ()) and (':' in line) ):
+        return ([])
+    fields = line.split ()
+    if (len (fields) < 5):
+        return ([])
+    (dayofweek, time_start, time_end, channel, program) = fields[:5]
+    (start_hh, start_mm) = [int (x) for x in time_start.split (':')]
+    (end_hh, end_mm)     = [int (x) for x in time_end.split (':')]
+    duration = (end_hh * 60 + end_mm) - (start_hh * 60 + start_mm)
+    if (duration < 0):
+        duration += minutes_day
+    programs = []
+    for wday in dayofweek.split (','):
+        if not (wday.isdigit ()):
+            continue
+        start = (int (wday) - 1) * minutes_day + start_hh * 60 + start_mm
+        programs.append ({
+            'start': start % minutes_week,
+            'duration': duration,
+            'channel': channel,
+            'program': program,
+            'hhmm': f'{start_hh:02d}{start_mm:02d}',
+            'time_start': f'{start_hh:02d}:{start_mm:02d}',
+        })
+    return (programs)
+
+# reading program list file
+def load_programs (file_program=default_file_program):
+    programs = []
+    with open (file_program, 'r') as fh:
+        for line in fh:
+            programs += parse_line (line)
+    return (programs)
+
+# recording of a program, with margins applied
+#  start is in minutes of the week, and may wrap around to the
+#  previous week, and duration is in minute
+def recording (entry, pre=margin_pre, post=margin_post):
+    rec = dict (entry)
+    rec['start']    = (entry['start'] - pre) % minutes_week
+    rec['duration'] = entry['duration'] + pre + post
+    return (rec)
+
+# list of recordings for given channels
+def recordings (programs, channels=[], pre=margin_pre, post=margin_post):
+    list_rec = []
+    for entry in programs:
+        if ( (len (channels) > 0) and (entry['channel'] not in channels) ):
+            continue
+        list_rec.append (recording (entry, pre, post))
+    return (list_rec)
+
+# minutes of the week of given date/time
+def week_minute (datetime_given):
+    minute = datetime_given.weekday () * minutes_day \
+        + datetime_given.hour * 60 + datetime_given.minute
+    return (minute)
+
+# date/time of next start of given minutes of the week
+#  a start at the current minute which has already begun is not
+#  returned, but the one of next week is
+def next_start (start, datetime_now):
+    datetime_base  = datetime_now.replace (second=0, microsecond=0)
+    delta          = (start - week_minute (datetime_base)) % minutes_week
+    datetime_start = datetime_base + datetime.timedelta (minutes=delta)
+    if (datetime_start < datetime_now):
+        datetime_start += datetime.timedelta (minutes=minutes_week)
+    return (datetime_start)
+
+# key of program list file for caches
+def file_key (file_program):
+    stat = os.stat (file_program)
+    return ([os.path.abspath (file_program), stat.st_mtime_ns, stat.st_size])
+
+# reading program list file through caches
+#  the list is parsed only when mtime or size of the file is changed
+#  since it was parsed last time, in this process or in another one
+def load_programs_cached (file_program=default_file_program):
+    key = file_key (file_program)
+    if ( (file_program in cache_programs) \
+         and (cache_programs[file_program]['key'] == key) ):
+        return (cache_programs[file_program]['programs'])
+    try:
+        with open (file_cache, 'r') as fh:
+            dic_cache = json.load (fh)
+        if (dic_cache['key'] == key):
+            cache_programs[file_program] = dic_cache
+            return (dic_cache['programs'])
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    programs  = load_programs (file_program)
+    dic_cache = {'key': key, 'programs': programs}
+    cache_programs[file_program] = dic_cache
+    try:
+        os.makedirs (dir_cache, exist_ok=True)
+        file_tmp = f'{file_cache}.{os.getpid ()}.tmp'
+        with open (file_tmp, 'w') as fh:
+            json.dump (dic_cache, fh)
+        os.replace (file_tmp, file_cache)
+    except OSError:
+        pass
+    return (programs)
+
+# compiling recordings for queries
+#  recordings are sorted by start, and the longest duration bounds the
+#  search of recordings which have begun before a given minute
+def compile_recordings (list_rec):
+    list_rec = sorted (list_rec, \
+                       key=lambda rec: (rec['start'], rec['channel'], \
+                                        rec['program']))
+    compiled = {
+        'recs': list_rec,
+        'starts': [rec['start'] for rec in list_rec],
+        'max_duration': max ([rec['duration'] for rec in list_rec] + [0]),
+    }
+    return (compiled)
+
+# compiled recordings of program list file for given channels
+#  channels starting with "-" are excluded instead
+def load_compiled (file_program=default_file_program, channels=[], \
+                   pre=margin_pre, post=margin_post):
+    programs = load_programs_cached (file_program)
+    excluded = [channel[1:] for channel in channels \
+                if (channel.startswith ('-'))]
+    included = [channel for channel in channels \
+                if not (channel.startswith ('-'))]
+    programs = [entry for entry in programs \
+                if (entry['channel'] not in excluded)]
+    return (compile_recordings (recordings (programs, included, pre, post)))
+
+# recordings starting in [minute_from, minute_to) of the week
+#  the range may go beyond the end of the week, and the start of each
+#  recording returned is shifted by a week in that case
+def starting_in (compiled, minute_from, minute_to):
+    list_rec = []
+    starts   = compiled['starts']
+    offset   = (minute_from // minutes_week) * minutes_week
+    while (offset < minute_to):
+        i_from = bisect.bisect_left (starts, minute_from - offset)
+        i_to   = bisect.bisect_left (starts, minute_to - offset)
+        for rec in compiled['recs'][i_from:i_to]:
+            rec = dict (rec)
+            rec['start'] += offset
+            list_rec.append (rec)
+        offset += minutes_week
+    return (list_rec)
+
+# recordings overlapping [minute_from, minute_to) of the week
+def in_window (compiled, minute_from, minute_to):
+    list_rec = starting_in (compiled, \
+                            minute_from - compiled['max_duration'], \
+                            minute_to)
+    return ([rec for rec in list_rec \
+             if (rec['start'] + rec['duration'] > minute_from)])
+
+# recordings in progress at given minute of the week
+def now (compiled, minute):
+    return (in_window (compiled, minute, minute + 1))
+
+# next n recordings starting at or after given minute of the week
+def next_recordings (compiled, minute, n=1):
+    n = min (n, len (compiled['recs']))
+    list_rec = []
+    minute_to = minute
+    while (len (list_rec) < n):
+        minute_from = minute_to
+        minute_to  += minutes_day
+        list_rec   += starting_in (compiled, minute_from, minute_to)
+    return (list_rec[:n])
+
+# day of week, hour and minute of given minute of the week
+#  day of week is 1 for Monday to 7 for Sunday
+def clock (minute):
+    minute = minute % minutes_week
+    return (minute // minutes_day + 1, (minute % minutes_day) // 60, \
+            minute % 60)
+
+# line of crontab running live recorder for a recording
+#  same format as radio_list_crontab.pl
+def crontab_line (rec, command):
+    (wday, hh, mm) = clock (rec['start'])
+    line = f'{mm:02d} {hh:02d} * * {wday:01d} {command:32s}' \
+        + f' -c {rec["channel"]:2s} -d {rec["duration"]:3d}' \
+        + f' -p {rec["program"]} -t {rec["time_start"]}'
+    return (line)
+
+# command of timefree recorder for a recording
+#  same format as radio_list_timefree.pl
+def timefree_command (rec, command):
+    (wday, start_hh, start_mm) = clock (rec['start'])
+    (wday_end, end_hh, end_mm) = clock (rec['start'] + rec['duration'])
+    line = f'{command} -v -c {rec["channel"]} -w {num2wday[wday]}' \
+        + f' -s {start_hh:02d}:{start_mm:02d} -e {end_hh:02d}:{end_mm:02d}' \
+        + f' -p {rec["program"]}'
+    return (line)
+
+# channels recorded live in given regions
+#  NHK channels are recorded live everywhere, and radiko channels of
+#  the regions only if asked, since they are usually fetched by timefree
+def region_channels (regions, radiko=False):
+    channels = list (list_channel_nhk)
+    for region in regions:
+        if (radiko):
+            channels += [channel for channel in dic_region_channels[region] \
+                         if (channel not in channels)]
+    return (channels)
+
+# busy intervals of recordings, merged and sorted
+#  each interval is [start, end) in minutes of the week, and a recording
+#  over the end of the week is split into two. The minute a recording
+#  ends is busy, as in radio_search_reboottime.pl, so that no reboot is
+#  placed at that minute.
+def busy_intervals (list_rec):
+    intervals = []
+    for rec in list_rec:
+        (start, end) = (rec['start'], rec['start'] + rec['duration'] + 1)
+        if (end - start >= minutes_week):
+            return ([[0, minutes_week]])
+        if (end > minutes_week):
+            intervals.append ([start, minutes_week])
+            intervals.append ([0, end - minutes_week])
+        else:
+            intervals.append ([start, end])
+    intervals.sort ()
+    merged = []
+    for (start, end) in intervals:
+        if ( (len (merged) > 0) and (start <= merged[-1][1]) ):
+            merged[-1][1] = max (merged[-1][1], end)
+        else:
+            merged.append ([start, end])
+    return (merged)
+
+# free gaps between busy intervals, going round the week
+#  a list of (start, length) in minutes is returned
+def free_gaps (intervals):
+    if (len (intervals) == 0):
+        return ([(0, minutes_week)])
+    gaps = []
+    for i in range (len (intervals)):
+        end_busy   = intervals[i][1]
+        start_next = intervals[(i + 1) % len (intervals)][0]
+        length     = (start_next - end_busy) % minutes_week
+        if (length > 0):
+            gaps.append ((end_busy % minutes_week, length))
+    return (gaps)
+
+# number of host given by its name, e.g. 3 for n3 and nb13
+#  0 for host names of other forms, same as radio_search_reboottime.pl
+def host_number (hostname):
+    match = pattern_host.match (hostname.split ('.')[0])
+    if not (match):
+        return (0)
+    if (match.group (1) == 'nb'):
+        return (int (match.group (2)) % 10)
+    return (int (match.group (2)))
+
+# minutes of the week to reboot, margin minutes before recordings
+#  a reboot is placed in every gap long enough for the margin and for
+#  min_gap, so that hosts with different margins do not reboot at once
+def reboot_minutes (intervals, margin=margin_restart, min_gap=0):
+    list_minute = []
+    if (len (intervals) == 0):
+        return (list_minute)
+    for (start, length) in free_gaps (intervals):
+        if (length < max (margin, min_gap)):
+            continue
+        list_minute.append ((start + length - margin) % minutes_week)
+    return (sorted (list_minute))
@@ -0,0 +1,220 @@
+#
+# Time-stamp: <2026/10/18 15:02:11 (UT+08:00) daisuke>
+#
+
+######################################################################
+#                                                                    #
+# Radiko authentication                                              #
+#                                                                    #
+#  auth1/auth2 handshake done in-process over one HTTPS connection.  #
+#  The obtained authtoken is cached on disk per area together with   #
+#  its expiry, so that a batch of recordings authenticates once.     #
+#                                                                    #
+######################################################################
+
+######################################################################
+
+#
+# Importing modules
+#
+
+# importing base64 module
+import base64
+
+# importing fcntl module
+import fcntl
+
+# importing json module
+import json
+
+# importing os module
+import os
+
+# importing pathlib module
+import pathlib
+
+# importing re module
+import re
+
+# importing time module
+import time
+
+# importing radio_http module
+import radio_http
+
+######################################################################
+
+#
+# Constants
+#
+
+# URL and paths
+url_radiko   = 'https://radiko.jp'
+path_player  = '/apps/js/playerCommon.js'
+path_auth1   = '/v2/api/auth1'
+path_auth2   = '/v2/api/auth2?radiko_session='
+
+# user agent name
+user_agent = radio_http.user_agent
+
+# cache of authtoken
+dir_cache  = f"{os.environ['HOME']}/share/radio/cache"
+file_cache = f'{dir_cache}/radiko_auth.json'
+file_lock  = f'{dir_cache}/radiko_auth.lock'
+
+# life time of authtoken in second
+token_lifetime = 3600
+
+# player = new RadikoJSPlayer($audio[0], 'pc_html5', 'bcd151073c03b352e1ef2fd66c32209da9ca0afa', {
+pattern_authkey \
+    = re.compile (r'player = new RadikoJSPlayer\(\S+,\s+\'(\S+)\',\s+\'(\S+)\',')
+
+######################################################################
+
+#
+# Functions
+#
+
+# fetching radiko JS player and extracting app name and authkey
+def fetch_authkey ():
+    headers = {'User-Agent': user_agent}
+    (status, body) = radio_http.get (url_radiko + path_player, headers)
+    if (status != 200):
+        raise RuntimeError (f'radiko player could not be downloaded! ' \
+                            + f'(HTTP {status})')
+    match_authkey = re.search (pattern_authkey, body.decode ('utf-8'))
+    if not (match_authkey):
+        raise RuntimeError (f'authkey could not be found in radiko player!')
+    radiko_app     = match_authkey.group (1)
+    radiko_authkey = match_authkey.group (2)
+    return (radiko_app, radiko_authkey)
+
+# headers common to auth1 and auth2
+def auth_headers (radiko_app):
+    headers = {
+        'User-Agent': user_agent,
+        'pragma': 'no-cache',
+        'X-Radiko-App': radiko_app,
+        'X-Radiko-App-Version': '0.0.1',
+        'X-Radiko-User': 'dummy_user',
+        'X-Radiko-Device': 'pc',
+    }
+    return (headers)
+
+# doing auth1 and auth2, and returning a new session
+def handshake (verbosity=0):
+    # radiko JS player
+    (radiko_app, radiko_authkey) = fetch_authkey ()
+    if (verbosity):
+        print (f'#  radiko_app     = {radiko_app}')
+        print (f'#  radiko_authkey = {radiko_authkey}')
+
+    # auth1
+    headers = auth_headers (radiko_app)
+    (status, headers_response, body) \
+        = radio_http.request ('GET', url_radiko + path_auth1, headers)
+    if (status != 200):
+        raise RuntimeError (f'auth1 failed! (HTTP {status})')
+    authtoken  = headers_response.get ('X-Radiko-AuthToken')
+    keylength  = int (headers_response.get ('X-Radiko-KeyLength'))
+    keyoffset  = int (headers_response.get ('X-Radiko-KeyOffset'))
+    request_id = headers_response.get ('x-request-id', '')
+    if (verbosity):
+        print (f'#  authtoken = {authtoken}')
+        print (f'#  keylength = {keylength}')
+        print (f'#  keyoffset = {keyoffset}')
+        print (f'#  requestid = {request_id}')
+
+    # partial key
+    partialkey = radiko_authkey.encode ('utf-8')[keyoffset:keyoffset+keylength]
+    partialkey_value = base64.b64encode (partialkey).decode ('utf-8')
+    if (verbosity):
+        print (f'#  partial key = {partialkey_value}')
+
+    # auth2
+    headers['X-Radiko-AuthToken']  = authtoken
+    headers['X-Radiko-PartialKey'] = partialkey_value
+    (status, body) = radio_http.get (url_radiko + path_auth2, headers)
+    if (status != 200):
+        raise RuntimeError (f'auth2 failed! (HTTP {status})')
+
+    # auth2 returns area, e.g. "JP13,東京都,tokyo Japan"
+    list_area = body.decode ('utf-8').strip ().split (',')
+    area      = list_area[0]
+    if (verbosity):
+        print (f'#  area = {area}')
+
+    session = {
+        'area': area,
+        'authtoken': authtoken,
+        'request_id': request_id,
+        'expires': time.time () + token_lifetime,
+    }
+    return (session)
+
+# reading cache file
+def read_cache ():
+    path_cache = pathlib.Path (file_cache)
+    if not (path_cache.exists ()):
+        return ({'last_area': '', 'sessions': {}})
+    try:
+        with open (file_cache, 'r') as fh:
+            cache = json.load (fh)
+    except (OSError, ValueError):
+        cache = {'last_area': '', 'sessions': {}}
+    return (cache)
+
+# writing cache file atomically
+def write_cache (cache):
+    file_tmp = f'{file_cache}.{os.getpid ()}'
+    with open (file_tmp, 'w') as fh:
+        json.dump (cache, fh, indent=1)
+    os.replace (file_tmp, file_cache)
+
+# finding a valid session in cache
+def lookup (cache, area=''):
+    if not (area):
+        area = cache['last_area']
+    if (area in cache['sessions']):
+        session = cache['sessions'][area]
+        # a token expiring within a minute is not used
+        if (session['expires'] > time.time () + 60):
+            return (session)
+    return (None)
+
+# returning an authenticated session, using cached one if possible
+def authenticate (area='', force=False, verbosity=0):
+    # making directory if not exist
+    path_cache = pathlib.Path (dir_cache)
+    if not (path_cache.exists ()):
+        path_cache.mkdir (parents=True, exist_ok=True)
+
+    # jobs started at the same time wait for the first one to finish
+    with open (file_lock, 'w') as fh_lock:
+        fcntl.flock (fh_lock, fcntl.LOCK_EX)
+        cache = read_cache ()
+        if not (force):
+            session = lookup (cache, area)
+            if (session):
+                if (verbosity):
+                    print (f'#  using cached authtoken for {session["area"]}')
+                return (session)
+        session = handshake (verbosity=verbosity)
+        cache['last_area'] = session['area']
+        cache['sessions'][session['area']] = session
+        write_cache (cache)
+    return (session)
+
+# discarding cached session, e.g. after the token is refused
+def invalidate (area=''):
+    path_cache = pathlib.Path (dir_cache)
+    if not (path_cache.exists ()):
+        return
+    with open (file_lock, 'w') as fh_lock:
+        fcntl.flock (fh_lock, fcntl.LOCK_EX)
+        cache = read_cache ()
+        if not (area):
+            area = cache['last_area']
+        if (area in cache['sessions']):
+            del cache['sessions'][area]
+            write_cache (cache)
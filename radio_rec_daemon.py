@@ -0,0 +1,404 @@
+#!/usr/pkg/bin/python3.12
+
+#
+# Time-stamp: <2026/10/18 23:20:44 (UT+08:00) daisuke>
+#
+
+#
+# NHK radio recording daemon
+#
+#  the program list is read once and re-read when it is modified, and
+#  every recording is armed a few seconds before its start using the
+#  monotonic clock. From arming time on, the media playlist is resolved
+#  and segments at the live edge are buffered, so that recording starts
+#  at the exact second without cold-start latency, and all the channels
+#  are recorded concurrently in one process. Each channel is followed
+#  by one live tap, and programs on the same channel, back-to-back or
+#  overlapping with margins, are cut from the segments fetched once.
+#  Recent segments are kept in a ring buffer bounded in memory and on
+#  disk, so a late start still gets the beginning of the program.
+#
+# usage:
+#
+#    running daemon for all NHK channels
+#    % radio_rec_daemon.py -v
+#
+#    running daemon only for fm, arming recordings 15 sec early
+#    % radio_rec_daemon.py -c fm -a 15
+#
+#    keeping last 256 MiB of each channel on disk all the time
+#    % radio_rec_daemon.py -A -R ~/share/radio/cache/ring -D 256
+#
+
+###########################################################################
+
+#
+# importing modules
+#
+
+# importing argparse module
+import argparse
+
+# importing datetime module
+import datetime
+
+# importing os module
+import os
+
+# importing pathlib module
+import pathlib
+
+# importing signal module
+import signal
+
+# importing sys module
+import sys
+
+# importing threading module
+import threading
+
+# importing time module
+import time
+
+# importing radio_hls module
+import radio_hls
+
+# importing radio_metrics module
+import radio_metrics
+
+# importing radio_nhk_live module
+import radio_nhk_live
+
+# importing radio_program_list module
+import radio_program_list
+
+###########################################################################
+
+###########################################################################
+
+#
+# command-line arguments analysis using argparse
+#
+
+# environmental variables
+dir_home = os.environ['HOME']
+
+# default parameters
+default_file_program = radio_program_list.default_file_program
+help_file_program    = f'program list file (default: {default_file_program})'
+
+default_channels = ','.join (radio_nhk_live.list_channel)
+help_channels \
+    = f'comma separated list of channels (default: {default_channels})'
+
+default_dir_radio = f'{dir_home}/audio/radio'
+help_dir_radio \
+    = f'directory to store recorded file (default: {default_dir_radio})'
+
+default_ffmpeg = '/usr/pkg/bin/ffmpeg6'
+help_ffmpeg    = f'location of ffmpeg command (default: {default_ffmpeg})'
+
+default_arm = 30.0
+help_arm \
+    = f'seconds to arm recording before its start (default: {default_arm})'
+
+default_horizon = 10
+help_horizon \
+    = f'minutes ahead to schedule recordings (default: {default_horizon})'
+
+default_interval = 30.0
+help_interval \
+    = f'interval of checking program list (default: {default_interval} sec)'
+
+default_ring_dir = ''
+help_ring_dir \
+    = f'directory to keep ring buffer of live taps on disk (default: none)'
+
+default_ring_memory = 4
+help_ring_memory \
+    = f'size of ring buffer of each channel in memory' \
+    + f' (default: {default_ring_memory} MiB)'
+
+default_ring_disk = 0
+help_ring_disk \
+    = f'size of ring buffer of each channel on disk' \
+    + f' (default: {default_ring_disk} MiB)'
+
+help_always_on \
+    = f'keeping live taps of all the channels open, so that recent audio' \
+    + f' is always in ring buffer'
+
+default_verbose = 0
+help_verbose    = f'verbosity level (default: {default_verbose})'
+
+# construction of parser object
+desc = 'NHK radio recording daemon'
+parser = argparse.ArgumentParser (description=desc)
+
+# adding arguments
+parser.add_argument ('-l', '--program-list', default=default_file_program, \
+                     help=help_file_program)
+parser.add_argument ('-c', '--channels', default=default_channels, \
+                     help=help_channels)
+parser.add_argument ('-r', '--radio-dir', default=default_dir_radio, \
+                     help=help_dir_radio)
+parser.add_argument ('-f', '--ffmpeg', default=default_ffmpeg, \
+                     help=help_ffmpeg)
+parser.add_argument ('-a', '--arm', type=float, default=default_arm, \
+                     help=help_arm)
+parser.add_argument ('-H', '--horizon', type=int, default=default_horizon, \
+                     help=help_horizon)
+parser.add_argument ('-i', '--interval', type=float, \
+                     default=default_interval, help=help_interval)
+parser.add_argument ('-R', '--ring-dir', default=default_ring_dir, \
+                     help=help_ring_dir)
+parser.add_argument ('-M', '--ring-memory', type=float, \
+                     default=default_ring_memory, help=help_ring_memory)
+parser.add_argument ('-D', '--ring-disk', type=float, \
+                     default=default_ring_disk, help=help_ring_disk)
+parser.add_argument ('-A', '--always-on', action='store_true', \
+                     help=help_always_on)
+parser.add_argument ('-v', '--verbose', action='count', \
+                     default=default_verbose, help=help_verbose)
+
+# command-line argument analysis
+args = parser.parse_args ()
+
+# parameters
+file_program   = args.program_list
+list_channels  = args.channels.split (',')
+dir_radio      = args.radio_dir
+command_ffmpeg = args.ffmpeg
+arm_sec        = max (args.arm, 0.0)
+horizon_min    = max (args.horizon, 1)
+interval_sec   = max (args.interval, 1.0)
+dir_ring       = args.ring_dir
+ring_memory    = int (max (args.ring_memory, 0.0) * 1024 * 1024)
+ring_disk      = int (max (args.ring_disk, 0.0) * 1024 * 1024)
+always_on      = args.always_on
+verbosity      = args.verbose
+
+###########################################################################
+
+###########################################################################
+
+#
+# files and directories
+#
+
+# check of channels
+for channel in list_channels:
+    if not (channel in radio_nhk_live.dic_m3u8):
+        print (f'Unknown channel "{channel}"!')
+        print (f'Choose from {default_channels}.')
+        sys.exit ()
+
+# existence check of commands
+#  ffmpeg is only a fallback for segments which cannot be remuxed
+#  in-process
+if not (pathlib.Path (command_ffmpeg).exists ()):
+    print (f'# {command_ffmpeg} not found, recording without ffmpeg')
+    command_ffmpeg = ''
+
+# existence check of program list
+if not (pathlib.Path (file_program).exists ()):
+    print (f'The file "{file_program}" does not exist!')
+    sys.exit ()
+
+# existence check of directories
+list_dir = [dir_radio]
+for directory in list_dir:
+    # making pathlib object
+    path_dir = pathlib.Path (directory)
+    # if directory does not exist
+    if not (path_dir.exists ()):
+        # making directory
+        path_dir.mkdir (parents=True, exist_ok=True)
+
+###########################################################################
+
+###########################################################################
+
+#
+# functions
+#
+
+# event to stop waiting recordings
+event_stop = threading.Event ()
+
+# lock for printing
+lock_print = threading.Lock ()
+
+# printing message with date/time
+def log (message):
+    datetime_str = datetime.datetime.now ().strftime ('%Y/%m/%d %H:%M:%S')
+    with lock_print:
+        print (f'# {datetime_str} {message}', flush=True)
+
+# waiting until given value of monotonic clock
+#  False is returned if the daemon is stopping
+def wait_until (time_target):
+    while (time.monotonic () < time_target):
+        if (event_stop.wait (time_target - time.monotonic ())):
+            return (False)
+    return (True)
+
+# live taps of channels
+dic_tap  = {}
+lock_tap = threading.Lock ()
+
+# returning live tap of given channel, opening it if not running
+def channel_tap (channel):
+    with lock_tap:
+        tap = dic_tap.get (channel)
+        if ( (tap is None) or (tap['stop'].is_set ()) ):
+            if (always_on):
+                linger_sec = -1.0
+            else:
+                linger_sec = radio_nhk_live.tap_linger_sec
+            if (dir_ring != ''):
+                dir_ring_channel = f'{dir_ring}/{channel}'
+            else:
+                dir_ring_channel = ''
+            url_master = radio_nhk_live.dic_m3u8[channel]
+            tap = radio_nhk_live.open_tap (url_master, \
+                                           command_ffmpeg=command_ffmpeg, \
+                                           linger_sec=linger_sec, \
+                                           dir_ring=dir_ring_channel, \
+                                           max_memory=ring_memory, \
+                                           max_disk=ring_disk, \
+                                           verbosity=verbosity)
+            dic_tap[channel] = tap
+            if (verbosity):
+                log (f'tap opened: {channel}')
+    return (tap)
+
+# recording a program, run in its own thread
+#  the program is cut from the live tap of its channel, so that the
+#  channel is downloaded only once for overlapping programs, and a
+#  late start takes the beginning from the ring buffer of the tap
+def record_job (job):
+    # arming: the tap resolves media playlist, opens connection, and
+    # buffers segments at the live edge until start
+    if not (wait_until (job['time_start'] - arm_sec)):
+        return
+    job_metrics = radio_metrics.new_job ('nhk_daemon', job['name'], \
+                                         channel=job['channel'], \
+                                         duration_sec=job['duration'])
+    radio_metrics.start_phase (job_metrics, 'arm')
+    channel_tap (job['channel'])
+    if (verbosity):
+        log (f'armed: {job["name"]}')
+
+    # recording from the exact second of start
+    radio_metrics.start_phase (job_metrics, 'wait')
+    if not (wait_until (job['time_start'])):
+        radio_metrics.finish (job_metrics, 'stopped')
+        return
+    radio_metrics.start_phase (job_metrics, 'record')
+    log (f'start: {job["name"]} ({job["channel"]}, {job["duration"]} sec)')
+    file_aac_tmp = radio_hls.partial_file (job['file_aac'])
+    try:
+        window = radio_nhk_live.add_window (channel_tap (job['channel']), \
+                                            file_aac_tmp, job['duration'], \
+                                            time_from=job['wall_start'])
+    except RuntimeError:
+        # tap stopped just now, opening it again
+        window = radio_nhk_live.add_window (channel_tap (job['channel']), \
+                                            file_aac_tmp, job['duration'], \
+                                            time_from=job['wall_start'])
+    window['done'].wait ()
+    report = window['report']
+    radio_metrics.add (job_metrics, bytes=report['bytes'], \
+                       segments=report['segments'], retries=report['errors'], \
+                       gaps=len (report['gaps']), missed=report['missed'])
+    radio_metrics.start_phase (job_metrics, 'finalise')
+    radio_hls.finalise (file_aac_tmp, job['file_aac'])
+    radio_metrics.finish (job_metrics)
+    log (f'end: {job["name"]} ({report["duration"]:.1f} sec,' \
+         + f' {len (report["gaps"])} gaps, {report["segments"]} segments,' \
+         + f' {report["missed"]:.1f} sec missed)')
+
+# scheduling recordings starting within horizon
+#  recordings already in progress, for example when the daemon is
+#  restarted, are started at once. Keys of scheduled recordings are
+#  kept in given dictionary.
+def schedule (compiled, scheduled):
+    datetime_now = datetime.datetime.now ()
+    time_now     = time.monotonic ()
+    minute_now   = radio_program_list.week_minute (datetime_now)
+    list_rec     = radio_program_list.in_window (compiled, minute_now, \
+                                                 minute_now + horizon_min + 1)
+    for rec in list_rec:
+        datetime_start = radio_program_list.next_start (rec['start'], \
+                                                        datetime_now)
+        datetime_prev  = datetime_start - datetime.timedelta (days=7)
+        if ( (datetime_now - datetime_prev).total_seconds () \
+             < rec['duration'] * 60 ):
+            datetime_start = datetime_prev
+        delay = (datetime_start - datetime_now).total_seconds ()
+        if (delay > horizon_min * 60):
+            continue
+        date_str = datetime_start.strftime ('%Y%m%d')
+        name     = f'{rec["program"]}_{date_str}_{rec["hhmm"]}'
+        key      = (name, rec['channel'])
+        if (key in scheduled):
+            continue
+        job = {
+            'name': name,
+            'channel': rec['channel'],
+            'duration': rec['duration'] * 60,
+            'file_aac': f'{dir_radio}/{name}.aac',
+            'time_start': time_now + delay,
+            'wall_start': datetime_start.timestamp (),
+        }
+        scheduled[key] = job['time_start']
+        thread = threading.Thread (target=record_job, args=(job,), name=name)
+        thread.start ()
+        if (verbosity):
+            log (f'scheduled: {name} in {delay:.0f} sec')
+
+###########################################################################
+
+###########################################################################
+
+#
+# main loop
+#
+
+# SIGTERM is handled in the same way as SIGINT
+signal.signal (signal.SIGTERM, signal.default_int_handler)
+
+# opening live taps of all the channels
+if (always_on):
+    for channel in list_channels:
+        channel_tap (channel)
+
+key_compiled = None
+compiled     = None
+scheduled    = {}
+log (f'started, channels: {",".join (list_channels)}')
+try:
+    while True:
+        # re-compiling program list when modified
+        key = radio_program_list.file_key (file_program)
+        if (key != key_compiled):
+            compiled = radio_program_list.load_compiled (file_program, \
+                                                         list_channels)
+            key_compiled = key
+            log (f'{len (compiled["recs"])} recordings read' \
+                 + f' from {file_program}')
+
+        # scheduling recordings
+        schedule (compiled, scheduled)
+
+        # forgetting recordings started long ago
+        time_now = time.monotonic ()
+        for key in list (scheduled.keys ()):
+            if (scheduled[key] < time_now - 86400):
+                del scheduled[key]
+
+        time.sleep (interval_sec)
+except KeyboardInterrupt:
+    log (f'stopping, recordings in progress are finished')
+    event_stop.set ()
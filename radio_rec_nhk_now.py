@@ -1,7 +1,7 @@
 #!/usr/pkg/bin/python3.12
 
 #
-# Time-stamp: <2024/08/16 21:28:09 (UT+8) daisuke>
+# Time-stamp: <2026/10/18 18:31:44 (UT+08:00) daisuke>
 #
 
 #
@@ -18,13 +18,13 @@
 #    recording NHK R1 for 60 min with verbose mode
 #    % radio_rec_nhk_now.py -v -c r1 -p nhknews -t 60
 #
+#    recording with single ffmpeg capture as before
+#    % radio_rec_nhk_now.py -k -c fm -p test -d 10
+#
 
 # importing argparse module
 import argparse
 
-# importing time module
-import time
-
 # importing datetime module
 import datetime
 
@@ -40,12 +40,21 @@ import pathlib
 # importing subprocess module
 import subprocess
 
-# importing shutil module
-import shutil
-
 # importing re module
 import re
 
+# importing json module
+import json
+
+# importing radio_hls module
+import radio_hls
+
+# importing radio_metrics module
+import radio_metrics
+
+# importing radio_nhk_live module
+import radio_nhk_live
+
 # date/time
 datetime_now = datetime.datetime.now ()
 YYYY         = datetime_now.year
@@ -60,35 +69,16 @@ date_str     = "%04d%02d%02d" % (YYYY, MM, DD)
 # environmental variables
 dir_home = os.environ['HOME']
 
-# process ID
-pid = os.getpid ()
-
-#
-# m3u8 addresses can be found at following web page.
-#
-#  https://www.nhk.or.jp/radio/config/config_web.xml
-#
-
 # list of m3u8 URLs
-dic_m3u8 = {
-    'r1':
-    'https://radio-stream.nhk.jp/hls/live/2023229/nhkradiruakr1/master.m3u8',
-    'r2':
-    'https://radio-stream.nhk.jp/hls/live/2023501/nhkradiruakr2/master.m3u8',
-    'fm':
-    'https://radio-stream.nhk.jp/hls/live/2023507/nhkradiruakfm/master.m3u8',
-}
+dic_m3u8 = radio_nhk_live.dic_m3u8
 
 # default parameters
-list_channel      = ['r1', 'r2', 'fm']
+list_channel      = radio_nhk_live.list_channel
 channel_default   = 'fm'
 channel_help      = "choice of channel (default: %s)" % channel_default
 dir_radio_default = "%s/audio/radio" % dir_home
 dir_radio_help    = "directory to store recorded file (default: %s)" \
     % dir_radio_default
-dir_tmp_default   = "/tmp/radio_%s_%s" % (datetime_str, pid)
-dir_tmp_help      = "directory to store temporary file (default: %s)" \
-    % dir_tmp_default
 ffmpeg_default    = '/usr/pkg/bin/ffmpeg6'
 ffmpeg_help       = "location of ffmpeg command (default: %s)" % ffmpeg_default
 program_default   = 'test'
@@ -98,9 +88,10 @@ duration_help     = "time duration of recording in minute (default: %d)" \
     % duration_default
 verbose_default   = 0
 verbose_help      = "verbosity level (default: %d)" % verbose_default
-sleep_default     = 3
-sleep_help        = "sleep time after fetching stream data (default: %d sec)" \
-    % sleep_default
+
+capture_help  = "capturing stream by single ffmpeg command instead of" \
+    + " following the playlist"
+gap_help      = "file to write report of gaps in JSON format"
 
 start_default = '00:00'
 start_help    = "start time of program in hh:mm format (default: %s)" \
@@ -117,16 +108,15 @@ parser.add_argument ('-p', '--program', default=program_default, \
                      help=program_help)
 parser.add_argument ('-d', '--duration', type=int, default=duration_default, \
                      help=duration_help)
-parser.add_argument ('-s', '--sleep', type=int, default=sleep_default, \
-                     help=sleep_help)
 parser.add_argument ('-r', '--radio-directory', default=dir_radio_default, \
                      help=dir_radio_help)
-parser.add_argument ('-w', '--temporary-directory', default=dir_tmp_default, \
-                     help=dir_tmp_help)
 parser.add_argument ('-f', '--ffmpeg', default=ffmpeg_default, \
                      help=ffmpeg_help)
 parser.add_argument ('-t', '--hhmm', default=start_default, \
                      help=start_help)
+parser.add_argument ('-k', '--ffmpeg-capture', action='store_true', \
+                     help=capture_help)
+parser.add_argument ('-g', '--gap-report', default='', help=gap_help)
 parser.add_argument ('-v', '--verbose', action='count', \
                      default=verbose_default, help=verbose_help)
 
@@ -137,12 +127,12 @@ args = parser.parse_args ()
 channel        = args.channel
 program_name   = args.program
 duration_min   = args.duration
-sleep_sec      = args.sleep
 dir_radio      = args.radio_directory
-dir_tmp        = args.temporary_directory
 command_ffmpeg = args.ffmpeg
 start_hhmm     = args.hhmm
 verbosity      = args.verbose
+ffmpeg_capture = args.ffmpeg_capture
+file_gap       = args.gap_report
 
 # time duration in second
 duration_sec = duration_min * 60
@@ -167,8 +157,7 @@ else:
 # file names
 basename     = "%s_%s_%s" % (program_name, date_str, hhmm_str)
 file_aac     = "%s/%s.aac" % (dir_radio, basename)
-file_m4a_tmp = "%s/%s_tmp.m4a" % (dir_tmp, basename)
-file_aac_tmp = "%s/%s_tmp.aac" % (dir_tmp, basename)
+file_aac_tmp = radio_hls.partial_file (file_aac)
 
 # printing input parameters
 if (verbosity):
@@ -178,16 +167,20 @@ if (verbosity):
     print (f'#    program name:    {program_name}')
     print (f'#    time duration:   {duration_min} min')
     print (f'#    time duration:   {duration_sec} sec')
-    print (f'#    sleep time       {sleep_sec} sec')
     print (f'#    radio directory: {dir_radio}')
-    print (f'#    temp directory:  {dir_tmp}')
     print (f'#    ffmpeg command:  {command_ffmpeg}')
-    print (f'#    tmp m4a file:    {file_m4a_tmp}')
+    print (f'#    ffmpeg capture:  {ffmpeg_capture}')
     print (f'#    tmp aac file:    {file_aac_tmp}')
     print (f'#    output aac file: {file_aac}')
 
 # existence check of commands
-list_commands = [command_ffmpeg]
+#  ffmpeg is only a fallback for segments which cannot be remuxed
+#  in-process, unless capturing by ffmpeg is requested
+if not ( (ffmpeg_capture) or (pathlib.Path (command_ffmpeg).exists ()) ):
+    if (verbosity):
+        print (f'#  {command_ffmpeg} not found, recording without ffmpeg')
+    command_ffmpeg = ''
+list_commands = [command for command in [command_ffmpeg] if (command != '')]
 for command in list_commands:
     # making a pathlib object
     path_command = pathlib.Path (command)
@@ -208,7 +201,7 @@ if (duration_min <= 0):
     sys.exit ()
 
 # existence check of directories
-list_dir = [dir_radio, dir_tmp]
+list_dir = [dir_radio]
 for directory in list_dir:
     # making pathlib object
     path_dir = pathlib.Path (directory)
@@ -223,52 +216,56 @@ for directory in list_dir:
         if (verbosity):
             print (f'# finished making directory "{directory}"!')
 
-# command to fetch radio stream data
-command_fetch = "%s -http_seekable 0 -i %s -vn -bsf:a aac_adtstoasc -acodec copy -t %ds %s" \
-    % (command_ffmpeg, url_m3u8, duration_sec, file_m4a_tmp)
-
-# printing command
-if (verbosity):
-    print (f'# command for fetching radio stream data')
-    print (f'#    {command_fetch}')
-
-# executing fetch command
-subprocess.run (command_fetch, shell=True)
+# metrics of this recording, recorded even if the script stops on error
+job_metrics = radio_metrics.new_job ('nhk_live', basename, channel=channel, \
+                                     duration_sec=duration_sec, \
+                                     ffmpeg_capture=ffmpeg_capture)
+radio_metrics.finish_at_exit (job_metrics)
 
-# sleeping a short time after fetching stream data
-time.sleep (sleep_sec)
+if (ffmpeg_capture):
+    # command to fetch radio stream data directly into ADTS
+    command_fetch = "%s -nostdin -loglevel error -y -http_seekable 0 -i %s -vn -acodec copy -t %ds -f adts %s" \
+        % (command_ffmpeg, url_m3u8, duration_sec, file_aac_tmp)
 
-# existence check of fetched audio file
-path_m4a_tmp = pathlib.Path (file_m4a_tmp)
-if not (path_m4a_tmp.exists ()):
-    # printing message
-    print (f'The file "{file_m4a_tmp}" does not exist!')
-    print (f'Something is wrong with fetching stream data.')
-    print (f'Exiting...')
-    # exit
-    sys.exit ()
-
-# command to convert audio file into AAC format
-command_convert = "%s -y -i %s -acodec copy %s" \
-    % (command_ffmpeg, file_m4a_tmp, file_aac_tmp)
-
-# printing command
-if (verbosity):
-    print (f'# command for converting audio file format')
-    print (f'#    {command_convert}')
-
-# executing convert command
-subprocess.run (command_convert, shell=True)
+    # printing command
+    if (verbosity):
+        print (f'# command for fetching radio stream data')
+        print (f'#    {command_fetch}')
 
-# sleeping a short time after fetching stream data
-time.sleep (sleep_sec)
+    # executing fetch command
+    radio_metrics.start_phase (job_metrics, 'ffmpeg')
+    subprocess.run (command_fetch, shell=True)
+else:
+    # following media playlist, segments are remuxed into ADTS on the fly
+    if (verbosity):
+        print (f'# following media playlist of {url_m3u8}')
+    # pre-roll: resolving variant and buffering segments at live edge
+    radio_metrics.start_phase (job_metrics, 'preroll')
+    try:
+        preroll = radio_nhk_live.prepare (url_m3u8, verbosity=verbosity)
+    except (OSError, RuntimeError, ValueError) as error:
+        print (f'# pre-roll failed: {error}')
+        preroll = None
+    radio_metrics.start_phase (job_metrics, 'record')
+    report = radio_nhk_live.record (url_m3u8, file_aac_tmp, duration_sec, \
+                                    command_ffmpeg=command_ffmpeg, \
+                                    preroll=preroll, verbosity=verbosity)
+    radio_metrics.add (job_metrics, segments=report['segments'], \
+                       retries=report['errors'], gaps=len (report['gaps']), \
+                       reconnects=report['reconnects'])
+
+    # printing report of gaps
+    radio_nhk_live.print_report (report)
+    if (file_gap != ''):
+        with open (file_gap, 'w') as fh_gap:
+            json.dump (report, fh_gap, indent=2)
 
 # existence check of fetched audio file
 path_aac_tmp = pathlib.Path (file_aac_tmp)
 if not (path_aac_tmp.exists ()):
     # printing message
     print (f'The file "{file_aac_tmp}" does not exist!')
-    print (f'Something is wrong with converting data.')
+    print (f'Something is wrong with fetching stream data.')
     print (f'Exiting...')
     # exit
     sys.exit ()
@@ -288,22 +285,17 @@ if (verbosity):
     print (f'# file sizes')
     print (f'#    {file_aac_tmp}: {filesize_aac_tmp} byte')
     print (f'#    {file_aac}: {filesize_aac} byte')
-    
-# copying AAC file
-if ( (path_aac.exists ()) and (filesize_aac >= filesize_aac_tmp) ):
-    # if file exists and larger than new file, then not copying file
+
+# renaming partial file into final name
+#  an existing file which is not smaller than the new one is kept
+radio_metrics.add (job_metrics, bytes=filesize_aac_tmp)
+radio_metrics.start_phase (job_metrics, 'finalise')
+if not (radio_hls.finalise (file_aac_tmp, file_aac)):
     if (verbosity):
-        print (f'# file "{file_aac_tmp}" is not copied to "{dir_radio}"')
-else:
-    # copying file
-    shutil.copy2 (file_aac_tmp, file_aac)
-
-# deleting AAC files
-list_aac_files = path_dir.glob ('*.aac')
-for path_aac_files_for_delete in list_aac_files:
-    if (path_aac_files_for_delete.exists ()):
-        path_aac_files_for_delete.unlink ()
-    
+        print (f'# file "{file_aac_tmp}" is not renamed to "{file_aac}"')
+
 # printing status
+record_metrics = radio_metrics.finish (job_metrics)
 if (verbosity):
+    radio_metrics.print_record (record_metrics)
     print (f'# finished recording radio program!')
@@ -1,7 +1,7 @@
 #!/usr/pkg/bin/python3.12
 
 #
-# Time-stamp: <2025/08/19 21:48:38 (UT+08:00) daisuke>
+# Time-stamp: <2026/10/19 12:23:40 (UT+08:00) daisuke>
 #
 
 ###########################################################################
@@ -25,32 +25,20 @@ import pathlib
 # importing datetime module
 import datetime
 
-# importing ssl module
-import ssl
-
-# importing urllib module
-import urllib.request
-
-# importing json module
-import json
-
-# importing re module
-import re
-
-# importing subprocess module
-import subprocess
-
 # importing random module
 import random
 
 # importing time module
 import time
 
-# importing shutil module
-import shutil
+# importing radio_nhk module
+import radio_nhk
 
-# setting for SSL
-ssl._create_default_https_context = ssl._create_unverified_context
+# importing radio_nhk_index module
+import radio_nhk_index
+
+# importing radio_http_cache module
+import radio_http_cache
 
 ###########################################################################
 
@@ -60,47 +48,6 @@ ssl._create_default_https_context = ssl._create_unverified_context
 # come constants and parameters
 #
 
-# URL of JSON file
-url_json_nhk \
-    = 'https://www.nhk.or.jp/radio-api/app/v1/web/ondemand/corners/new_arrivals'
-
-# program names
-dic_programs = {
-    'adventure': '青春アドベンチャー',
-    'announcer100yr': 'アナウンサー百年百話',
-    'asianview': 'Asian View',
-    'broadcast100yr': '放送100年 保阪正康が語る昭和人物史',
-    'culture_art': 'カルチャーラジオ　芸術その魅力',
-    'culture_chinese': 'カルチャーラジオ　漢詩をよむ',
-    'culture_history': 'カルチャーラジオ　歴史再発見',
-    'culture_literature': 'カルチャーラジオ　文学の世界',
-    'culture_science': 'カルチャーラジオ　科学と人間',
-    'culture_showa': 'カルチャーラジオ　保阪正康が語る昭和人物史',
-    'culture_sunday': 'カルチャーラジオ　日曜カルチャー',
-    'earthradio': 'ちきゅうラジオ',
-    'fmcinemasounds': 'ＦＭシネマサウンズ',
-    'gendaieigo': 'ニュースで学ぶ「現代英語」',
-    'genichiro': '高橋源一郎の飛ぶ教室',
-    'hoshizora': 'MISIA 星空のラジオ ～Sunday Sunset～',
-    'jikutabi': '音で訪ねる　ニッポン時空旅',
-    'kotenkyoshitsu': 'おしゃべりな古典教室',
-    'ohanashi': 'お話でてこい',
-    'oretachi': '弘兼憲史の“俺たちはどう生きるか”',
-    'oto': '音の風景',
-    'learnjapanese': 'Ｌｅａｒｎ　Ｊａｐａｎｅｓｅ　ｆｒｏｍ　ｔｈｅ　Ｎｅｗｓ',
-    'meisakuza': '新日曜名作座',
-    'nemurenai': '眠れない貴女へ',
-    'nhkjournal': 'NHKジャーナル',
-    'nhknewswebeasy': 'NHKやさしいことばニュース',
-    'roudoku': '朗読',
-    'roudokuworld': '朗読の世界',
-    'sensonomukogawa': '高橋源一郎と読む「戦争の向こう側」',
-    'senzennonihon': 'ラジオテキストが教えてくれる戦前の日本',
-    'theatre': 'ＦＭシアター',
-    'weekendsunshine': 'ウィークエンドサンシャイン',
-    'yamacafe': '石丸謙二郎の山カフェ',
-}
-
 # environmental variables
 dir_home = os.environ['HOME']
 
@@ -136,13 +83,11 @@ datetime_str = f'{date_str}_{time_str}'
 #
 
 # default parameters
-choices_programs = list (dic_programs.keys ())
+choices_programs = list (radio_nhk.dic_programs.keys ())
 default_programs = 'adventure'
 help_programs    = f'program names (default: {default_programs})'
 
-default_useragent \
-    = 'Mozilla/5.0 (X11; NetBSD amd64; rv:109.0) Gecko/20100101 Firefox/115.0'
-#    = 'Mozilla/5.0 (X11; NetBSD amd64; rv:96.0) Gecko/20100101 Firefox/96.0'
+default_useragent = radio_nhk.user_agent
 help_useragent \
     = f'user agent for HTTP retrieval (default: {default_useragent})'
 
@@ -161,6 +106,22 @@ default_sleep  = 60
 help_sleep \
     = f'max sleep time between file retrieval (default: {default_sleep} sec)'
 
+default_index = radio_nhk_index.default_file_index
+help_index    = f'index of archived episodes (default: {default_index})'
+
+help_refetch = f'fetching episodes even if they are found in the index'
+
+default_cache_ttl = radio_http_cache.default_ttl
+help_cache_ttl \
+    = f'time-to-live of cached JSON files, 0 for revalidating every time,' \
+    + f' negative for no cache (default: {default_cache_ttl} sec)'
+
+choices_transcode = ['never', 'auto', 'always']
+default_transcode = 'never'
+help_transcode \
+    = f'transcoding audio instead of stream copy, "auto" transcodes' \
+    + f' only when stream copy fails (default: {default_transcode})'
+
 default_verbose = 0
 help_verbose    = f'verbosity level (default: {default_verbose})'
 
@@ -181,6 +142,14 @@ parser.add_argument ('-f', '--ffmpeg', default=default_ffmpeg, \
                      help=help_ffmpeg)
 parser.add_argument ('-s', '--sleep', default=default_sleep, \
                      help=help_sleep)
+parser.add_argument ('-i', '--index', default=default_index, \
+                     help=help_index)
+parser.add_argument ('-n', '--refetch', action='store_true', \
+                     help=help_refetch)
+parser.add_argument ('-T', '--cache-ttl', type=int, \
+                     default=default_cache_ttl, help=help_cache_ttl)
+parser.add_argument ('-x', '--transcode', choices=choices_transcode, \
+                     default=default_transcode, help=help_transcode)
 parser.add_argument ('-v', '--verbose', action='count', \
                      default=default_verbose, help=help_verbose)
 
@@ -194,6 +163,10 @@ dir_tmp        = args.temporary_dir
 user_agent     = args.user_agent
 command_ffmpeg = args.ffmpeg
 max_sleep_time = args.sleep
+file_index     = args.index
+refetch        = args.refetch
+transcode      = args.transcode
+cache_ttl      = args.cache_ttl
 verbosity      = args.verbose
 
 ###########################################################################
@@ -204,11 +177,6 @@ verbosity      = args.verbose
 # files and directories
 #
 
-# files
-file_json_nhk = f'{dir_tmp}/index_{datetime_str}.json'
-if (verbosity):
-    print (f'file_json_nhk = {file_json_nhk}')
-
 # existence check of commands
 list_commands = [command_ffmpeg]
 for command in list_commands:
@@ -247,27 +215,28 @@ for directory in list_dir:
 #
 
 # retrieval of JSON file from NHK website
-req_nhk = urllib.request.Request (url=url_json_nhk)
-req_nhk.add_header ('User-Agent', user_agent)
-with urllib.request.urlopen (req_nhk) as www:
-    data_json_nhk = www.read ()
+dic_nhk = radio_nhk.fetch_json (radio_nhk.url_json_nhk, user_agent, \
+                                cache_ttl)
 
-# decoding JSON file content
-text_json_nhk = data_json_nhk.decode ('utf8')
+# finding channel, series ID, and corner ID of each program
+index_title = radio_nhk.make_title_index (dic_nhk)
+(dic_series, list_missed) \
+    = radio_nhk.resolve_programs (index_title, list_programs)
+for program in list_missed:
+    print (f'WARNING: "{radio_nhk.dic_programs[program]}" ({program})' \
+           + f' is not found in new_arrivals!')
 
-# writing JSON data into file
-with open (file_json_nhk, 'w') as fh:
-    fh.write (text_json_nhk)
+###########################################################################
 
-# decoding JSON data
-dic_nhk = json.loads (text_json_nhk)
+###########################################################################
 
-#for key in dic_nhk.keys ():
-#    for i in range ( len (dic_nhk[key]) ):
-#        print (f'ID = {dic_nhk[key][i]["id"]}')
-#        print (f'  Channel   = {dic_nhk[key][i]["radio_broadcast"]}')
-#        print (f'  Series ID = {dic_nhk[key][i]["series_site_id"]}')
-#        print (f'  Corner ID = {dic_nhk[key][i]["corner_site_id"]}')
+#
+# reading index of archived episodes
+#
+
+index_episodes = radio_nhk_index.load_index (file_index)
+if (verbosity):
+    print (f'{len (index_episodes)} episodes found in {file_index}')
 
 ###########################################################################
 
@@ -278,18 +247,13 @@ dic_nhk = json.loads (text_json_nhk)
 #
 
 # processing each program
-for program in list_programs:
+for program in dic_series.keys ():
     # printing status
     if (verbosity):
         print (f'Now, processing the program "{program}"...')
 
-    # finding channel, series ID, and corner ID
-    for key in dic_nhk.keys ():
-        for i in range ( len (dic_nhk[key]) ):
-            if (dic_nhk[key][i]["title"] == dic_programs[program]):
-                channel   = dic_nhk[key][i]["radio_broadcast"]
-                series_id = dic_nhk[key][i]["series_site_id"]
-                corner_id = dic_nhk[key][i]["corner_site_id"]
+    # channel, series ID, and corner ID
+    (channel, series_id, corner_id) = dic_series[program]
 
     # printing channel, series ID, and cornder ID
     if (verbosity):
@@ -298,9 +262,7 @@ for program in list_programs:
         print (f'  Corner ID = {corner_id}')
     
     # url of JSON file for given program
-    url_json_program \
-        = f'https://www.nhk.or.jp/radio-api/app/v1/web/ondemand/series' \
-        + f'?site_id={series_id}&corner_site_id={corner_id}'
+    url_json_program = radio_nhk.series_url (series_id, corner_id)
 
     # printing status
     if (verbosity):
@@ -308,114 +270,67 @@ for program in list_programs:
         print (f'  {url_json_program}')
     
     # fetching JSON file for the program
-    req_program = urllib.request.Request (url=url_json_program)
-    req_program.add_header ('User-Agent', user_agent)
-    with urllib.request.urlopen (req_program) as www:
-        data_json_program = www.read ()
+    dic_program = radio_nhk.fetch_json (url_json_program, user_agent, \
+                                       cache_ttl)
 
     # printing status
     if (verbosity):
         print (f'  Finished fetching JSON file!')
 
-    # decoding JSON file content
-    text_json_program = data_json_program.decode ('utf8')
-
-    # name for JSON file
-    file_json_program = f'{dir_tmp}/{series_id}_{corner_id}.json'
-    
-    # writing JSON file into file
-    with open (file_json_program, 'w') as fh:
-        fh.write (text_json_program)
-
-    # decoding JSON data
-    dic_program = json.loads (text_json_program)
-    
-    #print (f'{dic_program["episodes"][0]["stream_url"]}')
-
     # retrieving audio data
-    for i in range ( len (dic_program["episodes"]) ):
+    for episode in radio_nhk.list_episodes (dic_program):
         # URL of m3u8
-        url_m3u8 = dic_program["episodes"][i]["stream_url"]
+        url_m3u8 = episode['url_m3u8']
         # onair date
-        contents_id = dic_program["episodes"][i]["aa_contents_id"]
-        
-        # pattern matching of date/time of start of program
-        pattern_datetime \
-            = re.compile (r'(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})\+09:00_') 
-        match_datetime = re.search (pattern_datetime, contents_id)
-        if (match_datetime):
-            start_YYYY = int (match_datetime.group (1))
-            start_MM   = int (match_datetime.group (2))
-            start_DD   = int (match_datetime.group (3))
-            start_hh   = int (match_datetime.group (4))
-            start_mm   = int (match_datetime.group (5))
-            start_ss   = int (match_datetime.group (6))
-        else:
-            if (verbosity):
-                print (f'WARNING: pattern matching failed!')
-            continue
+        contents_id = episode['contents_id']
 
         # file names
-        start_date     = f'{start_YYYY:04d}{start_MM:02d}{start_DD:02d}'
-        start_time     = f'{start_hh:02d}{start_mm:02d}'
-        start_datetime = f'{start_date}_{start_time}'
+        start_datetime = episode['start_datetime']
         file_aac_tmp   = f'{dir_tmp}/{program}_{start_datetime}.aac'
         file_aac       = f'{dir_radio}/{program}_{start_datetime}.aac'
 
+        # skipping episodes already archived
+        if not (refetch):
+            if (radio_nhk_index.adopt_file (index_episodes, contents_id, \
+                                            file_aac)):
+                radio_nhk_index.save_index (index_episodes, file_index)
+                if (verbosity):
+                    print (f'#    {file_aac} is added to the index')
+            if (radio_nhk_index.is_archived (index_episodes, contents_id, \
+                                             file_aac)):
+                if (verbosity):
+                    print (f'#    {contents_id} is already archived')
+                continue
+
         # sleeping for a short time
         sleep_time = random.randint (5, max_sleep_time)
         time.sleep (sleep_time)
             
-        # command for fetching audio stream using ffmpeg command
-        command_fetch = f'{command_ffmpeg} -http_seekable 0 -n' \
-            + f' -i {url_m3u8} -vn -acodec aac {file_aac_tmp}'
-        if (verbosity):
-            print (f'#    {command_fetch}')
-        subprocess.run (command_fetch, shell=True)
-
-        # existence check of fetched audio file
-        path_aac_tmp = pathlib.Path (file_aac_tmp)
-        if not (path_aac_tmp.exists ()):
+        # expected duration of the episode
+        duration_expected = radio_nhk.expected_duration (url_m3u8)
+
+        # fetching audio stream using ffmpeg command
+        returncode = radio_nhk.fetch_episode (command_ffmpeg, url_m3u8, \
+                                              file_aac_tmp, \
+                                              transcode=transcode, \
+                                              verbosity=verbosity)
+
+        # check of fetched audio file
+        #  a failed or truncated file is removed, and is fetched again
+        #  next time as it is not in the index
+        error = radio_nhk.check_episode (file_aac_tmp, returncode, \
+                                         duration_expected, verbosity)
+        if (error is not None):
             # printing message
-            print (f'The file "{file_aac_tmp}" does not exist!')
-            print (f'Something is wrong with retrieval of data.')
-            print (f'Exiting...')
-            # exit
-            sys.exit ()
-
-        # file size of file_aac_tmp
-        filesize_aac_tmp = path_aac_tmp.stat ().st_size
-
-        # file size of file_aac
-        path_aac = pathlib.Path (file_aac)
-        if (path_aac.exists ()):
-            filesize_aac = path_aac.stat ().st_size
-        else:
-            filesize_aac = 0
-
-        # printing file sizes
-        if (verbosity):
-            print (f'#    file sizes')
-            print (f'#      {file_aac_tmp}: {filesize_aac_tmp} byte')
-            print (f'#      {file_aac}: {filesize_aac} byte')
-    
+            print (f'Something is wrong with retrieval of "{contents_id}":' \
+                   + f' {error}')
+            continue
+
         # copying AAC file
-        if ( (path_aac.exists ()) and (filesize_aac >= filesize_aac_tmp) ):
-            # if file exists and larger than new file, then not copying file
-            if (verbosity):
-                print (f'#    file "{file_aac_tmp}" is not copied to {dir_radio}')
-        else:
-            if (verbosity):
-                print (f'#    copy: {file_aac_tmp} ==> {file_aac}')
-            # copying file
-            shutil.copy2 (file_aac_tmp, file_aac)
-            if (verbosity):
-                print (f'#    file copy finished')
-
-        # deleting AAC files
-        list_aac_files = path_dir.glob ('*.aac')
-        for path_aac_files_for_delete in list_aac_files:
-            if (path_aac_files_for_delete.exists ()):
-                path_aac_files_for_delete.unlink ()
+        radio_nhk.store_episode (file_aac_tmp, file_aac, verbosity=verbosity)
+
+        # recording archived episode in the index
+        radio_nhk_index.add_entry (index_episodes, contents_id, file_aac)
+        radio_nhk_index.save_index (index_episodes, file_index)
 
 ###########################################################################
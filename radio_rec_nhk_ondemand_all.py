@@ -1,59 +1,401 @@
 #!/usr/pkg/bin/python3.12
 
-# Time-stamp: <2025/04/16 22:04:59 (UT+08:00) daisuke>
+#
+# Time-stamp: <2026/10/19 12:23:40 (UT+08:00) daisuke>
+#
+
+#
+# NHK on-demand harvester
+#
+#  the new_arrivals JSON is fetched once, all the series are resolved,
+#  and episodes are fetched as coroutines of radio_async in one event
+#  loop, with ffmpeg processes supervised by it. The number of
+#  concurrent fetches is limited globally and per host, and a random
+#  delay is put before each fetch to be polite to the server.
+#
+# usage:
+#
+#    fetching all the programs
+#    % radio_rec_nhk_ondemand_all.py -v
+#
+#    fetching some programs with 6 workers, at most 3 per host
+#    % radio_rec_nhk_ondemand_all.py -j 6 -k 3 adventure theatre
+#
+
+###########################################################################
+
+#
+# importing modules
+#
+
+# importing argparse module
+import argparse
+
+# importing asyncio module
+import asyncio
+
+# importing datetime module
+import datetime
+
+# importing os module
+import os
+
+# importing pathlib module
+import pathlib
 
 # importing random module
 import random
 
-# importing subprocess module
-import subprocess
-
-# command for ondemand
-command_ondemand = '/home/daisuke/bin/radio_rec_nhk_ondemand.py'
-
-# program names
-dic_programs = {
-    'adventure': '青春アドベンチャー',
-    'announcer100yr': 'アナウンサー百年百話',
-    'asianview': 'Asian View',
-    'broadcast100yr': '放送100年 保阪正康が語る昭和人物史',
-    'culture_art': 'カルチャーラジオ　芸術その魅力',
-    'culture_chinese': 'カルチャーラジオ　漢詩をよむ',
-    'culture_history': 'カルチャーラジオ　歴史再発見',
-    'culture_literature': 'カルチャーラジオ　文学の世界',
-    'culture_science': 'カルチャーラジオ　科学と人間',
-    'culture_showa': 'カルチャーラジオ　保阪正康が語る昭和人物史',
-    'culture_sunday': 'カルチャーラジオ　日曜カルチャー',
-    'earthradio': 'ちきゅうラジオ',
-    'fmcinemasounds': 'ＦＭシネマサウンズ',
-    'gendaieigo': 'ニュースで学ぶ「現代英語」',
-    'genichiro': '高橋源一郎の飛ぶ教室',
-    'hoshizora': 'MISIA 星空のラジオ ～Sunday Sunset～',
-    'jikutabi': '音で訪ねる　ニッポン時空旅',
-    'kotenkyoshitsu': 'おしゃべりな古典教室',
-    'ohanashi': 'お話でてこい',
-    'oretachi': '弘兼憲史の“俺たちはどう生きるか”',
-    'oto': '音の風景',
-    'learnjapanese': 'Ｌｅａｒｎ　Ｊａｐａｎｅｓｅ　ｆｒｏｍ　ｔｈｅ　Ｎｅｗｓ',
-    'meisakuza': '新日曜名作座',
-    'nemurenai': '眠れない貴女へ',
-    'nhkjournal': 'NHKジャーナル',
-    'nhknewswebeasy': 'NHKやさしいことばニュース',
-    'roudoku': '朗読',
-    'roudokuworld': '朗読の世界',
-    'theatre': 'ＦＭシアター',
-    'weekendsunshine': 'ウィークエンドサンシャイン',
-    'yamacafe': '石丸謙二郎の山カフェ',
-}
-
-# list of programs
-list_programs = list (dic_programs.keys ())
-
-# retrieving audio data
-while ( len (list_programs) > 0 ):
-    n = len (list_programs)
-    i = random.randint (0, n - 1)
-    command_fetch = f'{command_ondemand} {list_programs[i]}'
-    print (f'{command_fetch}')
-    subprocess.run (command_fetch, shell=True)
-    list_programs.pop (i)
+# importing sys module
+import sys
+
+# importing time module
+import time
+
+# importing radio_async module
+import radio_async
+
+# importing radio_nhk module
+import radio_nhk
+
+# importing radio_nhk_index module
+import radio_nhk_index
+
+# importing radio_http module
+import radio_http
+
+# importing radio_http_cache module
+import radio_http_cache
+
+# importing radio_metrics module
+import radio_metrics
+
+###########################################################################
+
+###########################################################################
+
+#
+# date/time
+#
+
+# environmental variables
+dir_home = os.environ['HOME']
+
+# process ID
+pid = os.getpid ()
+
+# date/time
+datetime_now = datetime.datetime.now ()
+datetime_str = datetime_now.strftime ('%Y%m%d_%H%M%S')
+
+###########################################################################
+
+###########################################################################
+
+#
+# command-line arguments analysis using argparse
+#
+
+# default parameters
+choices_programs = list (radio_nhk.dic_programs.keys ())
+help_programs    = f'program names (default: all the programs)'
+
+default_useragent = radio_nhk.user_agent
+help_useragent \
+    = f'user agent for HTTP retrieval (default: {default_useragent})'
+
+default_dir_radio = f'{dir_home}/audio/radio'
+help_dir_radio \
+    = f'directory to store recorded file (default: {default_dir_radio})'
+
+default_dir_tmp = f'/tmp/radio_{datetime_str}_{pid}'
+help_dir_tmp \
+    = f'directory to store temporary file (default: {default_dir_tmp})'
+
+default_ffmpeg = '/usr/pkg/bin/ffmpeg6'
+help_ffmpeg    = f'location of ffmpeg command (default: {default_ffmpeg})'
+
+default_jobs = 4
+help_jobs    = f'max number of concurrent fetches (default: {default_jobs})'
+
+default_jobs_host = 2
+help_jobs_host \
+    = f'max number of concurrent fetches per host (default: {default_jobs_host})'
+
+default_jitter = 5.0
+help_jitter \
+    = f'max random delay before each fetch (default: {default_jitter} sec)'
+
+default_index = radio_nhk_index.default_file_index
+help_index    = f'index of archived episodes (default: {default_index})'
+
+help_refetch = f'fetching episodes even if they are found in the index'
+
+default_cache_ttl = radio_http_cache.default_ttl
+help_cache_ttl \
+    = f'time-to-live of cached JSON files, 0 for revalidating every time,' \
+    + f' negative for no cache (default: {default_cache_ttl} sec)'
+
+choices_transcode = ['never', 'auto', 'always']
+default_transcode = 'never'
+help_transcode \
+    = f'transcoding audio instead of stream copy, "auto" transcodes' \
+    + f' only when stream copy fails (default: {default_transcode})'
+
+default_verbose = 0
+help_verbose    = f'verbosity level (default: {default_verbose})'
+
+# construction of parser object
+desc = 'NHK on-demand radio program harvester'
+parser = argparse.ArgumentParser (description=desc)
+
+# adding arguments
+parser.add_argument ('programs', nargs='*', choices=choices_programs, \
+                     help=help_programs)
+parser.add_argument ('-r', '--radio-dir', default=default_dir_radio, \
+                     help=help_dir_radio)
+parser.add_argument ('-t', '--temporary-dir', default=default_dir_tmp, \
+                     help=help_dir_tmp)
+parser.add_argument ('-u', '--user-agent', default=default_useragent, \
+                     help=help_useragent)
+parser.add_argument ('-f', '--ffmpeg', default=default_ffmpeg, \
+                     help=help_ffmpeg)
+parser.add_argument ('-j', '--jobs', type=int, default=default_jobs, \
+                     help=help_jobs)
+parser.add_argument ('-k', '--jobs-per-host', type=int, \
+                     default=default_jobs_host, help=help_jobs_host)
+parser.add_argument ('-s', '--jitter', type=float, default=default_jitter, \
+                     help=help_jitter)
+parser.add_argument ('-i', '--index', default=default_index, \
+                     help=help_index)
+parser.add_argument ('-n', '--refetch', action='store_true', \
+                     help=help_refetch)
+parser.add_argument ('-T', '--cache-ttl', type=int, \
+                     default=default_cache_ttl, help=help_cache_ttl)
+parser.add_argument ('-x', '--transcode', choices=choices_transcode, \
+                     default=default_transcode, help=help_transcode)
+parser.add_argument ('-v', '--verbose', action='count', \
+                     default=default_verbose, help=help_verbose)
+
+# command-line argument analysis
+args = parser.parse_args ()
+
+# parameters
+list_programs  = args.programs
+dir_radio      = args.radio_dir
+dir_tmp        = args.temporary_dir
+user_agent     = args.user_agent
+command_ffmpeg = args.ffmpeg
+n_jobs         = max (args.jobs, 1)
+n_jobs_host    = max (args.jobs_per_host, 1)
+max_jitter     = max (args.jitter, 0.0)
+file_index     = args.index
+refetch        = args.refetch
+transcode      = args.transcode
+cache_ttl      = args.cache_ttl
+verbosity      = args.verbose
+
+# all the programs by default
+if (len (list_programs) == 0):
+    list_programs = choices_programs
+
+###########################################################################
+
+###########################################################################
+
+#
+# files and directories
+#
+
+# existence check of commands
+list_commands = [command_ffmpeg]
+for command in list_commands:
+    # making a pathlib object
+    path_command = pathlib.Path (command)
+    # if command does not exist, then stop the script
+    if not (path_command.exists ()):
+        # printing message
+        print (f'The command "{command}" does not exist!')
+        print (f'Install "{command}" and then run the command again.')
+        # exit
+        sys.exit ()
+
+# existence check of directories
+list_dir = [dir_radio, dir_tmp]
+for directory in list_dir:
+    # making pathlib object
+    path_dir = pathlib.Path (directory)
+    # if directory does not exist
+    if not (path_dir.exists ()):
+        # making directory
+        path_dir.mkdir (parents=True, exist_ok=True)
+
+###########################################################################
+
+###########################################################################
+
+#
+# functions
+#
+
+# semaphore limiting concurrent jobs in total
+#  a job takes the semaphore of its host first, so that jobs waiting for
+#  a busy host do not hold slots which other hosts could use
+state_limit = {'jobs': None}
+
+# fetching JSON file of a series, limited per host and in total
+async def fetch_series (url):
+    async with radio_async.host_semaphore (url, n_jobs_host), \
+               state_limit['jobs']:
+        await asyncio.sleep (random.uniform (0.0, max_jitter))
+        return (await radio_async.fetch_json (url, \
+                                              {'User-Agent': user_agent}, \
+                                              cache_ttl))
+
+# fetching an episode, limited per host and in total
+#  time waiting for the limit and the random delay are recorded as
+#  phases "wait" and "sleep" in metrics
+async def fetch_episode (job):
+    job_metrics = radio_metrics.new_job ('nhk_ondemand', \
+                                         os.path.basename (job['file_aac']), \
+                                         contents_id=job['contents_id'])
+    radio_metrics.start_phase (job_metrics, 'wait')
+    async with radio_async.host_semaphore (job['url_m3u8'], n_jobs_host), \
+               state_limit['jobs']:
+        radio_metrics.start_phase (job_metrics, 'sleep')
+        await asyncio.sleep (random.uniform (0.0, max_jitter))
+        radio_metrics.start_phase (job_metrics, 'download')
+        time_start = time.monotonic ()
+        duration_expected = await radio_async.in_thread ( \
+            radio_nhk.expected_duration, job['url_m3u8'])
+        returncode = await radio_nhk.fetch_episode_async ( \
+            command_ffmpeg, job['url_m3u8'], job['file_aac_tmp'], \
+            transcode=transcode, verbosity=verbosity)
+        time_fetch = time.monotonic () - time_start
+        radio_metrics.end_phase (job_metrics)
+    path_aac_tmp = pathlib.Path (job['file_aac_tmp'])
+    if (path_aac_tmp.exists ()):
+        radio_metrics.add (job_metrics, bytes=path_aac_tmp.stat ().st_size)
+    error = await radio_async.in_thread (radio_nhk.check_episode, \
+                                         job['file_aac_tmp'], returncode, \
+                                         duration_expected, verbosity)
+    if (error is not None):
+        radio_metrics.finish (job_metrics, f'failed: {error}')
+        print (f'# failed: {job["contents_id"]} ({error})')
+        return (False)
+    radio_metrics.start_phase (job_metrics, 'finalise')
+    await radio_async.in_thread (radio_nhk.store_episode, \
+                                 job['file_aac_tmp'], job['file_aac'], \
+                                 verbosity=verbosity)
+    radio_metrics.finish (job_metrics)
+    # reading file in a worker thread, and updating index in the loop
+    index_episodes[job['contents_id']] \
+        = await radio_async.in_thread (radio_nhk_index.make_entry, \
+                                       job['file_aac'])
+    radio_nhk_index.save_index (index_episodes, file_index)
+    if (verbosity):
+        print (f'# fetched: {job["file_aac"]} ({time_fetch:.1f} sec)')
+    return (True)
+
+# fetching all the series and then all the new episodes
+async def harvest (dic_url_series):
+    # fetching JSON files of series, and making list of episodes to fetch
+    state_limit['jobs'] = asyncio.Semaphore (max (n_jobs, 1))
+    list_programs = list (dic_url_series.keys ())
+    results = await asyncio.gather ( \
+        *[fetch_series (dic_url_series[program]) \
+          for program in list_programs], return_exceptions=True)
+    list_jobs = []
+    n_adopted = 0
+    for (program, dic_program) in zip (list_programs, results):
+        if (isinstance (dic_program, Exception)):
+            print (f'# failed: {program} ({dic_program})')
+            continue
+        for episode in radio_nhk.list_episodes (dic_program):
+            name     = f'{program}_{episode["start_datetime"]}.aac'
+            file_aac = f'{dir_radio}/{name}'
+            if not (refetch):
+                if (await radio_async.in_thread (radio_nhk_index.adopt_file, \
+                                                 index_episodes, \
+                                                 episode['contents_id'], \
+                                                 file_aac)):
+                    n_adopted += 1
+                if (radio_nhk_index.is_archived (index_episodes, \
+                                                 episode['contents_id'], \
+                                                 file_aac)):
+                    continue
+            list_jobs.append ({
+                'contents_id': episode['contents_id'],
+                'url_m3u8': episode['url_m3u8'],
+                'file_aac_tmp': f'{dir_tmp}/{name}',
+                'file_aac': file_aac,
+            })
+    # files archived before the index existed are recorded in the index
+    if (n_adopted > 0):
+        radio_nhk_index.save_index (index_episodes, file_index)
+        if (verbosity):
+            print (f'# {n_adopted} archived files added to the index')
+    if (verbosity):
+        print (f'# {len (dic_url_series)} series resolved,' \
+               + f' {len (list_jobs)} episodes to fetch')
+
+    # fetching episodes
+    results = await asyncio.gather ( \
+        *[fetch_episode (job) for job in list_jobs], return_exceptions=True)
+    n_fetched = 0
+    for result in results:
+        if (isinstance (result, Exception)):
+            print (f'# failed: {result}')
+        elif (result):
+            n_fetched += 1
+    return (n_fetched, len (list_jobs))
+
+###########################################################################
+
+###########################################################################
+
+#
+# resolving series
+#
+
+time_start = time.monotonic ()
+
+# retrieval of new_arrivals JSON file, only once
+dic_nhk = radio_nhk.fetch_json (radio_nhk.url_json_nhk, user_agent, \
+                                cache_ttl)
+
+# finding series of each program
+index_title = radio_nhk.make_title_index (dic_nhk)
+(dic_series, list_missed) \
+    = radio_nhk.resolve_programs (index_title, list_programs)
+for program in list_missed:
+    print (f'# not found: {program} ({radio_nhk.dic_programs[program]})')
+dic_url_series = {}
+for program in dic_series.keys ():
+    (channel, series_id, corner_id) = dic_series[program]
+    dic_url_series[program] = radio_nhk.series_url (series_id, corner_id)
+
+# reading index of archived episodes
+index_episodes = radio_nhk_index.load_index (file_index)
+
+###########################################################################
+
+###########################################################################
+
+#
+# fetching episodes
+#
+
+(n_fetched, n_jobs_total) = radio_async.run (harvest (dic_url_series))
+
+# removing temporary directory if empty
+try:
+    os.rmdir (dir_tmp)
+except OSError:
+    pass
+
+time_total = time.monotonic () - time_start
+print (f'# {n_fetched} / {n_jobs_total} episodes fetched' \
+       + f' in {time_total:.1f} sec')
+if (verbosity):
+    radio_http.print_metrics ()
@@ -1,7 +1,7 @@
 #!/usr/pkg/bin/python3.12
 
 #
-# Time-stamp: <2024/08/16 21:14:56 (UT+8) daisuke>
+# Time-stamp: <2026/10/18 20:31:09 (UT+08:00) daisuke>
 #
 
 ###########################################################################
@@ -16,6 +16,9 @@ import argparse
 # importing datetime module
 import datetime
 
+# importing http.client module
+import http.client
+
 # importing os module
 import os
 
@@ -25,17 +28,17 @@ import sys
 # importing pathlib module
 import pathlib
 
-# importing subprocess module
-import subprocess
+# importing radio_radiko_auth module
+import radio_radiko_auth
 
-# importing re module
-import re
+# importing radio_hls module
+import radio_hls
 
-# importing shutil module
-import shutil
+# importing radio_http module
+import radio_http
 
-# importing time module
-import time
+# importing radio_metrics module
+import radio_metrics
 
 ###########################################################################
 
@@ -80,9 +83,6 @@ def mjd2cal (mjd):
 # parameters and constants
 #
 
-# sleep time in second
-sleep_time = 1
-
 # time zone (it should be +9.0 = Japan)
 timezone = +9.0
 
@@ -98,29 +98,7 @@ dow2num = {
     'Sat': 6,
     }
 
-# commands
-command_dd     = '/bin/dd'
-command_base64 = '/usr/pkg/bin/base64'
-command_curl   = '/usr/pkg/bin/curl'
-opt_curl       = '--insecure'
-command_ffmpeg = '/usr/pkg/bin/ffmpeg6'
-
-# list of commands for this script
-list_command = [ command_base64, command_curl, command_ffmpeg ]
-
-# existence check of commands
-for command in list_command:
-    path_command = pathlib.Path (command)
-    if not ( path_command.exists () ):
-        print ("#")
-        print ("# ERROR: command %s does not exist!" % (command) )
-        print ("#")
-        sys.exit ()
-
 # URLs
-url_player   = 'https://radiko.jp/apps/js/playerCommon.js'
-url_auth1    = 'https://radiko.jp/v2/api/auth1'
-url_auth2    = 'https://radiko.jp/v2/api/auth2?radiko_session='
 url_playlist = 'https://radiko.jp/v2/api/ts/playlist.m3u8'
 
 ###########################################################################
@@ -138,6 +116,8 @@ default_program   = 'lifestylemuseum'
 default_dayofweek = 'Fri'
 default_start     = '18:30'
 default_end       = '19:00'
+default_area      = ''
+default_jobs      = radio_hls.default_workers
 default_verbose   = 0
 
 # help message
@@ -146,6 +126,10 @@ help_program   = 'radio program name (default: lifestylemuseum)'
 help_dayofweek = 'day-of-week of program (default: Fri)'
 help_start     = 'start time (JST) of program in HH:MM format (default: 18:30)'
 help_end       = 'end time (JST) of program in HH:MM format (default: 19:00)'
+help_area      = 'area ID of cached authtoken (default: last authenticated area)'
+help_reauth    = 'discarding cached authtoken and authenticating again'
+help_jobs      = 'number of concurrent segment downloads (default: %d, max: %d)' \
+    % (default_jobs, radio_hls.max_workers)
 help_verbose   = 'verbosity level (default: 0)'
 
 # adding arguments
@@ -159,6 +143,12 @@ parser.add_argument ('-s', '--start', default=default_start, \
                      help=help_start)
 parser.add_argument ('-e', '--end', default=default_end, \
                      help=help_end)
+parser.add_argument ('-a', '--area', default=default_area, \
+                     help=help_area)
+parser.add_argument ('-A', '--reauth', action='store_true', \
+                     help=help_reauth)
+parser.add_argument ('-j', '--jobs', type=int, default=default_jobs, \
+                     help=help_jobs)
 parser.add_argument ('-v', '--verbose', action='count', \
                      default=default_verbose, help=help_verbose)
 
@@ -171,6 +161,9 @@ program    = args.program
 dayofweek  = args.dayofweek
 time_start = args.start
 time_end   = args.end
+area       = args.area
+reauth     = args.reauth
+jobs       = min (max (args.jobs, 1), radio_hls.max_workers)
 verbosity  = args.verbose
 
 ###########################################################################
@@ -252,6 +245,11 @@ datetime_end = "%04d%02d%02d%02d%02d%02d" \
     % (end_YYYY, end_MM, end_DD, \
        int (time_end_hh), int (time_end_mm), 0)
 
+# duration of the program in second, for bandwidth in metrics
+duration_sec = (datetime.datetime.strptime (datetime_end, '%Y%m%d%H%M%S') \
+                - datetime.datetime.strptime (datetime_start, \
+                                              '%Y%m%d%H%M%S')).total_seconds ()
+
 if (verbosity):
     print ("#")
     print ("# date/time now")
@@ -284,36 +282,20 @@ if (verbosity):
 # directories and files
 #
 
-# process ID
-pid = os.getpid ()
-
 # directories
 dir_home = os.environ['HOME']
 dir_data = "%s/audio/radio" % (dir_home)
-dir_tmp  = "/tmp/r%s_%06d" % (datetime_str, pid)
 
 # making directory if not exist
 path_data = pathlib.Path (dir_data)
 if not ( path_data.exists () ):
     path_data.mkdir (parents=True, exist_ok=True)
-path_tmp = pathlib.Path (dir_tmp)
-if not ( path_tmp.exists () ):
-    path_tmp.mkdir (parents=True, exist_ok=True)
 
 # files
-file_player     = "%s/player.js" % (dir_tmp)
-file_authkey    = "%s/authkey.data" % (dir_tmp)
-file_auth1      = "%s/auth1.data" % (dir_tmp)
-file_auth2      = "%s/auth2.data" % (dir_tmp)
-file_partialkey = "%s/partial_key.data" % (dir_tmp)
-file_playlist   = "%s/playlist.data" % (dir_tmp)
-file_m3u        = "%s/%s_%s_%s.m3u" \
-    % (dir_tmp, program, start_date_str, start_hhmm_str)
-file_aaclist    = "%s/aac.list" % (dir_tmp)
-file_aac_tmp    = "%s/%s_%s_%s.aac" \
-    % (dir_tmp, program, start_date_str, start_hhmm_str)
 file_aac        = "%s/%s_%s_%s.aac" \
     % (dir_data, program, start_date_str, start_hhmm_str)
+file_aac_part   = radio_hls.partial_file (file_aac)
+file_journal    = radio_hls.journal_file (channel, datetime_start, datetime_end)
 
 if (verbosity):
     print ("#")
@@ -321,19 +303,10 @@ if (verbosity):
     print ("#")
     print ("#  dir_home = %s" % (dir_home) )
     print ("#  dir_data = %s" % (dir_data) )
-    print ("#  dir_tmp  = %s" % (dir_tmp) )
-    print ("#")
-    print ("#  file_player     = %s" % (file_player) )
-    print ("#  file_authkey    = %s" % (file_authkey) )
-    print ("#  file_auth1      = %s" % (file_auth1) )
-    print ("#  file_auth2      = %s" % (file_auth2) )
-    print ("#  file_partialkey = %s" % (file_partialkey) )
-    print ("#  file_playlist   = %s" % (file_playlist) )
     print ("#")
-    print ("#  file_m3u     = %s" % (file_m3u) )
-    print ("#  file_aaclist = %s" % (file_aaclist) )
-    print ("#  file_aac_tmp = %s" % (file_aac_tmp) )
-    print ("#  file_aac     = %s" % (file_aac) )
+    print ("#  file_aac       = %s" % (file_aac) )
+    print ("#  file_aac_part  = %s" % (file_aac_part) )
+    print ("#  file_journal   = %s" % (file_journal) )
     print ("#")
 
 ###########################################################################
@@ -342,406 +315,214 @@ if (verbosity):
 # fetching data
 #
 
-# fetching radiko player
+# metrics of this job, recorded even if the script stops on error
+job_metrics = radio_metrics.new_job ('timefree', \
+                                     '%s_%s_%s' % (program, start_date_str, \
+                                                   start_hhmm_str), \
+                                     channel=channel, ft=datetime_start, \
+                                     to=datetime_end, \
+                                     duration_sec=duration_sec)
+radio_metrics.finish_at_exit (job_metrics)
 
-command_fetch_player = "%s %s -o %s %s" \
-    % (command_curl, opt_curl, file_player, url_player)
-
-if (verbosity):
-    print ("#")
-    print ("# Now, fetching Radiko player...")
-    print ("#")
-    print ("#  COMMAND: %s" % (command_fetch_player) )
-    print ("#")
+# authentication
 
-time.sleep (sleep_time)
-subprocess.run (command_fetch_player, shell=True)
+radio_metrics.start_phase (job_metrics, 'auth')
 
 if (verbosity):
     print ("#")
-    print ("# Finished fetching Radiko player!")
-    print ("#")
-    print ("#  COMMAND: %s" % (command_fetch_player) )
+    print ("# Now, authenticating with radiko...")
     print ("#")
 
-# scanning Radiko JS player
-    
-if (verbosity):
-    print ("#")
-    print ("# Now, scanning Radiko JS player...")
-    print ("#")
-    
-# player = new RadikoJSPlayer($audio[0], 'pc_html5', 'bcd151073c03b352e1ef2fd66c32209da9ca0afa', {
-pattern_authkey \
-    = re.compile ('player = new RadikoJSPlayer\(\S+,\s+\'(\S+)\',\s+\'(\S+)\',')
-    
-path_player = pathlib.Path (file_player)
-if not ( path_player.exists () ):
+try:
+    session = radio_radiko_auth.authenticate (area=area, force=reauth, \
+                                              verbosity=verbosity)
+except (OSError, RuntimeError, ValueError, TypeError) as error:
     print ("#")
-    print ("# ERROR: radiko player could not be downloaded!")
+    print ("# ERROR: authentication failed! (%s)" % (error) )
     print ("#")
     sys.exit ()
-else:
-    with open (file_player, 'r') as fh:
-        for line in fh:
-            match_authkey = re.search (pattern_authkey, line)
-            if (match_authkey):
-                radiko_app     = match_authkey.group (1)
-                radiko_authkey = match_authkey.group (2)
 
-if (verbosity):
-    print ("#")
-    print ("# Following information was obtained from radiko JS player")
-    print ("#")
-    print ("#  radiko_app     = %s" % (radiko_app) )
-    print ("#  radiko_authkey = %s" % (radiko_authkey) )
-    print ("#")
+authtoken = session['authtoken']
 
-# writing authkey to file
-    
 if (verbosity):
     print ("#")
-    print ("# Now, writing value of authkey into a file...")
-    print ("#")
-
-with open (file_authkey, 'w') as fh:
-    fh.write (radiko_authkey)
-
-if (verbosity):
-    print ("#")
-    print ("# Finished writing value of authkey into a file!")
-    print ("#")
-
-# fetching auth1
-
-opt_curl_header1 = '--header "pragma: no-cache"'
-opt_curl_header2 = "--header \"X-Radiko-App: %s\"" % (radiko_app)
-opt_curl_header3 = '--header "X-Radiko-App-Version: 0.0.1"'
-opt_curl_header4 = '--header "X-Radiko-User: dummy_user"'
-opt_curl_header5 = '--header "X-Radiko-Device: pc"'
-opt_curl_header6 = '--header "X-Radiko-AuthToken: ___AUTHTOKEN___"'
-opt_curl_header7 = '--header "X-Radiko-PartialKey: ___PARTIALKEY___"'
-opt_curl_header8 = '--header "Content-Type: application/x-www-form-urlencoded"'
-opt_curl_header9 = '--header "Referer: https://radiko.jp/"'
-opt_curl_include = '--include'
-opt_curl_flash   = '--data "flash=1"'
-
-opt_curl_auth1 = "%s %s %s %s %s %s %s" \
-    % (opt_curl, opt_curl_header1, opt_curl_header2, opt_curl_header3, \
-       opt_curl_header4, opt_curl_header5, opt_curl_include)
-
-command_fetch_auth1 = "%s %s -o %s %s" \
-    % (command_curl, opt_curl_auth1, file_auth1, url_auth1)
-
-if (verbosity):
-    print ("#")
-    print ("# Now, fetching auth1...")
-    print ("#")
-    print ("#  COMMAND: %s" % (command_fetch_auth1) )
-    print ("#")
-
-time.sleep (sleep_time)
-subprocess.run (command_fetch_auth1, shell=True)
-
-if (verbosity):
-    print ("#")
-    print ("# Finished fetching auth1!")
-    print ("#")
-    print ("#  COMMAND: %s" % (command_fetch_auth1) )
-    print ("#")
-
-# scanning auth1 data
-    
-# X-Radiko-AuthToken: oZSYOkBPCEYafLfqPexZiA
-# X-Radiko-KeyLength: 16
-# X-Radiko-KeyOffset: 13
-pattern_authtoken = re.compile ('X-Radiko-AuthToken:\s+(\S+)', re.IGNORECASE)
-pattern_keylength = re.compile ('X-Radiko-KeyLength:\s+(\S+)', re.IGNORECASE)
-pattern_keyoffset = re.compile ('X-Radiko-KeyOffset:\s+(\S+)', re.IGNORECASE)
-
-path_auth1 = pathlib.Path (file_auth1)
-if not ( path_auth1.exists () ):
-    print ("#")
-    print ("# ERROR: auth1 file could not be downloaded!")
-    print ("#")
-    sys.exit ()
-else:
-    with open (file_auth1, 'r') as fh:
-        for line in fh:
-            match_authtoken = re.search (pattern_authtoken, line)
-            if (match_authtoken):
-                authtoken = match_authtoken.group (1)
-            match_keylength = re.search (pattern_keylength, line)
-            if (match_keylength):
-                keylength = int ( match_keylength.group (1) )
-            match_keyoffset = re.search (pattern_keyoffset, line)
-            if (match_keyoffset):
-                keyoffset = int ( match_keyoffset.group (1) )
-
-if (verbosity):
-    print ("#")
-    print ("# Information extracted from auth1 file")
+    print ("# Finished authenticating with radiko!")
     print ("#")
+    print ("#  area      = %s" % (session['area']) )
     print ("#  authtoken = %s" % (authtoken) )
-    print ("#  keylength = %d" % (keylength) )
-    print ("#  keyoffset = %d" % (keyoffset) )
     print ("#")
-    
-# extracting partial key
 
-command_extract_partial_key = "%s if=%s of=%s bs=1 skip=%d count=%d" \
-    % (command_dd, file_authkey, file_partialkey, keyoffset, keylength)
+# fetching play list
 
-if (verbosity):
-    print ("#")
-    print ("# Now, extracting partial key...")
-    print ("#")
-    print ("#  COMMAND: %s" % (command_extract_partial_key) )
-    print ("#")
+radio_metrics.start_phase (job_metrics, 'playlist')
 
-time.sleep (sleep_time)
-subprocess.run (command_extract_partial_key, shell=True)
+headers_playlist = {
+    'pragma': 'no-cache',
+    'X-Radiko-AuthToken': authtoken,
+    'Content-Type': 'application/x-www-form-urlencoded',
+    'Referer': 'https://radiko.jp/',
+}
+url_playlist_query = "%s?l=15&station_id=%s&ft=%s&to=%s" \
+    % (url_playlist, channel, datetime_start, datetime_end)
 
 if (verbosity):
     print ("#")
-    print ("# Finished extracting partial key!")
+    print ("# Now, fetching playlist...")
     print ("#")
-    print ("#  COMMAND: %s" % (command_extract_partial_key) )
+    print ("#  URL: %s" % (url_playlist_query) )
     print ("#")
 
-# encoding partial key using base64
-
-command_encode_partial_key = "%s < %s" % (command_base64, file_partialkey)
-
-if (verbosity):
-    print ("#")
-    print ("# Now, encoding partial key using base64...")
+# a refused authtoken is discarded, and authentication is done again
+# once, since a cached token may have been revoked or be of another area
+for i in range (2):
+    try:
+        (status, headers_response, data_playlist) \
+            = radio_http.request ('POST', url_playlist_query, \
+                                  headers_playlist, b'flash=1')
+    except OSError as error:
+        status = str (error)
+    if not ( (status in (401, 403)) and (i == 0) ):
+        break
+    if (verbosity):
+        print ("#")
+        print ("# authtoken refused (%s), authenticating again..." \
+               % (status) )
+        print ("#")
+    radio_metrics.start_phase (job_metrics, 'auth')
+    radio_radiko_auth.invalidate (session['area'])
+    try:
+        session = radio_radiko_auth.authenticate (area=session['area'], \
+                                                  force=True, \
+                                                  verbosity=verbosity)
+    except (OSError, RuntimeError, ValueError, TypeError) as error:
+        print ("#")
+        print ("# ERROR: authentication failed! (%s)" % (error) )
+        print ("#")
+        sys.exit ()
+    authtoken = session['authtoken']
+    headers_playlist['X-Radiko-AuthToken'] = authtoken
+    radio_metrics.start_phase (job_metrics, 'playlist')
+if (status != 200):
     print ("#")
-    print ("#  COMMAND: %s" % (command_encode_partial_key) )
+    print ("# ERROR: playlist file could not be downloaded! (%s)" % (status) )
     print ("#")
-
-time.sleep (sleep_time)
-result_encode_partial_key = subprocess.run (command_encode_partial_key, \
-                                            shell=True, capture_output=True)
-
-partialkey_value = result_encode_partial_key.stdout.decode ('utf-8')
+    sys.exit ()
 
 if (verbosity):
     print ("#")
-    print ("# Finished encoding partial key using base64!")
-    print ("#")
-    print ("#  partial key = %s" % (partialkey_value) )
+    print ("# Finished fetching playlist!")
     print ("#")
 
-# fetching auth2 data
-
-pattern_authtoken_value  = re.compile ('___AUTHTOKEN___')
-pattern_partialkey_value = re.compile ('___PARTIALKEY___')
-
-opt_curl_header6 = re.sub (pattern_authtoken_value, authtoken, \
-                           opt_curl_header6)
-opt_curl_header7 = re.sub (pattern_partialkey_value, partialkey_value, \
-                           opt_curl_header7)
+# extract stream URL from playlist
 
-opt_curl_auth2 = "%s %s %s %s %s %s %s %s" \
-    % (opt_curl, opt_curl_header1, opt_curl_header2, opt_curl_header3, \
-       opt_curl_header4, opt_curl_header5, opt_curl_header6, opt_curl_header7)
+url_m3u = ''
+for line in data_playlist.decode ('utf-8').splitlines ():
+    if (line[0:1] == '#'):
+        continue
+    if (line[0:18] == 'https://radiko.jp/'):
+        url_m3u = line.rstrip ()
 
-command_fetch_auth2 = "%s %s -o %s '%s'" \
-    % (command_curl, opt_curl_auth2, file_auth2, url_auth2)
+# fetching m3u file
 
-if (verbosity):
-    print ("#")
-    print ("# Now, fetching auth2...")
+if not (url_m3u):
     print ("#")
-    print ("#  COMMAND: %s" % (command_fetch_auth2) )
+    print ("# ERROR: could not fetch m3u8 URL!")
     print ("#")
-
-time.sleep (sleep_time)
-subprocess.run (command_fetch_auth2, shell=True)
+    sys.exit ()
 
 if (verbosity):
     print ("#")
-    print ("# Finished fetching auth2!")
+    print ("# Now, fetching m3u8 file...")
     print ("#")
-    print ("#  COMMAND: %s" % (command_fetch_auth2) )
+    print ("#  URL: %s" % (url_m3u) )
     print ("#")
 
-# fetching play list
-
-opt_curl_playlist = "%s %s %s %s %s %s" \
-    % (opt_curl, opt_curl_header1, opt_curl_header6, opt_curl_header8, \
-       opt_curl_header9, opt_curl_flash)
-
-command_fetch_playlist = "%s %s -o %s '%s?l=15&station_id=%s&ft=%s&to=%s'" \
-    % (command_curl, opt_curl_playlist, file_playlist, url_playlist, \
-       channel, datetime_start, datetime_end)
-
-if (verbosity):
-    print ("#")
-    print ("# Now, fetching playlist...")
+try:
+    (status, data_m3u) = radio_http.get (url_m3u)
+except OSError as error:
+    status = str (error)
+if (status != 200):
     print ("#")
-    print ("#  COMMAND: %s" % (command_fetch_playlist) )
+    print ("# ERROR: m3u file could not be downloaded! (%s)" % (status) )
     print ("#")
-
-time.sleep (sleep_time)
-subprocess.run (command_fetch_playlist, shell=True)
+    sys.exit ()
 
 if (verbosity):
     print ("#")
-    print ("# Finished fetching playlist!")
-    print ("#")
-    print ("#  COMMAND: %s" % (command_fetch_playlist) )
-    print ("#")
-
-# extract stream URL from playlist
-
-path_playlist = pathlib.Path (file_playlist)
-if not ( path_playlist.exists () ):
-    print ("#")
-    print ("# ERROR: playlist file could not be downloaded!")
+    print ("# Finished fetching m3u8 file!")
     print ("#")
-    sys.exit ()
-else:
-    with open (file_playlist, 'r') as fh:
-        for line in fh:
-            if (line[0] == '#'):
-                continue
-            if (line[0:18] == 'https://radiko.jp/'):
-                url_m3u = line.rstrip ()
 
-# fetching m3u file
+# extracting URLs of AAC files
 
-user_agent \
-    = 'Mozilla/5.0 (X11; NetBSD amd64; rv:109.0) Gecko/20100101 Firefox/115.0'
-#    = 'Mozilla/5.0 (X11; NetBSD amd64; rv:91.0) Gecko/20100101 Firefox/91.0'
+list_url = []
+for line in data_m3u.decode ('utf-8').splitlines ():
+    if (line[0:1] == '#'):
+        continue
+    if (line[0:5] == 'https'):
+        list_url.append (line.rstrip () )
 
-if (url_m3u):
-    command_fetch_m3u = "%s %s --user-agent '%s' -o %s %s" \
-        % (command_curl, opt_curl, user_agent, file_m3u, url_m3u)
-else:
-    print ("#")
-    print ("# ERROR: could not fetch m3u8 URL!")
-    print ("#")
-    sys.exit ()
+# fetching AAC files and appending them into a single file
 
-print (command_fetch_m3u)
+radio_metrics.start_phase (job_metrics, 'download')
 
 if (verbosity):
     print ("#")
-    print ("# Now, fetching m3u8 file...")
+    print ("# Now, fetching %d AAC files using %d connections..." \
+           % (len (list_url), jobs) )
     print ("#")
-    print ("#  COMMAND: %s" % (command_fetch_m3u) )
+    print ("#  %s" % (file_aac_part) )
     print ("#")
 
-time.sleep (sleep_time)
-subprocess.run (command_fetch_m3u, shell=True)
-
-if (verbosity):
+try:
+    (n_segments, n_bytes) \
+        = radio_hls.write_segments (list_url, file_aac_part, workers=jobs, \
+                                    file_journal=file_journal)
+except (http.client.HTTPException, OSError, RuntimeError, \
+        ValueError) as error:
     print ("#")
-    print ("# Finished fetching m3u8 file!")
+    print ("# ERROR: AAC files could not be downloaded! (%s)" % (error) )
     print ("#")
-    print ("#  COMMAND: %s" % (command_fetch_m3u) )
-    print ("#")
-
-# extracting URLs of AAC files
-
-path_m3u = pathlib.Path (file_m3u)
-if not ( path_m3u.exists () ):
-    print ("#")
-    print ("# ERROR: m3u file could not be downloaded!")
+    print ("#  downloaded segments are kept in %s," % (file_aac_part) )
+    print ("#  and running the same command again resumes the download.")
     print ("#")
     sys.exit ()
-else:
-    with open (file_aaclist, 'w') as aaclist:
-        with open (file_m3u, 'r') as fh:
-            #command_fetch_aac = "%s %s" % (command_curl, opt_curl)
-            for line in fh:
-                if (line[0] == '#'):
-                    continue
-                if (line[0:5] == 'https'):
-                    pattern_YYYYMMDD_hhmmss \
-                        = re.compile ('(\d{8}_\d{6})')
-                    match_YYYYMMDD_hhmmss \
-                        = re.search (pattern_YYYYMMDD_hhmmss, line)
-                    if (match_YYYYMMDD_hhmmss):
-                        segment_name = match_YYYYMMDD_hhmmss.group (1)
-                        file_segment = "%s/%s.aac" % (dir_tmp, segment_name)
-                        #command_fetch_aac = "%s -o %s %s" \
-                        #    % (command_fetch_aac, file_segment, line.rstrip() )
-                        #time.sleep (sleep_time)
-                        command_fetch_aac = "%s %s -o %s %s" \
-                            % (command_curl, opt_curl, file_segment, \
-                               line.rstrip () )
-                        subprocess.run (command_fetch_aac, shell=True)
-                        filename = "file '%s'\n" % (file_segment)
-                        aaclist.write (filename)
-        aaclist.flush ()
-    #print (command_fetch_aac)
-    #subprocess.run (command_fetch_aac, shell=True)
-
-# concatenate AAC files
-
-command_concatenate_aac = "%s -f concat -safe 0 -i %s -vn -acodec copy %s" \
-    % (command_ffmpeg, file_aaclist, file_aac_tmp)
-
-print (command_concatenate_aac)
 
 if (verbosity):
     print ("#")
-    print ("# Now, concatenating AAC files...")
+    print ("# Finished fetching AAC files!")
     print ("#")
-    print ("#  COMMAND: %s" % (command_concatenate_aac) )
+    print ("#  %d segments, %d byte" % (n_segments, n_bytes) )
     print ("#")
 
-time.sleep (sleep_time)
-subprocess.run (command_concatenate_aac, shell=True)
-
-if (verbosity):
-    print ("#")
-    print ("# Finished concatenating AAC files!")
-    print ("#")
-    print ("#  COMMAND: %s" % (command_concatenate_aac) )
-    print ("#")
+# moving AAC file into data directory
 
-# copying AAC file
+radio_metrics.add (job_metrics, bytes=n_bytes, segments=n_segments)
+radio_metrics.start_phase (job_metrics, 'finalise')
 
-path_aac_tmp = pathlib.Path (file_aac_tmp)
-path_aac     = pathlib.Path (file_aac)
+path_aac = pathlib.Path (file_aac)
 
 if not ( path_aac.exists () ):
     size_old = 0
 else:
     size_old = path_aac.stat ().st_size
 
-if not ( path_aac_tmp.exists () ):
-    size_new = 0
-else:
-    size_new = path_aac_tmp.stat ().st_size
-
 if (verbosity):
     print ("#")
     print ("# Sizes of AAC files")
     print ("#")
     print ("# old file: %10d byte" % size_old)
-    print ("# new file: %10d byte" % size_new)
+    print ("# new file: %10d byte" % n_bytes)
     print ("#")
-    
-if not ( ( path_aac.exists () ) and (size_old >= size_new) ):
+
+if (radio_hls.finalise (file_aac_part, file_aac)):
     if (verbosity):
         print ("#")
-        print ("# Now, copying AAC file...")
+        print ("# Finished moving AAC file!")
         print ("#")
-        print ("#  %s ==> %s" % (file_aac_tmp, file_aac) )
-        print ("#")
-    shutil.copy2 (path_aac_tmp, path_aac)
-    if (verbosity):
-        print ("#")
-        print ("# Finished copying AAC file!")
+        print ("#  %s ==> %s" % (file_aac_part, file_aac) )
         print ("#")
 
-# deleting AAC files
-list_aac_files = path_tmp.glob ('*.aac')
-for path_aac_for_delete in list_aac_files:
-    if (path_aac_for_delete.exists ()):
-        path_aac_for_delete.unlink ()
+record_metrics = radio_metrics.finish (job_metrics)
+if (verbosity):
+    radio_metrics.print_record (record_metrics)
+    radio_http.print_metrics ()
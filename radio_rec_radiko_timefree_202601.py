@@ -40,6 +40,9 @@ import argparse
 # importing datetime module
 import datetime
 
+# importing http.client module
+import http.client
+
 # importing os module
 import os
 
@@ -52,15 +55,21 @@ import pathlib
 # importing subprocess module
 import subprocess
 
-# importing re module
-import re
-
-# importing shutil module
-import shutil
-
 # importing time module
 import time
 
+# importing radio_radiko_auth module
+import radio_radiko_auth
+
+# importing radio_hls module
+import radio_hls
+
+# importing radio_http module
+import radio_http
+
+# importing radio_metrics module
+import radio_metrics
+
 ######################################################################
 
 #
@@ -68,7 +77,7 @@ import time
 #
 
 # user agent name
-user_agent = 'Mozilla/5.0 (X11; NetBSD x86_64; rv:140.0) Gecko/20100101 Firefox/140.0'
+user_agent = radio_http.user_agent
 
 # day of week
 num2dow = [ 'Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun' ]
@@ -83,30 +92,11 @@ dow2num = {
     }
 
 # commands
-command_dd     = '/bin/dd'
-command_base64 = '/usr/pkg/bin/base64'
-command_curl   = '/usr/pkg/bin/curl'
-opt_curl       = f'--insecure --user-agent "{user_agent}"'
 command_ffmpeg = '/usr/pkg/bin/ffmpeg'
 opt_ffmpeg_1   = f"-http_seekable 0 -seekable 0 -headers 'User-Agent: {user_agent}'"
 opt_ffmpeg_2   = '-acodec copy -bsf:a aac_adtstoasc'
 
-# list of commands for this script
-list_command = [ command_base64, command_curl, command_ffmpeg ]
-
-# existence check of commands
-for command in list_command:
-    path_command = pathlib.Path (command)
-    if not ( path_command.exists () ):
-        print ("#")
-        print ("# ERROR: command %s does not exist!" % (command) )
-        print ("#")
-        sys.exit ()
-
 # URLs
-url_player   = 'https://radiko.jp/apps/js/playerCommon.js'
-url_auth1    = 'https://radiko.jp/v2/api/auth1'
-url_auth2    = 'https://radiko.jp/v2/api/auth2?radiko_session='
 #url_playlist = 'https://radiko.jp/v2/api/ts/playlist.m3u8'
 url_playlist = 'https://tf-f-rpaa-radiko.smartstream.ne.jp/tf/playlist.m3u8'
 
@@ -166,6 +156,8 @@ default_endtime   = f'19:00'
 default_verbose   = 0
 default_sleeptime = 1
 default_timezone  = +9.0
+default_area      = f''
+default_jobs      = radio_hls.default_workers
 
 # help messages
 help_channel   = f'radio channel code (default: FMT)'
@@ -176,6 +168,10 @@ help_endtime   = f'end time (JST) of program in HH:MM format (default: 19:00)'
 help_verbose   = f'versobity level (default: 0)'
 help_sleeptime = f'sleep time before executing shell command (default: 1)'
 help_timezone  = f'timezone (default: +9.0)'
+help_area      = f'area ID of cached authtoken (default: last authenticated area)'
+help_reauth    = f'discarding cached authtoken and authenticating again'
+help_jobs      = f'number of concurrent segment downloads (default: {default_jobs}, max: {radio_hls.max_workers})'
+help_ffmpeg    = f'fetching HLS stream using ffmpeg instead of built-in downloader'
 
 # adding arguments
 parser.add_argument ('-c', '--channel', \
@@ -199,6 +195,16 @@ parser.add_argument ('-l', '--sleeptime', \
 parser.add_argument ('-z', '--timezone', \
                      default=default_timezone, \
                      help=help_timezone)
+parser.add_argument ('-a', '--area', \
+                     default=default_area, \
+                     help=help_area)
+parser.add_argument ('-A', '--reauth', action='store_true', \
+                     help=help_reauth)
+parser.add_argument ('-j', '--jobs', type=int, \
+                     default=default_jobs, \
+                     help=help_jobs)
+parser.add_argument ('-F', '--ffmpeg', action='store_true', \
+                     help=help_ffmpeg)
 parser.add_argument ('-v', '--verbose', action='count', \
                      default=default_verbose, \
                      help=help_verbose)
@@ -214,8 +220,28 @@ time_start = args.start
 time_end   = args.end
 sleeptime  = args.sleeptime
 timezone   = args.timezone
+area       = args.area
+reauth     = args.reauth
+jobs       = min (max (args.jobs, 1), radio_hls.max_workers)
+use_ffmpeg = args.ffmpeg
 verbosity  = args.verbose
 
+# list of commands for this script
+#  ffmpeg is needed only when it fetches the stream
+if (use_ffmpeg):
+    list_command = [ command_ffmpeg ]
+else:
+    list_command = []
+
+# existence check of commands
+for command in list_command:
+    path_command = pathlib.Path (command)
+    if not ( path_command.exists () ):
+        print ("#")
+        print ("# ERROR: command %s does not exist!" % (command) )
+        print ("#")
+        sys.exit ()
+
 ######################################################################
 
 #
@@ -233,6 +259,9 @@ if (verbosity):
     print (f'#  time_end   = "{time_end}"')
     print (f'#  sleeptime  = "{sleeptime}"')
     print (f'#  timezone   = "{timezone}"')
+    print (f'#  area       = "{area}"')
+    print (f'#  jobs       = "{jobs}"')
+    print (f'#  use_ffmpeg = "{use_ffmpeg}"')
     print (f'#  verbosity  = "{verbosity}"')
     print (f'#')
 
@@ -304,6 +333,11 @@ datetime_end = "%04d%02d%02d%02d%02d%02d" \
     % (end_YYYY, end_MM, end_DD, \
        int (time_end_hh), int (time_end_mm), 0)
 
+# duration of the program in second, for bandwidth in metrics
+duration_sec = (datetime.datetime.strptime (datetime_end, '%Y%m%d%H%M%S') \
+                - datetime.datetime.strptime (datetime_start, \
+                                              '%Y%m%d%H%M%S')).total_seconds ()
+
 if (verbosity):
     print (f'#')
     print (f'# Date/time now')
@@ -333,36 +367,20 @@ if (verbosity):
 # Directories and files
 #
 
-# process ID
-pid = os.getpid ()
-
 # directories
 dir_home = os.environ['HOME']
 dir_data = "%s/audio/radio" % (dir_home)
-dir_tmp  = "/tmp/r%s_%06d" % (datetime_str, pid)
 
 # making directory if not exist
 path_data = pathlib.Path (dir_data)
 if not ( path_data.exists () ):
     path_data.mkdir (parents=True, exist_ok=True)
-path_tmp = pathlib.Path (dir_tmp)
-if not ( path_tmp.exists () ):
-    path_tmp.mkdir (parents=True, exist_ok=True)
 
 # files
-file_player     = "%s/player.js" % (dir_tmp)
-file_authkey    = "%s/authkey.data" % (dir_tmp)
-file_auth1      = "%s/auth1.data" % (dir_tmp)
-file_auth2      = "%s/auth2.data" % (dir_tmp)
-file_partialkey = "%s/partial_key.data" % (dir_tmp)
-file_playlist   = "%s/playlist.data" % (dir_tmp)
-file_m3u        = "%s/%s_%s_%s.m3u" \
-    % (dir_tmp, program, start_date_str, start_hhmm_str)
-file_aaclist    = "%s/aac.list" % (dir_tmp)
-file_aac_tmp    = "%s/%s_%s_%s.aac" \
-    % (dir_tmp, program, start_date_str, start_hhmm_str)
-file_aac        = "%s/%s_%s_%s.aac" \
+file_aac      = "%s/%s_%s_%s.aac" \
     % (dir_data, program, start_date_str, start_hhmm_str)
+file_aac_part = radio_hls.partial_file (file_aac)
+file_journal  = radio_hls.journal_file (channel, datetime_start, datetime_end)
 
 if (verbosity):
     print (f'#')
@@ -370,19 +388,10 @@ if (verbosity):
     print (f'#')
     print (f'#  dir_home = {dir_home}')
     print (f'#  dir_data = {dir_data}')
-    print (f'#  dir_tmp  = {dir_tmp}')
     print (f'#')
-    print (f'#  file_player     = {file_player}')
-    print (f'#  file_authkey    = {file_authkey}')
-    print (f'#  file_auth1      = {file_auth1}')
-    print (f'#  file_auth2      = {file_auth2}')
-    print (f'#  file_partialkey = {file_partialkey}')
-    print (f'#  file_playlist   = {file_playlist}')
-    print (f'#')
-    print (f'#  file_m3u     = {file_m3u}')
-    print (f'#  file_aaclist = {file_aaclist}')
-    print (f'#  file_aac_tmp = {file_aac_tmp}')
-    print (f'#  file_aac     = {file_aac}')
+    print (f'#  file_aac      = {file_aac}')
+    print (f'#  file_aac_part = {file_aac_part}')
+    print (f'#  file_journal  = {file_journal}')
     print (f'#')
 
 ######################################################################
@@ -391,263 +400,205 @@ if (verbosity):
 # fetching data
 #
 
-# fetching radiko player
-
-command_fetch_player = f'{command_curl} {opt_curl} -o {file_player} {url_player}'
+# metrics of this job, recorded even if the script stops on error
+job_metrics = radio_metrics.new_job ('timefree', \
+                                     f'{program}_{start_date_str}_{start_hhmm_str}', \
+                                     channel=channel, ft=datetime_start, \
+                                     to=datetime_end, \
+                                     duration_sec=duration_sec, \
+                                     ffmpeg=use_ffmpeg)
+radio_metrics.finish_at_exit (job_metrics)
 
-if (verbosity):
-    print (f'#')
-    print (f'# Now, fetching Radiko player...')
-    print (f'#')
-    print (f'#  COMMAND: {command_fetch_player}')
-    print (f'#')
+# authentication
 
-time.sleep (sleeptime)
-subprocess.run (command_fetch_player, shell=True)
+radio_metrics.start_phase (job_metrics, 'auth')
 
 if (verbosity):
     print (f'#')
-    print (f'# Finished fetching Radiko player!')
-    print (f'#')
-    print (f'#  COMMAND: {command_fetch_player}')
+    print (f'# Now, authenticating with radiko...')
     print (f'#')
 
-# scanning Radiko JS player
-    
-if (verbosity):
-    print (f'#')
-    print (f'# Now, scanning Radiko JS player...')
+try:
+    session = radio_radiko_auth.authenticate (area=area, force=reauth, \
+                                              verbosity=verbosity)
+except (OSError, RuntimeError, ValueError, TypeError) as error:
     print (f'#')
-    
-# player = new RadikoJSPlayer($audio[0], 'pc_html5', 'bcd151073c03b352e1ef2fd66c32209da9ca0afa', {
-pattern_authkey \
-    = re.compile ('player = new RadikoJSPlayer\(\S+,\s+\'(\S+)\',\s+\'(\S+)\',')
-    
-path_player = pathlib.Path (file_player)
-if not ( path_player.exists () ):
-    print (f'#')
-    print (f'# ERROR: radiko player could not be downloaded!')
+    print (f'# ERROR: authentication failed! ({error})')
     print (f'#')
     sys.exit ()
-else:
-    with open (file_player, 'r') as fh:
-        for line in fh:
-            match_authkey = re.search (pattern_authkey, line)
-            if (match_authkey):
-                radiko_app     = match_authkey.group (1)
-                radiko_authkey = match_authkey.group (2)
-
-if (verbosity):
-    print (f'#')
-    print (f'# Following information was obtained from radiko JS player')
-    print (f'#')
-    print (f'#  radiko_app     = {radiko_app}')
-    print (f'#  radiko_authkey = {radiko_authkey}')
-    print (f'#')
-
-# writing authkey to file
-    
-if (verbosity):
-    print (f'#')
-    print (f'# Now, writing value of authkey into a file...')
-    print (f'#')
-
-with open (file_authkey, 'w') as fh:
-    fh.write (radiko_authkey)
-
-if (verbosity):
-    print (f'#')
-    print (f'# Finished writing value of authkey into a file!')
-    print (f'#')
 
-# fetching auth1
-
-opt_curl_header1 = '--header "pragma: no-cache"'
-opt_curl_header2 = "--header \"X-Radiko-App: %s\"" % (radiko_app)
-opt_curl_header3 = '--header "X-Radiko-App-Version: 0.0.1"'
-opt_curl_header4 = '--header "X-Radiko-User: dummy_user"'
-opt_curl_header5 = '--header "X-Radiko-Device: pc"'
-opt_curl_header6 = '--header "X-Radiko-AuthToken: ___AUTHTOKEN___"'
-opt_curl_header7 = '--header "X-Radiko-PartialKey: ___PARTIALKEY___"'
-opt_curl_header8 = '--header "Content-Type: application/x-www-form-urlencoded"'
-opt_curl_header9 = '--header "Referer: https://radiko.jp/"'
-opt_curl_include = '--include'
-opt_curl_flash   = '--data "flash=1"'
-
-opt_curl_auth1 = f'{opt_curl} {opt_curl_header1} {opt_curl_header2} {opt_curl_header3} {opt_curl_header4} {opt_curl_header5} {opt_curl_include}'
-
-command_fetch_auth1 = f'{command_curl} {opt_curl_auth1} -o {file_auth1} {url_auth1}'
-
-if (verbosity):
-    print (f'#')
-    print (f'# Now, fetching auth1...')
-    print (f'#')
-    print (f'#  COMMAND: {command_fetch_auth1}')
-    print (f'#')
-
-time.sleep (sleeptime)
-subprocess.run (command_fetch_auth1, shell=True)
-
-if (verbosity):
-    print (f'#')
-    print (f'# Finished fetching auth1!')
-    print (f'#')
-    print (f'#  COMMAND: {command_fetch_auth1}')
-    print (f'#')
-
-# scanning auth1 data
-    
-# X-Radiko-AuthToken: oZSYOkBPCEYafLfqPexZiA
-# X-Radiko-KeyLength: 16
-# X-Radiko-KeyOffset: 13
-pattern_authtoken = re.compile ('X-Radiko-AuthToken:\s+(\S+)', re.IGNORECASE)
-pattern_keylength = re.compile ('X-Radiko-KeyLength:\s+(\S+)', re.IGNORECASE)
-pattern_keyoffset = re.compile ('X-Radiko-KeyOffset:\s+(\S+)', re.IGNORECASE)
-pattern_requestid = re.compile ('x-request-id:\s+(\S+)', re.IGNORECASE)
-
-path_auth1 = pathlib.Path (file_auth1)
-if not ( path_auth1.exists () ):
-    print (f'#')
-    print (f'# ERROR: auth1 file could not be downloaded!')
-    print (f'#')
-    sys.exit ()
-else:
-    with open (file_auth1, 'r') as fh:
-        for line in fh:
-            match_authtoken = re.search (pattern_authtoken, line)
-            if (match_authtoken):
-                authtoken = match_authtoken.group (1)
-            match_keylength = re.search (pattern_keylength, line)
-            if (match_keylength):
-                keylength = int ( match_keylength.group (1) )
-            match_keyoffset = re.search (pattern_keyoffset, line)
-            if (match_keyoffset):
-                keyoffset = int ( match_keyoffset.group (1) )
-            match_requestid = re.search (pattern_requestid, line)
-            if (match_requestid):
-                request_id = match_requestid.group (1)
+authtoken  = session['authtoken']
+request_id = session['request_id']
 
 if (verbosity):
     print (f'#')
-    print (f'# Information extracted from auth1 file')
+    print (f'# Finished authenticating with radiko!')
     print (f'#')
+    print (f'#  area      = {session["area"]}')
     print (f'#  authtoken = {authtoken}')
-    print (f'#  keylength = {keylength}')
-    print (f'#  keyoffset = {keyoffset}')
     print (f'#  requestid = {request_id}')
     print (f'#')
 
-# extracting partial key
-
-command_extract_partial_key = f'{command_dd} if={file_authkey} of={file_partialkey} bs=1 skip={keyoffset} count={keylength}'
-
-if (verbosity):
-    print (f'#')
-    print (f'# Now, extracting partial key...')
-    print (f'#')
-    print (f'#  COMMAND: {command_extract_partial_key}')
-    print (f'#')
-
-time.sleep (sleeptime)
-subprocess.run (command_extract_partial_key, shell=True)
-
-if (verbosity):
-    print (f'#')
-    print (f'# Finished extracting partial key!')
-    print (f'#')
-    print (f'#  COMMAND: {command_extract_partial_key}')
-    print (f'#')
-
-# encoding partial key using base64
-
-command_encode_partial_key = f'{command_base64} < {file_partialkey}'
-
-if (verbosity):
-    print (f'#')
-    print (f'# Now, encoding partial key using base64...')
-    print (f'#')
-    print (f'#  COMMAND: {command_encode_partial_key}')
-    print (f'#')
+# fetch AAC file
 
-time.sleep (sleeptime)
-result_encode_partial_key = subprocess.run (command_encode_partial_key, \
-                                            shell=True, capture_output=True)
+# URL of playlist for given request ID
+def playlist_url (request_id):
+    return (f'{url_playlist}?station_id={channel}&start_at={datetime_start}&ft={datetime_start}&end_at={datetime_end}&to={datetime_end}&preroll=0&l=15&lsid={request_id}&type=c')
 
-partialkey_value = result_encode_partial_key.stdout.decode ('utf-8')
+url_hls = playlist_url (request_id)
 
-if (verbosity):
-    print (f'#')
-    print (f'# Finished encoding partial key using base64!')
-    print (f'#')
-    print (f'#  partial key = {partialkey_value}')
-    print (f'#')
+if (use_ffmpeg):
+    command_fetch_aac = f"{command_ffmpeg} {opt_ffmpeg_1} -headers 'X-Radiko-AuthToken: {authtoken}' -f hls -i '{url_hls}' {opt_ffmpeg_2} -f adts -y -nostdin {file_aac_part}"
 
-# fetching auth2 data
+    # journal of an earlier download with built-in HLS downloader is
+    # removed, so that a later run does not resume on ffmpeg output
+    if (os.path.exists (file_journal)):
+        os.remove (file_journal)
 
-pattern_authtoken_value  = re.compile ('___AUTHTOKEN___')
-pattern_partialkey_value = re.compile ('___PARTIALKEY___')
+    if (verbosity):
+        print (f'#')
+        print (f'# Now, fetching AAC file...')
+        print (f'#')
+        print (f'#  COMMAND: {command_fetch_aac}')
+        print (f'#')
 
-opt_curl_header6 = re.sub (pattern_authtoken_value, authtoken, \
-                           opt_curl_header6)
-opt_curl_header7 = re.sub (pattern_partialkey_value, partialkey_value, \
-                           opt_curl_header7)
+    radio_metrics.start_phase (job_metrics, 'sleep')
+    time.sleep (sleeptime)
+    radio_metrics.start_phase (job_metrics, 'ffmpeg')
+    result_ffmpeg = subprocess.run (command_fetch_aac, shell=True)
+    if (result_ffmpeg.returncode != 0):
+        print (f'#')
+        print (f'# ERROR: ffmpeg failed! (exit status' \
+               + f' {result_ffmpeg.returncode})')
+        print (f'#')
+        sys.exit ()
 
-opt_curl_auth2 = f'{opt_curl} {opt_curl_header1} {opt_curl_header2} {opt_curl_header3} {opt_curl_header4} {opt_curl_header5} {opt_curl_header6} {opt_curl_header7}'
+    if (verbosity):
+        print (f'#')
+        print (f'# Finished fetching AAC file!')
+        print (f'#')
+        print (f'#  COMMAND: {command_fetch_aac}')
+        print (f'#')
+else:
+    headers_hls = {'X-Radiko-AuthToken': authtoken}
 
-command_fetch_auth2 = f'{command_curl} {opt_curl_auth2} -o {file_auth2} {url_auth2}'
+    radio_metrics.start_phase (job_metrics, 'playlist')
 
-if (verbosity):
-    print (f'#')
-    print (f'# Now, fetching auth2...')
-    print (f'#')
-    print (f'#  COMMAND: {command_fetch_auth2}')
-    print (f'#')
+    if (verbosity):
+        print (f'#')
+        print (f'# Now, fetching playlist...')
+        print (f'#')
+        print (f'#  URL: {url_hls}')
+        print (f'#')
 
-time.sleep (sleeptime)
-subprocess.run (command_fetch_auth2, shell=True)
+    # a refused authtoken is discarded, and authentication is done again
+    # once, since a cached token may have been revoked or be of another
+    # area
+    for i in range (2):
+        try:
+            # master playlist, then media playlist of the first variant
+            (status, body) = radio_hls.fetch (url_hls, headers_hls)
+            if (status in (401, 403)):
+                raise PermissionError (f'HTTP {status} for playlist')
+            if (status != 200):
+                raise RuntimeError (f'HTTP {status} for playlist')
+            playlist = radio_hls.parse_playlist (body.decode ('utf-8'), \
+                                                 url_hls)
+            url_media = url_hls
+            if (len (playlist['variants']) > 0):
+                url_media = playlist['variants'][0]['uri']
+                (status, body) = radio_hls.fetch (url_media, headers_hls)
+                if (status != 200):
+                    raise RuntimeError (f'HTTP {status} for media playlist')
+                playlist = radio_hls.parse_playlist (body.decode ('utf-8'), \
+                                                     url_media)
+            # a playlist without ENDLIST is reloaded until it is complete
+            playlist = radio_hls.complete_playlist (playlist, url_media, \
+                                                    headers_hls, \
+                                                    duration_sec)
+            break
+        except PermissionError as error:
+            if (i > 0):
+                print (f'#')
+                print (f'# ERROR: authtoken refused again! ({error})')
+                print (f'#')
+                sys.exit ()
+            if (verbosity):
+                print (f'#')
+                print (f'# authtoken refused ({error}), authenticating again...')
+                print (f'#')
+        except (OSError, RuntimeError, ValueError) as error:
+            print (f'#')
+            print (f'# ERROR: playlist could not be downloaded! ({error})')
+            print (f'#')
+            sys.exit ()
+        radio_metrics.start_phase (job_metrics, 'auth')
+        radio_radiko_auth.invalidate (session['area'])
+        try:
+            session = radio_radiko_auth.authenticate (area=session['area'], \
+                                                      force=True, \
+                                                      verbosity=verbosity)
+        except (OSError, RuntimeError, ValueError, TypeError) as error:
+            print (f'#')
+            print (f'# ERROR: authentication failed! ({error})')
+            print (f'#')
+            sys.exit ()
+        authtoken   = session['authtoken']
+        request_id  = session['request_id']
+        url_hls     = playlist_url (request_id)
+        headers_hls = {'X-Radiko-AuthToken': authtoken}
+        radio_metrics.start_phase (job_metrics, 'playlist')
+
+    list_url = [segment['uri'] for segment in playlist['segments']]
 
-if (verbosity):
-    print (f'#')
-    print (f'# Finished fetching auth2!')
-    print (f'#')
-    print (f'#  COMMAND: {command_fetch_auth2}')
-    print (f'#')
-
-# fetch AAC file
+    if (verbosity):
+        print (f'#')
+        print (f'# Now, fetching {len (list_url)} AAC files using {jobs} connections...')
+        print (f'#')
+        print (f'#  {file_aac_part}')
+        print (f'#')
 
-command_fetch_aac = f"{command_ffmpeg} {opt_ffmpeg_1} -headers 'X-Radiko-AuthToken: {authtoken}' -f hls -i '{url_playlist}?station_id={channel}&start_at={datetime_start}&ft={datetime_start}&end_at={datetime_end}&to={datetime_end}&preroll=0&l=15&lsid={request_id}&type=c' {opt_ffmpeg_2} {file_aac_tmp}"
+    radio_metrics.start_phase (job_metrics, 'download')
+    try:
+        (n_segments, n_bytes) \
+            = radio_hls.write_segments (list_url, file_aac_part, \
+                                        headers=headers_hls, workers=jobs, \
+                                        file_journal=file_journal)
+    except (http.client.HTTPException, OSError, RuntimeError, \
+            ValueError) as error:
+        print (f'#')
+        print (f'# ERROR: AAC files could not be downloaded! ({error})')
+        print (f'#')
+        print (f'#  downloaded segments are kept in {file_aac_part},')
+        print (f'#  and running the same command again resumes the download.')
+        print (f'#')
+        sys.exit ()
 
-if (verbosity):
-    print (f'#')
-    print (f'# Now, fetching AAC file...')
-    print (f'#')
-    print (f'#  COMMAND: {command_fetch_aac}')
-    print (f'#')
+    if (verbosity):
+        print (f'#')
+        print (f'# Finished fetching AAC files!')
+        print (f'#')
+        print (f'#  {n_segments} segments, {n_bytes} byte')
+        print (f'#')
 
-time.sleep (sleeptime)
-subprocess.run (command_fetch_aac, shell=True)
+    radio_metrics.add (job_metrics, segments=n_segments)
 
-if (verbosity):
-    print (f'#')
-    print (f'# Finished fetching AAC file!')
-    print (f'#')
-    print (f'#  COMMAND: {command_fetch_aac}')
-    print (f'#')
+# moving AAC file into data directory
 
-# copying AAC file
+radio_metrics.start_phase (job_metrics, 'finalise')
 
-path_aac_tmp = pathlib.Path (file_aac_tmp)
-path_aac     = pathlib.Path (file_aac)
+path_aac_part = pathlib.Path (file_aac_part)
+path_aac      = pathlib.Path (file_aac)
 
 if not ( path_aac.exists () ):
     size_old = 0
 else:
     size_old = path_aac.stat ().st_size
 
-if not ( path_aac_tmp.exists () ):
+if not ( path_aac_part.exists () ):
     size_new = 0
 else:
-    size_new = path_aac_tmp.stat ().st_size
+    size_new = path_aac_part.stat ().st_size
 
 if (verbosity):
     print (f'#')
@@ -656,22 +607,17 @@ if (verbosity):
     print (f'# old file: {size_old:10d} byte')
     print (f'# new file: {size_new:10d} byte')
     print (f'#')
-    
-if not ( ( path_aac.exists () ) and (size_old >= size_new) ):
+
+if (radio_hls.finalise (file_aac_part, file_aac)):
     if (verbosity):
         print (f'#')
-        print (f'# Now, copying AAC file...')
+        print (f'# Finished moving AAC file!')
         print (f'#')
-        print (f'#  {file_aac_tmp} ==> {file_aac}')
-        print (f'#')
-    shutil.copy2 (path_aac_tmp, path_aac)
-    if (verbosity):
-        print (f'#')
-        print (f'# Finished copying AAC file!')
+        print (f'#  {file_aac_part} ==> {file_aac}')
         print (f'#')
 
-# deleting AAC files
-list_aac_files = path_tmp.glob ('*.aac')
-for path_aac_for_delete in list_aac_files:
-    if (path_aac_for_delete.exists ()):
-        path_aac_for_delete.unlink ()
+radio_metrics.add (job_metrics, bytes=size_new)
+record_metrics = radio_metrics.finish (job_metrics)
+if (verbosity):
+    radio_metrics.print_record (record_metrics)
+    radio_http.print_metrics ()
@@ -0,0 +1,349 @@
+#!/usr/pkg/bin/python3.12
+
+#
+# Time-stamp: <2026/10/19 11:12:26 (UT+08:00) daisuke>
+#
+
+#
+# Radiko timefree batch recorder
+#
+#  the list of unrecorded programs made by radio_check_unrecorded.pl
+#  is read directly, and timefree jobs are fetched as coroutines of
+#  radio_async in one process, instead of running one script after
+#  another. The number of concurrent jobs is limited overall and per
+#  station, one radiko session is shared by all the jobs, and the
+#  aggregate throughput and the estimated time left are reported as
+#  jobs finish. An interrupted job is resumed from its journal.
+#
+# usage:
+#
+#    running radio_check_unrecorded.pl and fetching all the programs
+#    % radio_rec_timefree_batch.py -v
+#
+#    fetching programs in a list, 6 jobs at a time, 1 per station
+#    % radio_check_unrecorded.pl > list.csh
+#    % radio_rec_timefree_batch.py -l list.csh -j 6 -k 1
+#
+
+###########################################################################
+
+#
+# importing modules
+#
+
+# importing argparse module
+import argparse
+
+# importing asyncio module
+import asyncio
+
+# importing collections module
+import collections
+
+# importing os module
+import os
+
+# importing pathlib module
+import pathlib
+
+# importing subprocess module
+import subprocess
+
+# importing sys module
+import sys
+
+# importing time module
+import time
+
+# importing radio_async module
+import radio_async
+
+# importing radio_hls module
+import radio_hls
+
+# importing radio_http module
+import radio_http
+
+# importing radio_metrics module
+import radio_metrics
+
+# importing radio_radiko_auth module
+import radio_radiko_auth
+
+# importing radio_timefree module
+import radio_timefree
+
+###########################################################################
+
+###########################################################################
+
+#
+# command-line arguments analysis using argparse
+#
+
+# environmental variables
+dir_home = os.environ['HOME']
+
+# default parameters
+default_list = ''
+help_list \
+    = f'output of radio_check_unrecorded.pl, "-" for stdin' \
+    + f' (default: running radio_check_unrecorded.pl)'
+
+default_check = f'{dir_home}/bin/radio_check_unrecorded.pl'
+help_check \
+    = f'location of radio_check_unrecorded.pl (default: {default_check})'
+
+default_dir_radio = f'{dir_home}/audio/radio'
+help_dir_radio \
+    = f'directory to store recorded file (default: {default_dir_radio})'
+
+default_jobs = 4
+help_jobs    = f'max number of concurrent jobs (default: {default_jobs})'
+
+default_jobs_station = 2
+help_jobs_station \
+    = f'max number of concurrent jobs per station' \
+    + f' (default: {default_jobs_station})'
+
+default_workers = radio_hls.default_workers
+help_workers \
+    = f'number of concurrent segment downloads of each job' \
+    + f' (default: {default_workers}, max: {radio_hls.max_workers})'
+
+default_area = ''
+help_area    = f'area ID of cached authtoken (default: last authenticated area)'
+
+help_reauth = f'discarding cached authtoken and authenticating again'
+
+default_verbose = 0
+help_verbose    = f'verbosity level (default: {default_verbose})'
+
+# construction of parser object
+desc = 'Radiko timefree batch recorder'
+parser = argparse.ArgumentParser (description=desc)
+
+# adding arguments
+parser.add_argument ('-l', '--list', default=default_list, help=help_list)
+parser.add_argument ('-c', '--check', default=default_check, \
+                     help=help_check)
+parser.add_argument ('-r', '--radio-dir', default=default_dir_radio, \
+                     help=help_dir_radio)
+parser.add_argument ('-j', '--jobs', type=int, default=default_jobs, \
+                     help=help_jobs)
+parser.add_argument ('-k', '--jobs-per-station', type=int, \
+                     default=default_jobs_station, help=help_jobs_station)
+parser.add_argument ('-w', '--workers', type=int, default=default_workers, \
+                     help=help_workers)
+parser.add_argument ('-a', '--area', default=default_area, help=help_area)
+parser.add_argument ('-A', '--reauth', action='store_true', \
+                     help=help_reauth)
+parser.add_argument ('-v', '--verbose', action='count', \
+                     default=default_verbose, help=help_verbose)
+
+# command-line argument analysis
+args = parser.parse_args ()
+
+# parameters
+file_list      = args.list
+command_check  = args.check
+dir_radio      = args.radio_dir
+n_jobs         = max (args.jobs, 1)
+n_jobs_station = max (args.jobs_per_station, 1)
+n_workers      = min (max (args.workers, 1), radio_hls.max_workers)
+area           = args.area
+reauth         = args.reauth
+verbosity      = args.verbose
+
+###########################################################################
+
+###########################################################################
+
+#
+# list of jobs
+#
+
+# reading output of radio_check_unrecorded.pl
+if (file_list == '-'):
+    lines = sys.stdin.read ().splitlines ()
+elif (file_list != ''):
+    with open (file_list, 'r') as fh:
+        lines = fh.read ().splitlines ()
+else:
+    if not (pathlib.Path (command_check).exists ()):
+        print (f'The command "{command_check}" does not exist!')
+        sys.exit ()
+    result_check = subprocess.run (command_check, shell=True, \
+                                   stdout=subprocess.PIPE, text=True)
+    lines = result_check.stdout.splitlines ()
+
+# making jobs, each (station, ft, to) only once
+dic_station_jobs = collections.OrderedDict ()
+set_seen = set ()
+for line in lines:
+    entry = radio_timefree.parse_command (line)
+    if (entry is None):
+        continue
+    job = radio_timefree.new_job (entry, dir_radio)
+    key = (job['channel'], job['ft'], job['to'])
+    if (key in set_seen):
+        continue
+    set_seen.add (key)
+    dic_station_jobs.setdefault (job['channel'], []).append (job)
+
+# interleaving stations, so that the per-station limit does not hold
+# up jobs of other stations
+list_jobs = []
+while (len (list_jobs) < len (set_seen)):
+    for list_station in dic_station_jobs.values ():
+        if (len (list_station) > 0):
+            list_jobs.append (list_station.pop (0))
+
+if (len (list_jobs) == 0):
+    if (verbosity):
+        print (f'# no programs to record')
+    sys.exit ()
+
+# making directory if not exist
+path_radio = pathlib.Path (dir_radio)
+if not (path_radio.exists ()):
+    path_radio.mkdir (parents=True, exist_ok=True)
+
+###########################################################################
+
+###########################################################################
+
+#
+# functions
+#
+
+# progress of the batch
+progress = {
+    'time_start': time.monotonic (),
+    'jobs_done': 0,
+    'jobs_failed': 0,
+    'bytes': 0,
+    'audio_done': 0.0,
+    'audio_total': sum ([job['duration'] for job in list_jobs]),
+}
+
+# printing progress, with throughput and estimated time left
+#  the time left is estimated from seconds of audio fetched per second
+def print_progress (job, status):
+    time_elapsed = time.monotonic () - progress['time_start']
+    rate_bytes   = progress['bytes'] / max (time_elapsed, 1e-6)
+    rate_audio   = progress['audio_done'] / max (time_elapsed, 1e-6)
+    audio_left   = progress['audio_total'] - progress['audio_done']
+    if (rate_audio > 0.0):
+        eta = f'{audio_left / rate_audio:.0f} sec'
+    else:
+        eta = 'unknown'
+    n_finished = progress['jobs_done'] + progress['jobs_failed']
+    print (f'# [{n_finished}/{len (list_jobs)}] {status}: {job["name"]}' \
+           + f' ({job["channel"]}), total {progress["bytes"] / 1e6:.1f} MB,' \
+           + f' {rate_bytes / 1e6:.2f} MB/s,' \
+           + f' {rate_audio:.1f}x real time, ETA {eta}', flush=True)
+
+# semaphores limiting concurrent jobs per station, and in total
+#  a job takes the one of its station first, so that jobs waiting for
+#  a busy station do not hold slots which other stations could use
+dic_semaphore = {}
+state_limit = {'jobs': None}
+
+# shared radiko session, re-authenticated once when refused
+state_auth = {'session': None, 'lock': None}
+
+# re-authenticating unless another job has already done it
+async def renew_session (session_refused):
+    async with state_auth['lock']:
+        if (state_auth['session'] is session_refused):
+            await radio_async.in_thread (radio_radiko_auth.invalidate, \
+                                         session_refused['area'])
+            state_auth['session'] \
+                = await radio_async.in_thread ( \
+                    radio_radiko_auth.authenticate, \
+                    area=session_refused['area'], force=True, \
+                    verbosity=verbosity)
+            print (f'# authtoken renewed for {state_auth["session"]["area"]}')
+    return (state_auth['session'])
+
+# fetching a timefree job, limited per station
+#  time waiting for the limits is recorded as phase "wait"
+async def fetch_job (job):
+    job_metrics = radio_metrics.new_job ('timefree_batch', job['name'], \
+                                         channel=job['channel'], \
+                                         ft=job['ft'], to=job['to'], \
+                                         duration_sec=job['duration'])
+    radio_metrics.start_phase (job_metrics, 'wait')
+    async with dic_semaphore[job['channel']], state_limit['jobs']:
+        radio_metrics.end_phase (job_metrics)
+        session = state_auth['session']
+        try:
+            try:
+                (n_segments, n_bytes) \
+                    = await radio_async.in_thread (radio_timefree.fetch_job, \
+                                                   job, session, n_workers, \
+                                                   verbosity, job_metrics)
+            except PermissionError:
+                with radio_metrics.phase (job_metrics, 'auth'):
+                    session = await renew_session (session)
+                (n_segments, n_bytes) \
+                    = await radio_async.in_thread (radio_timefree.fetch_job, \
+                                                   job, session, n_workers, \
+                                                   verbosity, job_metrics)
+        except Exception as error:
+            radio_metrics.finish (job_metrics, f'failed: {error}')
+            progress['jobs_failed'] += 1
+            progress['audio_total'] -= job['duration']
+            print_progress (job, f'failed ({error})')
+            return (False)
+    record_metrics = radio_metrics.finish (job_metrics)
+    if (verbosity >= 2):
+        radio_metrics.print_record (record_metrics)
+    progress['jobs_done']  += 1
+    progress['bytes']      += n_bytes
+    progress['audio_done'] += job['duration']
+    print_progress (job, 'done')
+    return (True)
+
+# fetching all the jobs
+async def run_batch ():
+    state_auth['lock'] = asyncio.Lock ()
+    state_limit['jobs'] = asyncio.Semaphore (max (n_jobs, 1))
+    for channel in dic_station_jobs.keys ():
+        dic_semaphore[channel] = asyncio.Semaphore (n_jobs_station)
+    results = await asyncio.gather (*[fetch_job (job) for job in list_jobs], \
+                                    return_exceptions=True)
+    return (len ([result for result in results if (result is True)]))
+
+###########################################################################
+
+###########################################################################
+
+#
+# fetching programs
+#
+
+if (verbosity):
+    print (f'# {len (list_jobs)} programs on {len (dic_station_jobs)}' \
+           + f' stations, {n_jobs} jobs at a time,' \
+           + f' {n_jobs_station} per station')
+
+# one radiko session for all the jobs
+try:
+    state_auth['session'] \
+        = radio_radiko_auth.authenticate (area=area, force=reauth, \
+                                          verbosity=verbosity)
+except (OSError, RuntimeError, ValueError, TypeError) as error:
+    print (f'# ERROR: authentication failed! ({error})')
+    sys.exit ()
+
+n_fetched = radio_async.run (run_batch ())
+
+time_total = time.monotonic () - progress['time_start']
+print (f'# {n_fetched} / {len (list_jobs)} programs fetched' \
+       + f' in {time_total:.1f} sec,' \
+       + f' {progress["bytes"] / 1e6:.1f} MB,' \
+       + f' {progress["bytes"] / 1e6 / max (time_total, 1e-6):.2f} MB/s')
+if (verbosity):
+    radio_http.print_metrics ()
@@ -0,0 +1,160 @@
+#!/usr/pkg/bin/python3.12
+
+#
+# Time-stamp: <2026/10/18 23:52:30 (UT+08:00) daisuke>
+#
+
+#
+# searching reboot time between recordings
+#
+#  recordings of radio program list on the channels of given regions
+#  are merged into busy intervals, and a reboot is placed in every free
+#  gap, (3 + host number) minutes before the next recording, like
+#  radio_search_reboottime.pl, so that hosts n1, n2, ... do not reboot
+#  at the same minute. Crontab lines are printed for each host.
+#
+# usage:
+#
+#    reboot times of this host in kanto
+#    % radio_search_reboottime.py
+#
+#    reboot times of hosts n1 to n4 in kanto and kansai
+#    % radio_search_reboottime.py -r kanto,kansai -H n1,n2,n3,n4
+#
+#    radiko channels also recorded live, and at least 30-min gaps
+#    % radio_search_reboottime.py -a -g 30
+#
+
+###########################################################################
+
+#
+# importing modules
+#
+
+# importing argparse module
+import argparse
+
+# importing os module
+import os
+
+# importing socket module
+import socket
+
+# importing sys module
+import sys
+
+# importing radio_program_list module
+import radio_program_list
+
+###########################################################################
+
+###########################################################################
+
+#
+# command-line arguments analysis using argparse
+#
+
+# list of regions
+list_region = list (radio_program_list.dic_region_channels.keys ())
+
+# default parameters
+default_regions = 'kanto'
+help_regions \
+    = f'comma separated list of regions, {", ".join (list_region)}' \
+    + f' (default: {default_regions})'
+
+default_hosts = socket.gethostname ().split ('.')[0]
+help_hosts \
+    = f'comma separated list of hosts (default: {default_hosts})'
+
+default_file_program = radio_program_list.default_file_program
+help_file_program    = f'program list file (default: {default_file_program})'
+
+help_radiko = f'radiko channels of regions are also recorded live'
+
+default_gap = 0
+help_gap \
+    = f'minimum length of free gap in minute for reboot' \
+    + f' (default: {default_gap})'
+
+default_command = '/sbin/shutdown -r now'
+help_command    = f'command to reboot (default: {default_command})'
+
+default_verbose = 0
+help_verbose    = f'verbosity level (default: {default_verbose})'
+
+# construction of parser object
+desc = 'searching reboot time between recordings'
+parser = argparse.ArgumentParser (description=desc)
+
+# adding arguments
+parser.add_argument ('-r', '--regions', default=default_regions, \
+                     help=help_regions)
+parser.add_argument ('-H', '--hosts', default=default_hosts, \
+                     help=help_hosts)
+parser.add_argument ('-f', '--file', default=default_file_program, \
+                     help=help_file_program)
+parser.add_argument ('-a', '--radiko', action='store_true', \
+                     help=help_radiko)
+parser.add_argument ('-g', '--gap', type=int, default=default_gap, \
+                     help=help_gap)
+parser.add_argument ('-x', '--command', default=default_command, \
+                     help=help_command)
+parser.add_argument ('-v', '--verbose', action='count', \
+                     default=default_verbose, help=help_verbose)
+
+# command-line argument analysis
+args = parser.parse_args ()
+
+# parameters
+list_regions   = args.regions.split (',')
+list_hosts     = args.hosts.split (',')
+file_program   = args.file
+radiko         = args.radiko
+min_gap        = max (args.gap, 0)
+command_reboot = args.command
+verbosity      = args.verbose
+
+# check of regions
+for region in list_regions:
+    if not (region in list_region):
+        print (f'Unknown region "{region}"!', file=sys.stderr)
+        print (f'Choose from {", ".join (list_region)}.', file=sys.stderr)
+        sys.exit ()
+
+# check of program list file
+if not (os.path.exists (file_program)):
+    print (f'Cannot find the file "{file_program}"!', file=sys.stderr)
+    sys.exit ()
+
+###########################################################################
+
+###########################################################################
+
+#
+# searching reboot time
+#
+
+# headers are printed for more than one region or host
+print_header = (len (list_regions) > 1) or (len (list_hosts) > 1) \
+    or (verbosity > 0)
+
+# busy intervals of each region, shared by all the hosts
+for region in list_regions:
+    channels  = radio_program_list.region_channels ([region], radiko)
+    compiled  = radio_program_list.load_compiled (file_program, channels)
+    intervals = radio_program_list.busy_intervals (compiled['recs'])
+    if (print_header):
+        print (f'# {region}: {len (compiled["recs"])} recordings,' \
+               + f' {len (intervals)} busy intervals')
+    for host in list_hosts:
+        margin = radio_program_list.margin_restart \
+            + radio_program_list.host_number (host)
+        list_minute = radio_program_list.reboot_minutes (intervals, margin, \
+                                                         min_gap)
+        if (print_header):
+            print (f'# {host}: restart margin {margin} min,' \
+                   + f' {len (list_minute)} reboots')
+        for minute in list_minute:
+            (wday, hh, mm) = radio_program_list.clock (minute)
+            print (f'{mm:02d} {hh:02d} * * {wday:01d} {command_reboot}')
@@ -0,0 +1,250 @@
+#
+# Time-stamp: <2026/10/19 00:24:13 (UT+08:00) daisuke>
+#
+
+######################################################################
+#                                                                    #
+# Sharding of program list over recording hosts                     #
+#                                                                    #
+#  programs of radio_program_list.txt, each being a pair of channel  #
+#  and program name, are placed on a hash ring of hosts, so that     #
+#  adding or removing a host moves only the programs of its part of  #
+#  the ring. A host takes a program only while its predicted         #
+#  bandwidth and CPU stay within its share of the total, and an      #
+#  important program is placed on more than one host.                #
+#                                                                    #
+#  bandwidth is in bytes per second of audio, and CPU is in CPU      #
+#  seconds per second of audio. Loads are totals over the week.      #
+#                                                                    #
+######################################################################
+
+######################################################################
+
+#
+# Importing modules
+#
+
+# importing bisect module
+import bisect
+
+# importing hashlib module
+import hashlib
+
+# importing json module
+import json
+
+# importing radio_program_list module
+import radio_program_list
+
+######################################################################
+
+#
+# Constants
+#
+
+# number of points of a host of weight 1 on the hash ring
+default_vnodes = 64
+
+# allowed load of a host above its share, 0.25 for 125 %
+default_epsilon = 0.25
+
+# number of hosts recording an important program
+default_replicas = 2
+
+# predicted bandwidth, 48 kbit/s AAC
+default_bandwidth = 6000.0
+
+# predicted CPU, NHK live recording following playlist and demuxing
+# MPEG-TS, and radiko timefree download writing ADTS as it is
+default_cpu_nhk    = 0.010
+default_cpu_radiko = 0.005
+
+# dimensions of load
+list_dim = ['bandwidth', 'cpu']
+
+######################################################################
+
+#
+# Functions
+#
+
+# point on hash ring of given string
+def hash_point (text):
+    digest = hashlib.sha1 (text.encode ('utf-8')).digest ()
+    return (int.from_bytes (digest[:8], 'big'))
+
+# hash ring of hosts
+#  a host of weight w has w times default number of points
+def make_ring (dic_weight, vnodes=default_vnodes):
+    list_point = []
+    for (host, weight) in dic_weight.items ():
+        for i in range (max (int (round (vnodes * weight)), 1)):
+            list_point.append ((hash_point (f'{host}#{i}'), host))
+    list_point.sort ()
+    ring = {
+        'points': [point for (point, host) in list_point],
+        'hosts': [host for (point, host) in list_point],
+    }
+    return (ring)
+
+# distinct hosts in the order met going clockwise from key on ring
+def ring_hosts (ring, key):
+    list_host = []
+    n_host = len (set (ring['hosts']))
+    i = bisect.bisect_left (ring['points'], hash_point (key))
+    for j in range (len (ring['points'])):
+        host = ring['hosts'][(i + j) % len (ring['points'])]
+        if (host not in list_host):
+            list_host.append (host)
+            if (len (list_host) == n_host):
+                break
+    return (list_host)
+
+# key of program, all the days of a program going to the same hosts
+def program_key (rec):
+    return (f'{rec["channel"]} {rec["program"]}')
+
+# bytes per second of audio of each channel measured in metrics file
+#  records of radio_metrics with channel, bytes and duration_sec are
+#  averaged, and channels without records are not returned
+def measured_bandwidth (file_metrics):
+    dic_sum = {}
+    try:
+        with open (file_metrics, 'r') as fh:
+            for line in fh:
+                try:
+                    record = json.loads (line)
+                except ValueError:
+                    continue
+                if not ( (record.get ('status') == 'ok') \
+                         and (record.get ('channel')) \
+                         and (record.get ('duration_sec', 0) > 0) \
+                         and (record.get ('bytes', 0) > 0) ):
+                    continue
+                (n_bytes, sec) = dic_sum.get (record['channel'], (0, 0.0))
+                dic_sum[record['channel']] \
+                    = (n_bytes + record['bytes'], sec + record['duration_sec'])
+    except OSError:
+        return ({})
+    return ({channel: n_bytes / sec \
+             for (channel, (n_bytes, sec)) in dic_sum.items ()})
+
+# predicted cost of a recording, as bytes and CPU seconds
+def recording_cost (rec, dic_bandwidth={}):
+    sec = rec['duration'] * 60
+    if (rec['channel'] in radio_program_list.list_channel_nhk):
+        cpu = default_cpu_nhk
+    else:
+        cpu = default_cpu_radiko
+    cost = {
+        'bandwidth': sec * dic_bandwidth.get (rec['channel'], \
+                                              default_bandwidth),
+        'cpu': sec * cpu,
+    }
+    return (cost)
+
+# programs with their recordings and costs over the week
+def program_costs (list_rec, dic_bandwidth={}):
+    dic_program = {}
+    for rec in list_rec:
+        key = program_key (rec)
+        if (key not in dic_program):
+            dic_program[key] = {'program': rec['program'], 'recs': [], \
+                                'bandwidth': 0.0, 'cpu': 0.0}
+        dic_program[key]['recs'].append (rec)
+        cost = recording_cost (rec, dic_bandwidth)
+        for dim in list_dim:
+            dic_program[key][dim] += cost[dim]
+    return (dic_program)
+
+# assigning programs to hosts
+#  programs are taken from the largest, and each goes to the first
+#  hosts clockwise from it on the ring whose loads stay within
+#  (1 + epsilon) times their share. When no host has room, the least
+#  loaded ones relative to their weights are taken. A dictionary of
+#  program key to list of hosts is returned.
+def assign (dic_program, dic_weight, important=[], \
+            replicas=default_replicas, epsilon=default_epsilon, \
+            vnodes=default_vnodes):
+    ring = make_ring (dic_weight, vnodes)
+    weight_total = sum (dic_weight.values ())
+    dic_replicas = {key: (min (replicas, len (dic_weight)) \
+                          if (program['program'] in important) else 1) \
+                    for (key, program) in dic_program.items ()}
+    total = {dim: sum ([program[dim] * dic_replicas[key] \
+                        for (key, program) in dic_program.items ()]) \
+             for dim in list_dim}
+    capacity = {host: {dim: (1.0 + epsilon) * total[dim] * weight \
+                       / weight_total for dim in list_dim} \
+                for (host, weight) in dic_weight.items ()}
+    load = {host: {dim: 0.0 for dim in list_dim} \
+            for host in dic_weight.keys ()}
+
+    # relative load of host
+    def relative (host):
+        return (max ([load[host][dim] / capacity[host][dim] \
+                      for dim in list_dim if (capacity[host][dim] > 0.0)] \
+                     + [0.0]))
+
+    plan = {}
+    list_key = sorted (dic_program.keys (), \
+                       key=lambda key: (-dic_program[key]['bandwidth'], key))
+    for key in list_key:
+        program = dic_program[key]
+        list_candidate = ring_hosts (ring, key)
+        list_host = [host for host in list_candidate \
+                     if all ([load[host][dim] + program[dim] \
+                              <= capacity[host][dim] \
+                              for dim in list_dim])][:dic_replicas[key]]
+        if (len (list_host) < dic_replicas[key]):
+            list_rest = sorted ([host for host in list_candidate \
+                                 if (host not in list_host)], key=relative)
+            list_host += list_rest[:dic_replicas[key] - len (list_host)]
+        for host in list_host:
+            for dim in list_dim:
+                load[host][dim] += program[dim]
+        plan[key] = list_host
+    return (plan)
+
+# peak bandwidth and number of recordings at the same time
+#  recordings over the end of the week are split, as busy intervals
+def peak_concurrent (list_rec, dic_bandwidth={}):
+    list_event = []
+    for rec in list_rec:
+        rate = dic_bandwidth.get (rec['channel'], default_bandwidth)
+        (start, end) = (rec['start'], rec['start'] + rec['duration'])
+        list_span = [(start, min (end, radio_program_list.minutes_week))]
+        if (end > radio_program_list.minutes_week):
+            list_span.append ((0, end - radio_program_list.minutes_week))
+        for (span_start, span_end) in list_span:
+            list_event.append ((span_start, 1, rate))
+            list_event.append ((span_end, -1, -rate))
+    list_event.sort ()
+    (n_now, rate_now, n_peak, rate_peak) = (0, 0.0, 0, 0.0)
+    for (minute, step, rate) in list_event:
+        n_now    += step
+        rate_now += rate
+        n_peak    = max (n_peak, n_now)
+        rate_peak = max (rate_peak, rate_now)
+    return (n_peak, rate_peak)
+
+# recordings of each host in given plan
+def host_recordings (plan, dic_program, hosts):
+    dic_host_rec = {host: [] for host in hosts}
+    for (key, list_host) in plan.items ():
+        for host in list_host:
+            dic_host_rec[host] += dic_program[key]['recs']
+    return (dic_host_rec)
+
+# lines of program list file for programs of given keys
+#  comments and lines of other programs are dropped, and a line of a
+#  program is kept as it is, with all its days of week
+def program_list_lines (file_program, keys):
+    lines = []
+    with open (file_program, 'r') as fh:
+        for line in fh:
+            programs = radio_program_list.parse_line (line)
+            if ( (len (programs) > 0) \
+                 and (program_key (programs[0]) in keys) ):
+                lines.append (line.rstrip ('\n'))
+    return (lines)
@@ -0,0 +1,277 @@
+#!/usr/pkg/bin/python3.12
+
+#
+# Time-stamp: <2026/10/19 00:47:36 (UT+08:00) daisuke>
+#
+
+#
+# planning shards of radio program list over recording hosts
+#
+#  programs of ~/share/radio/radio_program_list.txt are assigned to
+#  hosts by radio_shard, with consistent hashing bounded by predicted
+#  bandwidth and CPU, and important programs on more than one host.
+#  Each host then records only its own programs, from the program list
+#  made for it, instead of running the whole schedule. Bandwidth of
+#  channels measured in metrics file of radio_metrics is used when
+#  available.
+#
+# usage:
+#
+#    plan for hosts n1, n2 and n3, n3 having twice the capacity
+#    % radio_shard_plan.py -n n1,n2,n3:2
+#
+#    two hosts recording programs "oto" and "asa"
+#    % radio_shard_plan.py -n n1,n2,n3 -i oto,asa -R 2
+#
+#    program list of this host, for radio_rec_daemon.py -f
+#    % radio_shard_plan.py -n n1,n2,n3 -H `hostname -s` > list_local.txt
+#
+#    program lists of all hosts written into a directory
+#    % radio_shard_plan.py -n n1,n2,n3 -o ~/share/radio/shard
+#
+
+###########################################################################
+
+#
+# importing modules
+#
+
+# importing argparse module
+import argparse
+
+# importing os module
+import os
+
+# importing socket module
+import socket
+
+# importing sys module
+import sys
+
+# importing radio_metrics module
+import radio_metrics
+
+# importing radio_program_list module
+import radio_program_list
+
+# importing radio_shard module
+import radio_shard
+
+###########################################################################
+
+###########################################################################
+
+#
+# command-line arguments analysis using argparse
+#
+
+# default parameters
+default_hosts = socket.gethostname ().split ('.')[0]
+help_hosts \
+    = f'comma separated list of hosts, with optional weight after ":",' \
+    + f' e.g. n1,n2,n3:2 (default: {default_hosts})'
+
+default_file_program = radio_program_list.default_file_program
+help_file_program    = f'program list file (default: {default_file_program})'
+
+default_channels = ''
+help_channels \
+    = f'comma separated list of channels, "-" in front of channel to' \
+    + f' exclude it (default: all)'
+
+default_important = ''
+help_important \
+    = f'comma separated list of important programs (default: none)'
+
+default_file_important = ''
+help_file_important \
+    = f'file of important programs, one in a line (default: none)'
+
+default_replicas = radio_shard.default_replicas
+help_replicas \
+    = f'number of hosts recording an important program' \
+    + f' (default: {default_replicas})'
+
+default_epsilon = radio_shard.default_epsilon
+help_epsilon \
+    = f'allowed load of a host above its share (default: {default_epsilon})'
+
+default_file_metrics = radio_metrics.default_file_metrics
+help_file_metrics \
+    = f'metrics file for measured bandwidth, "" for none' \
+    + f' (default: {default_file_metrics})'
+
+default_host = ''
+help_host \
+    = f'printing program list of given host instead of summary' \
+    + f' (default: none)'
+
+default_dir_output = ''
+help_dir_output \
+    = f'directory to write program lists of all hosts (default: none)'
+
+default_verbose = 0
+help_verbose    = f'verbosity level (default: {default_verbose})'
+
+# construction of parser object
+desc = 'planning shards of radio program list over recording hosts'
+parser = argparse.ArgumentParser (description=desc)
+
+# adding arguments
+parser.add_argument ('-n', '--hosts', default=default_hosts, \
+                     help=help_hosts)
+parser.add_argument ('-f', '--file', default=default_file_program, \
+                     help=help_file_program)
+parser.add_argument ('-c', '--channels', default=default_channels, \
+                     help=help_channels)
+parser.add_argument ('-i', '--important', default=default_important, \
+                     help=help_important)
+parser.add_argument ('-I', '--important-file', \
+                     default=default_file_important, \
+                     help=help_file_important)
+parser.add_argument ('-R', '--replicas', type=int, \
+                     default=default_replicas, help=help_replicas)
+parser.add_argument ('-e', '--epsilon', type=float, \
+                     default=default_epsilon, help=help_epsilon)
+parser.add_argument ('-m', '--metrics', default=default_file_metrics, \
+                     help=help_file_metrics)
+parser.add_argument ('-H', '--host', default=default_host, help=help_host)
+parser.add_argument ('-o', '--output', default=default_dir_output, \
+                     help=help_dir_output)
+parser.add_argument ('-v', '--verbose', action='count', \
+                     default=default_verbose, help=help_verbose)
+
+# command-line argument analysis
+args = parser.parse_args ()
+
+# parameters
+str_hosts      = args.hosts
+file_program   = args.file
+str_channels   = args.channels
+str_important  = args.important
+file_important = args.important_file
+n_replicas     = max (args.replicas, 1)
+epsilon        = max (args.epsilon, 0.0)
+file_metrics   = args.metrics
+host_print     = args.host
+dir_output     = args.output
+verbosity      = args.verbose
+
+# hosts and their weights
+dic_weight = {}
+for item in str_hosts.split (','):
+    (host, sep, weight) = item.partition (':')
+    try:
+        dic_weight[host] = float (weight) if (sep) else 1.0
+    except ValueError:
+        print (f'Invalid weight of host "{item}"!', file=sys.stderr)
+        sys.exit ()
+    if (dic_weight[host] <= 0.0):
+        print (f'Weight of host "{host}" must be positive!', file=sys.stderr)
+        sys.exit ()
+
+if ( (host_print != '') and (host_print not in dic_weight) ):
+    print (f'Host "{host_print}" is not in {",".join (dic_weight.keys ())}!', \
+           file=sys.stderr)
+    sys.exit ()
+
+# channels
+if (str_channels != ''):
+    list_channels = str_channels.split (',')
+else:
+    list_channels = []
+
+# important programs
+list_important = [program for program in str_important.split (',') \
+                  if (program != '')]
+if (file_important != ''):
+    with open (file_important, 'r') as fh:
+        list_important += [line.strip () for line in fh \
+                           if ( (line.strip () != '') \
+                                and not (line.startswith ('#')) )]
+
+# check of program list file
+if not (os.path.exists (file_program)):
+    print (f'Cannot find the file "{file_program}"!', file=sys.stderr)
+    sys.exit ()
+
+###########################################################################
+
+###########################################################################
+
+#
+# planning
+#
+
+compiled = radio_program_list.load_compiled (file_program, list_channels)
+if (file_metrics != ''):
+    dic_bandwidth = radio_shard.measured_bandwidth (file_metrics)
+else:
+    dic_bandwidth = {}
+dic_program = radio_shard.program_costs (compiled['recs'], dic_bandwidth)
+plan = radio_shard.assign (dic_program, dic_weight, list_important, \
+                           n_replicas, epsilon)
+
+# keys of programs of each host
+dic_host_keys = {host: set () for host in dic_weight.keys ()}
+for (key, list_host) in plan.items ():
+    for host in list_host:
+        dic_host_keys[host].add (key)
+
+###########################################################################
+
+###########################################################################
+
+#
+# output
+#
+
+# program list of one host
+if (host_print != ''):
+    for line in radio_shard.program_list_lines (file_program, \
+                                                dic_host_keys[host_print]):
+        print (line)
+    sys.exit ()
+
+# program lists of all hosts
+if (dir_output != ''):
+    os.makedirs (dir_output, exist_ok=True)
+    for (host, keys) in dic_host_keys.items ():
+        file_host = os.path.join (dir_output, f'radio_program_list_{host}.txt')
+        file_tmp  = f'{file_host}.tmp'
+        with open (file_tmp, 'w') as fh:
+            fh.write (f'# programs of {host} planned by radio_shard_plan.py\n')
+            for line in radio_shard.program_list_lines (file_program, keys):
+                fh.write (f'{line}\n')
+        os.replace (file_tmp, file_host)
+        if (verbosity):
+            print (f'# {file_host}: {len (keys)} programs')
+
+# summary
+if (len (dic_bandwidth) > 0):
+    print (f'# measured bandwidth of {len (dic_bandwidth)} channels' \
+           + f' from {file_metrics}')
+print (f'# {len (dic_program)} programs, {len (compiled["recs"])}' \
+       + f' recordings, {len (list_important)} important programs' \
+       + f' on {min (n_replicas, len (dic_weight))} hosts')
+print (f'# {"host":12s} {"weight":>6s} {"prog":>5s} {"rec":>5s}' \
+       + f' {"hour/wk":>8s} {"MB/wk":>8s} {"CPU h/wk":>8s}' \
+       + f' {"peak":>5s} {"kB/s":>7s}')
+dic_host_rec = radio_shard.host_recordings (plan, dic_program, \
+                                            dic_weight.keys ())
+for (host, list_rec) in dic_host_rec.items ():
+    hours = sum ([rec['duration'] for rec in list_rec]) / 60.0
+    n_bytes = 0.0
+    cpu_sec = 0.0
+    for rec in list_rec:
+        cost = radio_shard.recording_cost (rec, dic_bandwidth)
+        n_bytes += cost['bandwidth']
+        cpu_sec += cost['cpu']
+    (n_peak, rate_peak) = radio_shard.peak_concurrent (list_rec, dic_bandwidth)
+    print (f'  {host:12s} {dic_weight[host]:6.1f}' \
+           + f' {len (dic_host_keys[host]):5d} {len (list_rec):5d}' \
+           + f' {hours:8.1f} {n_bytes / 1e6:8.1f} {cpu_sec / 3600.0:8.3f}' \
+           + f' {n_peak:5d} {rate_peak / 1e3:7.1f}')
+if (verbosity >= 2):
+    for key in sorted (plan.keys ()):
+        print (f'#    {key:40s} {",".join (plan[key])}')
@@ -0,0 +1,200 @@
+#
+# Time-stamp: <2026/10/18 20:58:41 (UT+08:00) daisuke>
+#
+
+######################################################################
+#                                                                    #
+# Radiko timefree jobs                                               #
+#                                                                    #
+#  a timefree job is one program on one station, identified by its   #
+#  start and end (ft, to) in JST. Jobs are read from the output of   #
+#  radio_check_unrecorded.pl and fetched with the built-in HLS       #
+#  downloader, resuming from the journal of an earlier attempt.      #
+#  Used by radio_rec_timefree_batch.py.                              #
+#                                                                    #
+######################################################################
+
+######################################################################
+
+#
+# Importing modules
+#
+
+# importing datetime module
+import datetime
+
+# importing os module
+import os
+
+# importing re module
+import re
+
+# importing radio_hls module
+import radio_hls
+
+# importing radio_metrics module
+import radio_metrics
+
+######################################################################
+
+#
+# Constants
+#
+
+# URL of timefree playlist
+url_playlist = 'https://tf-f-rpaa-radiko.smartstream.ne.jp/tf/playlist.m3u8'
+
+# time zone of radiko
+timezone = +9.0
+
+# day of week, Sunday being zero
+dow2num = {
+    'Sun': 0,
+    'Mon': 1,
+    'Tue': 2,
+    'Wed': 3,
+    'Thu': 4,
+    'Fri': 5,
+    'Sat': 6,
+}
+
+# options of timefree command in output of radio_check_unrecorded.pl
+#  e.g. radio_rec_radiko_timefree_202601.py -v -c FMT -w Fri
+#       -s 18:27 -e 19:03 -p lifestylemuseum
+pattern_command = re.compile (r'-c\s+(\S+)\s+-w\s+(\S+)\s+-s\s+(\d+:\d+)' \
+                              + r'\s+-e\s+(\d+:\d+)\s+-p\s+([^\s"\']+)')
+
+######################################################################
+
+#
+# Functions
+#
+
+# parsing a line of output of radio_check_unrecorded.pl
+#  a dictionary of channel, day of week, start, end and program is
+#  returned, or None if the line is not a timefree command
+def parse_command (line):
+    match = pattern_command.search (line)
+    if not (match):
+        return (None)
+    (channel, dayofweek, time_start, time_end, program) = match.groups ()
+    if not (dayofweek in dow2num):
+        return (None)
+    entry = {
+        'channel': channel,
+        'dayofweek': dayofweek,
+        'start': time_start,
+        'end': time_end,
+        'program': program,
+    }
+    return (entry)
+
+# start and end of the latest broadcast of a weekly program
+#  same rule as radio_rec_radiko_timefree_202601.py: a program of today
+#  is taken only if it has already finished, otherwise last week's one.
+#  Naive date/time objects in JST are returned.
+def program_datetimes (dayofweek, time_start, time_end, datetime_now=None):
+    if (datetime_now is None):
+        datetime_now = datetime.datetime.now (datetime.timezone.utc)
+    datetime_lt = datetime_now.astimezone (datetime.timezone.utc) \
+        .replace (tzinfo=None) + datetime.timedelta (hours=timezone)
+    minute_now = datetime_lt.hour * 60 + datetime_lt.minute \
+        + datetime_lt.second / 60.0
+    (start_hh, start_mm) = [int (x) for x in time_start.split (':')]
+    (end_hh, end_mm)     = [int (x) for x in time_end.split (':')]
+    minute_start = start_hh * 60 + start_mm
+    minute_end   = end_hh * 60 + end_mm
+    dayofweek_now = (datetime_lt.weekday () + 1) % 7
+    if (dow2num[dayofweek] == dayofweek_now):
+        if ( (minute_start <= minute_now) and (minute_now > minute_end) ):
+            day_offset = 0
+        else:
+            day_offset = -7
+    else:
+        day_offset = dow2num[dayofweek] - dayofweek_now
+        if (day_offset > 0):
+            day_offset -= 7
+    date_start = datetime_lt.date () + datetime.timedelta (days=day_offset)
+    datetime_start = datetime.datetime.combine (date_start, \
+                                                datetime.time (start_hh, \
+                                                               start_mm))
+    datetime_end   = datetime.datetime.combine (date_start, \
+                                                datetime.time (end_hh, end_mm))
+    if (minute_start >= minute_end):
+        datetime_end += datetime.timedelta (days=1)
+    return (datetime_start, datetime_end)
+
+# new timefree job from parsed command
+#  the file name is the same as the one of radio_rec_radiko_timefree*.py
+def new_job (entry, dir_radio, datetime_now=None):
+    (datetime_start, datetime_end) \
+        = program_datetimes (entry['dayofweek'], entry['start'], \
+                             entry['end'], datetime_now)
+    ft = datetime_start.strftime ('%Y%m%d%H%M%S')
+    to = datetime_end.strftime ('%Y%m%d%H%M%S')
+    name = f'{entry["program"]}_{datetime_start.strftime ("%Y%m%d_%H%M")}'
+    file_aac = os.path.join (dir_radio, f'{name}.aac')
+    job = {
+        'name': name,
+        'channel': entry['channel'],
+        'ft': ft,
+        'to': to,
+        'duration': (datetime_end - datetime_start).total_seconds (),
+        'file_aac': file_aac,
+        'file_aac_part': radio_hls.partial_file (file_aac),
+        'file_journal': radio_hls.journal_file (entry['channel'], ft, to),
+    }
+    return (job)
+
+# URL of timefree playlist of a job
+def playlist_url (job, request_id):
+    url = f'{url_playlist}?station_id={job["channel"]}' \
+        + f'&start_at={job["ft"]}&ft={job["ft"]}' \
+        + f'&end_at={job["to"]}&to={job["to"]}' \
+        + f'&preroll=0&l=15&lsid={request_id}&type=c'
+    return (url)
+
+# fetching playlist, raising PermissionError if authtoken is refused
+def fetch_playlist (url, headers):
+    (status, body) = radio_hls.fetch (url, headers)
+    if (status in (401, 403)):
+        raise PermissionError (f'HTTP {status} for {url}')
+    if (status != 200):
+        raise RuntimeError (f'HTTP {status} for {url}')
+    return (radio_hls.parse_playlist (body.decode ('utf-8'), url))
+
+# fetching a timefree job with given radiko session
+#  segments are written into the partial file and checkpointed, so a
+#  job interrupted earlier is resumed. Number of segments and bytes
+#  are returned, and the partial file is moved to the archive. Phases
+#  are timed in given job of radio_metrics.
+def fetch_job (job, session, workers=radio_hls.default_workers, \
+               verbosity=0, job_metrics=None):
+    if (job_metrics is None):
+        job_metrics = radio_metrics.new_job ('timefree', job['name'], \
+                                             channel=job['channel'], \
+                                             duration_sec=job['duration'])
+    headers  = {'X-Radiko-AuthToken': session['authtoken']}
+    with radio_metrics.phase (job_metrics, 'playlist'):
+        url      = playlist_url (job, session['request_id'])
+        playlist = fetch_playlist (url, headers)
+        if (len (playlist['variants']) > 0):
+            url      = playlist['variants'][0]['uri']
+            playlist = fetch_playlist (url, headers)
+        playlist = radio_hls.complete_playlist (playlist, url, headers, \
+                                                job['duration'])
+    list_url = [segment['uri'] for segment in playlist['segments']]
+    if (len (list_url) == 0):
+        raise RuntimeError (f'no segments in playlist of {job["name"]}')
+    if (verbosity):
+        print (f'#    {job["name"]}: {len (list_url)} segments')
+    os.makedirs (os.path.dirname (job['file_aac']), exist_ok=True)
+    with radio_metrics.phase (job_metrics, 'download'):
+        (n_segments, n_bytes) \
+            = radio_hls.write_segments (list_url, job['file_aac_part'], \
+                                        headers=headers, workers=workers, \
+                                        file_journal=job['file_journal'])
+    radio_metrics.add (job_metrics, bytes=n_bytes, segments=n_segments)
+    with radio_metrics.phase (job_metrics, 'finalise'):
+        radio_hls.finalise (job['file_aac_part'], job['file_aac'])
+    return (n_segments, n_bytes)
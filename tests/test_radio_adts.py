@@ -0,0 +1,117 @@
+#
+# Time-stamp: <2026/10/19 12:48:10 (UT+08:00) daisuke>
+#
+
+######################################################################
+#                                                                    #
+# Tests of radio_adts                                                #
+#                                                                    #
+#  counting of ADTS frames, and conversion of MPEG-TS and packed     #
+#  audio segments into ADTS, on synthetic data of radio_fake_server. #
+#                                                                    #
+######################################################################
+
+######################################################################
+
+#
+# Importing modules
+#
+
+# importing os module
+import os
+
+# importing sys module
+import sys
+
+# importing unittest module
+import unittest
+
+# modules of this package are found in the parent directory
+sys.path.insert (0, os.path.dirname (os.path.dirname (os.path.abspath \
+                                                     (__file__))))
+
+# importing radio_adts module
+import radio_adts
+
+# importing radio_fake_server module
+import radio_fake_server
+
+######################################################################
+
+#
+# Tests
+#
+
+# ID3 tag of packed audio, with given size of body
+def id3_tag (size):
+    header = b'ID3\x04\x00\x00' \
+        + bytes ([(size >> 21) & 0x7F, (size >> 14) & 0x7F, \
+                  (size >> 7) & 0x7F, size & 0x7F])
+    return (header + bytes (size))
+
+# counting ADTS frames
+class TestScanFrames (unittest.TestCase):
+
+    # frames of one second of audio
+    def test_whole (self):
+        data = radio_fake_server.adts_data (1.0)
+        n_frames = round (radio_fake_server.sampling_frequency \
+                          / radio_fake_server.samples_per_frame)
+        (n, duration, end) = radio_adts.scan_frames (data)
+        self.assertEqual (n, n_frames)
+        self.assertAlmostEqual (duration, n_frames \
+                                * radio_fake_server.samples_per_frame \
+                                / radio_fake_server.sampling_frequency)
+        self.assertEqual (end, len (data))
+
+    # empty data
+    def test_empty (self):
+        self.assertEqual (radio_adts.scan_frames (b''), (0, 0.0, 0))
+
+    # garbage before the first frame is skipped
+    def test_garbage (self):
+        frame = radio_fake_server.adts_frame ()
+        data  = b'\x00\xff\x12garbage' + frame * 3
+        (n, duration, end) = radio_adts.scan_frames (data)
+        self.assertEqual (n, 3)
+        self.assertEqual (end, len (data))
+
+    # last frame cut short is not counted
+    def test_truncated (self):
+        frame = radio_fake_server.adts_frame ()
+        data  = frame * 3 + frame[:len (frame) // 2]
+        (n, duration, end) = radio_adts.scan_frames (data)
+        self.assertEqual (n, 3)
+        self.assertEqual (end, 3 * len (frame))
+
+# converting segments into ADTS
+class TestToAdts (unittest.TestCase):
+
+    # ADTS is returned as it is
+    def test_adts (self):
+        data = radio_fake_server.adts_data (0.5)
+        self.assertEqual (radio_adts.to_adts (data), data)
+
+    # MPEG-TS is demuxed into the ADTS it carries
+    def test_ts (self):
+        data = radio_fake_server.adts_data (2.0)
+        self.assertEqual (radio_adts.to_adts (radio_fake_server.ts_data \
+                                              (data)), data)
+
+    # ID3 tags of packed audio are removed
+    def test_id3 (self):
+        data = radio_fake_server.adts_data (0.5)
+        self.assertEqual (radio_adts.to_adts (id3_tag (30) + id3_tag (5) \
+                                              + data), data)
+
+    # MPEG-TS without audio stream is refused
+    def test_ts_without_audio (self):
+        packet = bytes ([radio_adts.ts_sync, 0x1F, 0xFF, 0x10]) \
+            + bytes (radio_adts.ts_packet_size - 4)
+        with self.assertRaises (ValueError):
+            radio_adts.to_adts (packet * 2)
+
+######################################################################
+
+if (__name__ == '__main__'):
+    unittest.main ()
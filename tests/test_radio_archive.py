@@ -0,0 +1,94 @@
+#
+# Time-stamp: <2026/10/19 13:46:05 (UT+08:00) daisuke>
+#
+
+######################################################################
+#                                                                    #
+# Tests of radio_archive                                             #
+#                                                                    #
+#  finding recorded files of recordings by program and start.       #
+#                                                                    #
+######################################################################
+
+######################################################################
+
+#
+# Importing modules
+#
+
+# importing datetime module
+import datetime
+
+# importing os module
+import os
+
+# importing sys module
+import sys
+
+# importing unittest module
+import unittest
+
+# modules of this package are found in the parent directory
+sys.path.insert (0, os.path.dirname (os.path.dirname (os.path.abspath \
+                                                     (__file__))))
+
+# importing radio_archive module
+import radio_archive
+
+######################################################################
+
+#
+# Tests
+#
+
+# files of programs, keyed by recording start with margin
+def program_files (list_name):
+    index = {'files': {name: {} for name in list_name}}
+    return (radio_archive.program_files (index))
+
+# finding files of recordings
+class TestFindFile (unittest.TestCase):
+
+    # recording of Tuesday morning, started 3 minutes before program
+    rec = {'program': 'morning', 'channel': 'r1', 'duration': 66}
+    datetime_start = datetime.datetime (2026, 10, 13, 4, 57)
+
+    # files sorted by start for each program
+    def test_program_files (self):
+        dic_files = program_files (['morning_20261014_0457.aac', \
+                                    'morning_20261013_0457.aac', \
+                                    'my_show_20261013_2300.aac'])
+        self.assertEqual (sorted (dic_files.keys ()), ['morning', 'my_show'])
+        self.assertEqual (dic_files['morning'][1], \
+                          ['morning_20261013_0457.aac', \
+                           'morning_20261014_0457.aac'])
+        self.assertEqual (dic_files['morning'][0][1] \
+                          - dic_files['morning'][0][0], 24 * 60)
+
+    # file named after the start of recording or of program
+    def test_found (self):
+        for name in ['morning_20261013_0456.aac', \
+                     'morning_20261013_0457.aac', \
+                     'morning_20261013_0500.aac', \
+                     'morning_20261013_0501.aac']:
+            dic_files = program_files ([name, 'morning_20261012_0457.aac', \
+                                        'morning_20261014_0457.aac'])
+            self.assertEqual (radio_archive.find_file (dic_files, self.rec, \
+                                                       self.datetime_start), \
+                              name)
+
+    # file too early or too late for the recording
+    def test_not_found (self):
+        for name in ['morning_20261013_0455.aac', \
+                     'morning_20261013_0502.aac', \
+                     'noon_20261013_0457.aac']:
+            dic_files = program_files ([name])
+            self.assertIsNone (radio_archive.find_file (dic_files, self.rec, \
+                                                        self.datetime_start))
+        self.assertIsNone (radio_archive.find_file ({}, self.rec, \
+                                                    self.datetime_start))
+
+######################################################################
+
+if (__name__ == '__main__'):
+    unittest.main ()
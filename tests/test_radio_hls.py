@@ -0,0 +1,184 @@
+#
+# Time-stamp: <2026/10/19 13:05:42 (UT+08:00) daisuke>
+#
+
+######################################################################
+#                                                                    #
+# Tests of radio_hls                                                 #
+#                                                                    #
+#  parsing of m3u8 playlists, and completion of playlists without    #
+#  ENDLIST against radio_fake_server.                                #
+#                                                                    #
+######################################################################
+
+######################################################################
+
+#
+# Importing modules
+#
+
+# importing datetime module
+import datetime
+
+# importing os module
+import os
+
+# importing sys module
+import sys
+
+# importing unittest module
+import unittest
+
+# modules of this package are found in the parent directory
+sys.path.insert (0, os.path.dirname (os.path.dirname (os.path.abspath \
+                                                     (__file__))))
+
+# importing radio_fake_server module
+import radio_fake_server
+
+# importing radio_hls module
+import radio_hls
+
+######################################################################
+
+#
+# Constants
+#
+
+# master playlist with two variants
+text_master = '''#EXTM3U
+#EXT-X-STREAM-INF:BANDWIDTH=48000,CODECS="mp4a.40.2"
+low/index.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=96000
+https://example.com/high/index.m3u8
+'''
+
+# media playlist of three segments
+text_media = '''#EXTM3U
+#EXT-X-VERSION:3
+#EXT-X-TARGETDURATION:5
+#EXT-X-MEDIA-SEQUENCE:100
+#EXT-X-PROGRAM-DATE-TIME:2026-10-19T05:00:00+09:00
+#EXTINF:5.000,
+seg/100.aac
+
+#EXTINF:5.000,
+seg/101.aac
+#EXTINF:2.5,title
+/seg/102.aac
+#EXT-X-ENDLIST
+'''
+
+######################################################################
+
+#
+# Tests
+#
+
+# parsing playlists
+class TestParsePlaylist (unittest.TestCase):
+
+    # variants of master playlist
+    def test_master (self):
+        playlist = radio_hls.parse_playlist (text_master, \
+                                             'http://host/a/master.m3u8')
+        self.assertEqual (playlist['variants'], [
+            {'uri': 'http://host/a/low/index.m3u8', 'bandwidth': 48000},
+            {'uri': 'https://example.com/high/index.m3u8', \
+             'bandwidth': 96000},
+        ])
+        self.assertEqual (playlist['segments'], [])
+
+    # segments of media playlist
+    def test_media (self):
+        playlist = radio_hls.parse_playlist (text_media, \
+                                             'http://host/a/index.m3u8')
+        self.assertEqual (playlist['media_sequence'], 100)
+        self.assertEqual (playlist['target_duration'], 5.0)
+        self.assertTrue (playlist['endlist'])
+        self.assertFalse (playlist['encrypted'])
+        self.assertEqual ([segment['uri'] \
+                           for segment in playlist['segments']], \
+                          ['http://host/a/seg/100.aac', \
+                           'http://host/a/seg/101.aac', \
+                           'http://host/seg/102.aac'])
+        self.assertEqual ([segment['sequence'] \
+                           for segment in playlist['segments']], \
+                          [100, 101, 102])
+        self.assertEqual ([segment['duration'] \
+                           for segment in playlist['segments']], \
+                          [5.0, 5.0, 2.5])
+
+    # date/time of segments following EXT-X-PROGRAM-DATE-TIME
+    def test_date_time (self):
+        playlist = radio_hls.parse_playlist (text_media)
+        time_start = datetime.datetime.fromisoformat \
+            ('2026-10-19T05:00:00+09:00').timestamp ()
+        self.assertEqual ([segment['date_time'] \
+                           for segment in playlist['segments']], \
+                          [time_start, time_start + 5.0, time_start + 10.0])
+
+    # playlist without ENDLIST, and encryption
+    def test_live (self):
+        text = text_media.replace ('#EXT-X-ENDLIST\n', '') \
+            .replace ('#EXTM3U\n', \
+                      '#EXTM3U\n#EXT-X-KEY:METHOD=AES-128,URI="k"\n')
+        playlist = radio_hls.parse_playlist (text)
+        self.assertFalse (playlist['endlist'])
+        self.assertTrue (playlist['encrypted'])
+
+# completing playlists without ENDLIST
+class TestCompletePlaylist (unittest.TestCase):
+
+    # starting server
+    @classmethod
+    def setUpClass (cls):
+        cls.config = dict (radio_fake_server.config)
+        (cls.server, cls.url_base) = radio_fake_server.start_server ()
+
+    # stopping server
+    @classmethod
+    def tearDownClass (cls):
+        radio_fake_server.stop_server (cls.server)
+
+    # restoring server settings
+    def tearDown (self):
+        radio_fake_server.config.update (self.config)
+
+    # fetching and parsing playlist
+    def fetch_playlist (self, url):
+        (status, body) = radio_hls.fetch (url)
+        self.assertEqual (status, 200)
+        return (radio_hls.parse_playlist (body.decode ('utf-8'), url))
+
+    # segments missing in the first playlist are added from the reload
+    def test_complete (self):
+        radio_fake_server.config['segment_sec'] = 1.0
+        url = f'{self.url_base}/vod/test/index.m3u8'
+        playlist_whole = self.fetch_playlist (url)
+        playlist = self.fetch_playlist (url)
+        playlist['segments'] = playlist['segments'][:3]
+        playlist['endlist']  = False
+        playlist = radio_hls.complete_playlist (playlist, url, timeout=10.0)
+        self.assertTrue (playlist['endlist'])
+        self.assertEqual (playlist['segments'], playlist_whole['segments'])
+
+    # live edge moving faster than the window leaves a hole
+    def test_hole (self):
+        radio_fake_server.config['live_segment_sec'] = 0.1
+        url = f'{self.url_base}/live/fm/media.m3u8'
+        playlist = self.fetch_playlist (url)
+        with self.assertRaisesRegex (RuntimeError, 'dropped out'):
+            radio_hls.complete_playlist (playlist, url, timeout=10.0)
+
+    # playlist never ending is given up after the timeout
+    def test_no_endlist (self):
+        url = f'{self.url_base}/live/fm/media.m3u8'
+        playlist = self.fetch_playlist (url)
+        with self.assertRaisesRegex (RuntimeError, 'no ENDLIST'):
+            radio_hls.complete_playlist (playlist, url, timeout=0.0)
+
+######################################################################
+
+if (__name__ == '__main__'):
+    unittest.main ()
@@ -0,0 +1,144 @@
+#
+# Time-stamp: <2026/10/19 13:21:37 (UT+08:00) daisuke>
+#
+
+######################################################################
+#                                                                    #
+# Tests of radio_program_list                                        #
+#                                                                    #
+#  parsing of program list lines, and busy intervals and reboot      #
+#  minutes derived from recordings.                                  #
+#                                                                    #
+######################################################################
+
+######################################################################
+
+#
+# Importing modules
+#
+
+# importing os module
+import os
+
+# importing sys module
+import sys
+
+# importing unittest module
+import unittest
+
+# modules of this package are found in the parent directory
+sys.path.insert (0, os.path.dirname (os.path.dirname (os.path.abspath \
+                                                     (__file__))))
+
+# importing radio_program_list module
+import radio_program_list
+
+######################################################################
+
+#
+# Tests
+#
+
+# minute of the week of given day of week, hour and minute
+def week_minute (wday, hh, mm):
+    return ( (wday - 1) * radio_program_list.minutes_day + hh * 60 + mm)
+
+# recordings with margins of given program list lines
+def recordings (lines):
+    programs = []
+    for line in lines:
+        programs += radio_program_list.parse_line (line)
+    return (radio_program_list.recordings (programs))
+
+# parsing lines of program list
+class TestParseLine (unittest.TestCase):
+
+    # program on several days
+    def test_days (self):
+        programs = radio_program_list.parse_line ('1,3 05:00 06:00 r1 morning')
+        self.assertEqual ([program['start'] for program in programs], \
+                          [week_minute (1, 5, 0), week_minute (3, 5, 0)])
+        self.assertEqual (programs[0]['duration'], 60)
+        self.assertEqual (programs[0]['channel'], 'r1')
+        self.assertEqual (programs[0]['program'], 'morning')
+        self.assertEqual (programs[0]['hhmm'], '0500')
+
+    # program over midnight
+    def test_midnight (self):
+        programs = radio_program_list.parse_line ('7 23:30 00:30 fm late')
+        self.assertEqual (programs[0]['start'], week_minute (7, 23, 30))
+        self.assertEqual (programs[0]['duration'], 60)
+
+    # comments and short lines
+    def test_ignored (self):
+        for line in ['', '# 1 05:00 06:00 r1 morning', '1 05:00 06:00 r1']:
+            self.assertEqual (radio_program_list.parse_line (line), [])
+
+# busy intervals of recordings
+class TestBusyIntervals (unittest.TestCase):
+
+    # end minute of a recording is busy, and touching intervals merge
+    def test_merge (self):
+        list_rec = [
+            {'start': 100, 'duration': 10},
+            {'start': 111, 'duration': 5},
+            {'start': 200, 'duration': 10},
+        ]
+        self.assertEqual (radio_program_list.busy_intervals (list_rec), \
+                          [[100, 117], [200, 211]])
+
+    # recording over the end of the week is split
+    def test_wrap (self):
+        minutes_week = radio_program_list.minutes_week
+        list_rec = [{'start': minutes_week - 10, 'duration': 20}]
+        self.assertEqual (radio_program_list.busy_intervals (list_rec), \
+                          [[0, 11], [minutes_week - 10, minutes_week]])
+
+    # no free time at all
+    def test_whole_week (self):
+        list_rec = [{'start': 0, 'duration': radio_program_list.minutes_week}]
+        self.assertEqual (radio_program_list.busy_intervals (list_rec), \
+                          [[0, radio_program_list.minutes_week]])
+
+# minutes of the week to reboot
+class TestRebootMinutes (unittest.TestCase):
+
+    # no reboot at the minute a recording ends
+    #  the morning recording ends at 06:03 with margin, and the short one
+    #  starts at 06:06, so that the gap is too short for the margin
+    def test_boundary (self):
+        list_rec = recordings (['2 05:00 06:00 r1 morning', \
+                                '2 06:09 06:30 r1 short'])
+        intervals = radio_program_list.busy_intervals (list_rec)
+        list_minute = radio_program_list.reboot_minutes (intervals)
+        self.assertNotIn (week_minute (2, 6, 3), list_minute)
+        self.assertEqual (list_minute, [week_minute (2, 4, 54)])
+
+    # reboot margin minutes before the next recording in each gap
+    def test_gaps (self):
+        list_rec = recordings (['2 05:00 06:00 r1 morning', \
+                                '2 07:00 08:00 r1 noon'])
+        intervals = radio_program_list.busy_intervals (list_rec)
+        self.assertEqual (radio_program_list.reboot_minutes (intervals), \
+                          [week_minute (2, 4, 54), week_minute (2, 6, 54)])
+        self.assertEqual (radio_program_list.reboot_minutes (intervals, \
+                                                             margin=5), \
+                          [week_minute (2, 4, 52), week_minute (2, 6, 52)])
+
+    # gaps shorter than min_gap are skipped
+    def test_min_gap (self):
+        list_rec = recordings (['2 05:00 06:00 r1 morning', \
+                                '2 07:00 08:00 r1 noon'])
+        intervals = radio_program_list.busy_intervals (list_rec)
+        self.assertEqual (radio_program_list.reboot_minutes (intervals, \
+                                                             min_gap=60), \
+                          [week_minute (2, 4, 54)])
+
+    # no recording, no reboot
+    def test_empty (self):
+        self.assertEqual (radio_program_list.reboot_minutes ([]), [])
+
+######################################################################
+
+if (__name__ == '__main__'):
+    unittest.main ()
@@ -0,0 +1,107 @@
+#
+# Time-stamp: <2026/10/19 13:34:52 (UT+08:00) daisuke>
+#
+
+######################################################################
+#                                                                    #
+# Tests of radio_shard                                               #
+#                                                                    #
+#  assignment of programs to recording hosts on the hash ring.       #
+#                                                                    #
+######################################################################
+
+######################################################################
+
+#
+# Importing modules
+#
+
+# importing os module
+import os
+
+# importing sys module
+import sys
+
+# importing unittest module
+import unittest
+
+# modules of this package are found in the parent directory
+sys.path.insert (0, os.path.dirname (os.path.dirname (os.path.abspath \
+                                                     (__file__))))
+
+# importing radio_shard module
+import radio_shard
+
+######################################################################
+
+#
+# Tests
+#
+
+# programs of equal costs
+def equal_programs (n):
+    return ({f'r1 program{i:02d}': {'program': f'program{i:02d}', \
+                                    'recs': [], 'bandwidth': 6000.0, \
+                                    'cpu': 0.01} \
+             for i in range (n)})
+
+# number of programs assigned to each host
+def host_counts (plan, hosts):
+    return ({host: len ([key for (key, list_host) in plan.items () \
+                         if (host in list_host)]) for host in hosts})
+
+# assigning programs to hosts
+class TestAssign (unittest.TestCase):
+
+    # every program goes to one host, within its share
+    def test_share (self):
+        dic_program = equal_programs (12)
+        dic_weight  = {'n1': 1, 'n2': 1, 'n3': 1}
+        plan = radio_shard.assign (dic_program, dic_weight)
+        self.assertEqual (sorted (plan.keys ()), sorted (dic_program.keys ()))
+        for list_host in plan.values ():
+            self.assertEqual (len (list_host), 1)
+        for count in host_counts (plan, dic_weight.keys ()).values ():
+            self.assertLessEqual (count, 1.25 * 12 / 3)
+
+    # shares follow weights of hosts
+    def test_weight (self):
+        dic_program = equal_programs (30)
+        dic_weight  = {'n1': 2, 'n2': 1}
+        counts = host_counts (radio_shard.assign (dic_program, dic_weight), \
+                              dic_weight.keys ())
+        self.assertEqual (sum (counts.values ()), 30)
+        self.assertLessEqual (counts['n1'], 1.25 * 30 * 2 / 3)
+        self.assertLessEqual (counts['n2'], 1.25 * 30 * 1 / 3)
+
+    # important programs go to distinct hosts
+    def test_replicas (self):
+        dic_program = equal_programs (6)
+        plan = radio_shard.assign (dic_program, {'n1': 1, 'n2': 1, 'n3': 1}, \
+                                   important=['program00', 'program03'])
+        for key in ['r1 program00', 'r1 program03']:
+            self.assertEqual (len (plan[key]), 2)
+            self.assertEqual (len (set (plan[key])), 2)
+        self.assertEqual (len (plan['r1 program01']), 1)
+        plan = radio_shard.assign (dic_program, {'n1': 1}, \
+                                   important=['program00'])
+        self.assertEqual (plan['r1 program00'], ['n1'])
+
+    # program too large for any share is still assigned
+    def test_overload (self):
+        dic_program = equal_programs (4)
+        dic_program['r1 program00']['bandwidth'] = 1e9
+        plan = radio_shard.assign (dic_program, {'n1': 1, 'n2': 1})
+        self.assertEqual (len (plan['r1 program00']), 1)
+
+    # same plan for same input
+    def test_deterministic (self):
+        dic_program = equal_programs (20)
+        dic_weight  = {'n1': 1, 'n2': 2, 'nb13': 1}
+        self.assertEqual (radio_shard.assign (dic_program, dic_weight), \
+                          radio_shard.assign (dic_program, dic_weight))
+
+######################################################################
+
+if (__name__ == '__main__'):
+    unittest.main ()